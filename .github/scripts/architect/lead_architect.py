@@ -1,30 +1,27 @@
 import os
 import json
-import subprocess
 import google.generativeai as genai
 from pathlib import Path
 
+from researcher import research
+from repo_index import get_repo_summary
+
 # 初始化 Gemini
 genai.configure(api_key=os.environ["GEMINI_API_KEY"])
 model = genai.GenerativeModel('gemini-1.5-pro')
 
 def get_repo_structure():
-    """扫描项目全貌，包括文件内容，以便 AI 理解当前进度"""
-    structure = {}
-    exclude = {'.git', 'node_modules', 'target', '.github', 'ai-orchestrator/internal_state'}
-    for root, dirs, files in os.walk("."):
-        dirs[:] = [d for d in dirs if d not in exclude]
-        relative_path = os.path.relpath(root, ".")
-        structure[relative_path] = files
-    return structure
+    """项目全貌：按目录汇总的文件数、体积和主要文件类型（增量索引，遵守 .gitignore）"""
+    return get_repo_summary()
 
 def run_research(topic):
-    """调用 researcher.py 获取实时数据"""
-    result = subprocess.run(
-        ["python", ".github/scripts/architect/researcher.py", topic],
-        capture_ascii=True, text=True, encoding='utf-8'
-    )
-    return result.stdout
+    """在进程内调用 researcher 获取实时数据（带缓存，多个查询变体并发）"""
+    try:
+        results = research(topic)
+    except Exception as e:
+        print(f"⚠️  联网调研失败: {e}")
+        results = []
+    return json.dumps(results, ensure_ascii=False, indent=2)
 
 def lead_architect_evolution():
     print("🚀 架构师开始自主演进审计...")
@@ -37,7 +34,8 @@ def lead_architect_evolution():
     strategic_prompt = f"""
     你是《Small Hero》项目的自主架构师。
     
-    当前代码仓库结构: {json.dumps(repo_map)}
+    当前代码仓库结构（按目录汇总）:
+{repo_map}
     
     你的职责：
     1. 对比《小小勇者》原版游戏（包含战斗、数值、精灵、佣兵、以太、雕像等系统）。
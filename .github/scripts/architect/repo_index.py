@@ -0,0 +1,174 @@
+"""
+仓库文件索引
+基于 git 跟踪的文件（天然遵守 .gitignore）维护 路径 -> 大小 的持久索引：
+上次索引的提交仍可达时只处理 git diff 的变更，否则用一次 git ls-tree 全量重建；
+输出按目录汇总文件数、体积和主要扩展名的紧凑树，提示词长度不随文件数增长
+"""
+import os
+import sys
+import json
+import subprocess
+from collections import Counter, defaultdict
+
+INDEX_PATH = '.cache/repo-index.json'
+
+# 不纳入索引的路径前缀和目录名
+EXCLUDE_PREFIXES = ('.github/', 'ai-orchestrator/internal_state/')
+EXCLUDE_DIRS = {'node_modules', 'target', '.git'}
+
+SUMMARY_DEPTH = 3
+SUMMARY_MAX_DIRS = 60
+TOP_EXTENSIONS = 3
+
+
+def _git(*args):
+    result = subprocess.run(['git', *args], capture_output=True, check=True)
+    return result.stdout.decode('utf-8', errors='replace')
+
+
+def _excluded(path):
+    if path.startswith(EXCLUDE_PREFIXES):
+        return True
+    return any(part in EXCLUDE_DIRS for part in path.split('/')[:-1])
+
+
+def _ls_tree(commit, paths=None):
+    """git ls-tree --long 得到 路径 -> 大小"""
+    args = ['ls-tree', '-r', '-z', '--long', commit]
+    if paths:
+        args += ['--', *paths]
+    sizes = {}
+    for record in _git(*args).split('\0'):
+        if not record:
+            continue
+        meta, path = record.split('\t', 1)
+        _, obj_type, _, size = meta.split()
+        if obj_type == 'blob' and not _excluded(path):
+            sizes[path] = int(size)
+    return sizes
+
+
+def _load_index(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(path, index):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def _is_ancestor(old, new):
+    return subprocess.run(
+        ['git', 'merge-base', '--is-ancestor', old, new], capture_output=True
+    ).returncode == 0
+
+
+def _chunks(fields):
+    """把 --name-status -z 的输出切成 (状态, 路径) 对"""
+    fields = [f for f in fields if f]
+    return zip(fields[0::2], fields[1::2])
+
+
+def update_index(index_path=INDEX_PATH):
+    """
+    更新索引到 HEAD
+
+    Returns:
+        路径 -> 大小（已跟踪文件 + 未被忽略的未跟踪文件）
+    """
+    head = _git('rev-parse', 'HEAD').strip()
+    index = _load_index(index_path)
+    files = index.get('files', {})
+    old = index.get('commit')
+
+    if old == head:
+        print(f"🗂️  仓库索引已是最新: {head[:7]}")
+    elif old and _is_ancestor(old, head):
+        changed = []
+        for record in _chunks(_git('diff', '--name-status', '--no-renames', '-z', old, head).split('\0')):
+            status, path = record
+            if status == 'D':
+                files.pop(path, None)
+            else:
+                changed.append(path)
+        # 分批查询，避免命令行过长
+        for start in range(0, len(changed), 500):
+            batch = changed[start:start + 500]
+            for path in batch:
+                files.pop(path, None)
+            files.update(_ls_tree(head, batch))
+        print(f"🗂️  仓库索引增量更新: {old[:7]}..{head[:7]}，{len(changed)} 个文件变更")
+    else:
+        files = _ls_tree(head)
+        print(f"🗂️  仓库索引全量重建: {len(files)} 个文件")
+
+    if old != head:
+        _save_index(index_path, {'commit': head, 'files': files})
+
+    # 工作区中未提交的新文件（已按 .gitignore 过滤），不写入索引
+    result = dict(files)
+    for path in _git('ls-files', '--others', '--exclude-standard', '-z').split('\0'):
+        if path and not _excluded(path):
+            try:
+                result[path] = os.path.getsize(path)
+            except OSError:
+                pass
+    return result
+
+
+def summarize(files, depth=SUMMARY_DEPTH, max_dirs=SUMMARY_MAX_DIRS):
+    """
+    按目录汇总：超过 depth 层的目录并入祖先目录，最多输出 max_dirs 个目录，其余合并为一行
+
+    Returns:
+        每行一个目录的文本
+    """
+    counts = Counter()
+    sizes = Counter()
+    extensions = defaultdict(Counter)
+    for path, size in files.items():
+        parts = path.split('/')[:-1]
+        directory = '/'.join(parts[:depth]) or '.'
+        counts[directory] += 1
+        sizes[directory] += size
+        extensions[directory][os.path.splitext(path)[1] or '(无扩展名)'] += 1
+
+    # 文件多的目录优先，超出上限的合并
+    ordered = sorted(counts, key=lambda d: counts[d], reverse=True)
+    kept = sorted(ordered[:max_dirs])
+    rest = ordered[max_dirs:]
+
+    lines = [f"共 {len(files)} 个文件，{_format_size(sum(sizes.values()))}"]
+    for directory in kept:
+        top = ' '.join(f"{ext}×{n}" for ext, n in extensions[directory].most_common(TOP_EXTENSIONS))
+        lines.append(f"{directory}/ {counts[directory]} 个文件 {_format_size(sizes[directory])} {top}")
+    if rest:
+        lines.append(f"其余 {len(rest)} 个目录 {sum(counts[d] for d in rest)} 个文件 "
+                     f"{_format_size(sum(sizes[d] for d in rest))}")
+    return '\n'.join(lines)
+
+
+def _format_size(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def get_repo_summary(index_path=INDEX_PATH):
+    """更新索引并返回目录汇总"""
+    return summarize(update_index(index_path))
+
+
+if __name__ == "__main__":
+    print(get_repo_summary(sys.argv[1] if len(sys.argv) > 1 else INDEX_PATH))
@@ -1,28 +1,179 @@
+"""
+联网调研模块（无需 API Key）
+同一主题的多个查询变体并发搜索，结果去重、排序后按规范化主题缓存，缓存有效期内不再联网
+"""
+import os
+import re
 import sys
-from duckduckgo_search import DDGS
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 
-def deep_research_game_mechanic(topic):
-    """
-    无需 API Key 的联网搜索函数，专门抓取《小小勇者》的精细数据
-    """
+from duckduckgo_search import DDGS
+
+CACHE_PATH = '.cache/research-cache.json'
+CACHE_TTL_HOURS = 24
+
+# 每个主题的查询变体：数值公式、玩法机制、攻略
+QUERY_TEMPLATES = (
+    "小小勇者 {topic} 详细数值公式 玩法机制",
+    "小小勇者 {topic} 攻略",
+    "小小勇者 {topic} 系统介绍 数值",
+)
+RESULTS_PER_QUERY = 8
+
+# 出现在标题或摘要中会加分的词
+BOOST_TERMS = ('公式', '数值', '机制', '攻略', '属性', '伤害', '成长')
+
+_PUNCTUATION = re.compile(r'[\s\W_]+', re.UNICODE)
+
+
+def normalize_topic(topic):
+    """规范化主题作为缓存键：小写、去标点、合并空白"""
+    return _PUNCTUATION.sub(' ', topic.lower()).strip()
+
+
+def normalize_url(url):
+    """去掉协议、www、查询参数和末尾斜杠，用于去重"""
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    return f"{host}{parts.path.rstrip('/')}"
+
+
+def _load_cache(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # 手工编辑或写了一半的缓存：不是对象的条目直接忽略
+    if not isinstance(cache, dict):
+        return {}
+    return {k: v for k, v in cache.items() if isinstance(v, dict)}
+
+
+def _save_cache(path, cache):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def search_query(query, max_results=RESULTS_PER_QUERY):
+    """执行单个查询，每个线程使用独立的 DDGS 会话"""
+    print(f"🔍 正在互联网搜索: {query}...")
     results = []
     with DDGS() as ddgs:
-        # 针对性搜索攻略、数值公式、玩法介绍
-        query = f"小小勇者 {topic} 详细数值公式 玩法机制"
-        print(f"🔍 正在互联网搜索: {query}...")
-        ddgs_gen = ddgs.text(query, region='cn-zh', safesearch='off', timelimit='y')
-        for i, r in enumerate(ddgs_gen):
-            if i >= 5: break  # 获取前5条高质量结果
+        for i, r in enumerate(ddgs.text(query, region='cn-zh', safesearch='off', timelimit='y')):
+            if i >= max_results:
+                break
             results.append({
                 "title": r['title'],
                 "body": r['body'],
-                "href": r['href']
+                "href": r['href'],
+                "rank": i
             })
     return results
 
+
+def rank_results(topic, result_lists, max_results):
+    """
+    合并多个查询的结果：按 URL 去重，
+    被多个查询命中、排名靠前、包含主题词和数值相关词的结果优先
+    """
+    topic_terms = [t for t in normalize_topic(topic).split() if t]
+    merged = {}
+
+    for results in result_lists:
+        for r in results:
+            key = normalize_url(r['href'])
+            text = f"{r['title']} {r['body']}".lower()
+            score = 1.0 / (1 + r['rank'])
+            score += sum(0.5 for term in topic_terms if term in text)
+            score += sum(0.2 for term in BOOST_TERMS if term in text)
+
+            entry = merged.get(key)
+            if entry is None:
+                merged[key] = {'title': r['title'], 'body': r['body'], 'href': r['href'], 'score': score}
+            else:
+                # 被多个查询命中：累加得分，保留更长的摘要
+                entry['score'] += score
+                if len(r['body']) > len(entry['body']):
+                    entry['body'] = r['body']
+
+    # 标题相同的不同 URL（转载）只保留得分最高的一条
+    ranked = []
+    seen_titles = set()
+    for entry in sorted(merged.values(), key=lambda e: e['score'], reverse=True):
+        title_key = normalize_topic(entry['title'])
+        if title_key in seen_titles:
+            continue
+        seen_titles.add(title_key)
+        ranked.append({k: entry[k] for k in ('title', 'body', 'href')})
+        if len(ranked) >= max_results:
+            break
+    return ranked
+
+
+def research(topic, max_results=5, ttl_hours=CACHE_TTL_HOURS, cache_path=CACHE_PATH):
+    """
+    调研一个主题
+
+    Args:
+        topic: 主题（如 "以太系统"）
+        max_results: 返回的结果数
+        ttl_hours: 缓存有效期（小时），0 表示不使用缓存
+        cache_path: 缓存文件路径
+
+    Returns:
+        [{title, body, href}]，按相关度排序
+    """
+    key = normalize_topic(topic)
+    cache = _load_cache(cache_path) if ttl_hours else {}
+    entry = cache.get(key)
+    # 缺少 createdAt 的条目视为已过期
+    if entry and time.time() - entry.get('createdAt', 0) < ttl_hours * 3600 \
+            and entry.get('maxResults', 0) >= max_results and isinstance(entry.get('results'), list):
+        print(f"💾 调研缓存命中: {topic}")
+        return entry['results'][:max_results]
+
+    queries = [template.format(topic=topic) for template in QUERY_TEMPLATES]
+    with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+        futures = [executor.submit(search_query, query) for query in queries]
+
+    result_lists = []
+    for query, future in zip(queries, futures):
+        try:
+            result_lists.append(future.result())
+        except Exception as e:
+            print(f"⚠️  搜索失败 ({query}): {e}")
+
+    results = rank_results(topic, result_lists, max_results)
+
+    # 全部查询失败时不写缓存，下次重新搜索
+    if ttl_hours and result_lists:
+        now = time.time()
+        cache = {k: v for k, v in _load_cache(cache_path).items() if now - v.get('createdAt', 0) < ttl_hours * 3600}
+        cache[key] = {'topic': topic, 'createdAt': now, 'maxResults': max_results, 'results': results}
+        _save_cache(cache_path, cache)
+    return results
+
+
+def deep_research_game_mechanic(topic):
+    """
+    无需 API Key 的联网搜索函数，专门抓取《小小勇者》的精细数据
+    """
+    return research(topic)
+
+
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         topic = sys.argv[1]
-        data = deep_research_game_mechanic(topic)
-        print(json.dumps(data, ensure_ascii=False, indent=2))
\ No newline at end of file
+        data = research(topic)
+        print(json.dumps(data, ensure_ascii=False, indent=2))
@@ -3,45 +3,31 @@
 评估已完成的功能和下一步方向
 """
 import os
+import sys
 import json
-import subprocess
 from datetime import datetime
-import google.generativeai as genai
 
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-genai.configure(api_key=GEMINI_API_KEY)
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from scripts.utils.ai_helper import create_ai_helper
+from scripts.utils.prompt_builder import PromptBuilder, select_config, strip_fields
+from scripts.utils.git_stats import collect_git_stats
 
 def get_git_stats():
-    """获取 Git 统计信息"""
+    """获取 Git 统计信息（按 HEAD 缓存）"""
     print("📊 分析 Git 代码统计...")
     
-    stats = {
-        'total_commits': 0,
-        'backend_files': 0,
-        'frontend_files': 0,
-        'total_lines': 0
-    }
-    
     try:
-        # 获取提交数
-        result = subprocess.run(['git', 'rev-list', '--count', 'HEAD'], 
-                              capture_output=True, text=True)
-        stats['total_commits'] = int(result.stdout.strip())
-        
-        # 统计后端文件
-        result = subprocess.run(['git', 'ls-files', 'backend/**/*.java'], 
-                              capture_output=True, text=True, shell=True)
-        stats['backend_files'] = len(result.stdout.strip().split('\n')) if result.stdout.strip() else 0
-        
-        # 统计前端文件
-        result = subprocess.run(['git', 'ls-files', 'frontend/**/*.tsx', 'frontend/**/*.ts'], 
-                              capture_output=True, text=True, shell=True)
-        stats['frontend_files'] = len(result.stdout.strip().split('\n')) if result.stdout.strip() else 0
-        
+        return collect_git_stats()
     except Exception as e:
         print(f"⚠️  Git 统计失败: {e}")
-    
-    return stats
+        return {
+            'total_commits': 0,
+            'backend_files': 0,
+            'frontend_files': 0,
+            'total_lines': 0
+        }
 
 def read_current_config():
     """读取当前项目配置"""
@@ -69,21 +55,16 @@ def analyze_progress_with_ai(git_stats, config, research):
     """使用 AI 分析项目进度"""
     print("🤖 使用 AI 分析项目进度...")
     
-    model = genai.GenerativeModel('gemini-2.0-flash-exp')
+    budget_config = config.get('aiModelConfig', {}).get('architect', {}).get('promptBudget', {})
     
-    prompt = f"""
-你是小小勇者克隆项目的首席架构师。请根据以下信息分析项目当前进度：
-
-**项目配置信息：**
-{json.dumps(config, ensure_ascii=False, indent=2)}
-
-**Git 代码统计：**
-{json.dumps(git_stats, ensure_ascii=False, indent=2)}
-
-**最新游戏研究：**
-{json.dumps(research, ensure_ascii=False, indent=2)}
-
-请完成以下分析：
+    # 按 Token 预算组装上下文；去掉抓取时间戳和原始 HTML，
+    # 既减少 Token，也保证同一份数据生成相同的提示词以便命中响应缓存
+    builder = PromptBuilder.from_config(budget_config)
+    builder.add_section('项目配置信息', select_config(config), priority=1)
+    builder.add_section('Git 代码统计', git_stats, priority=2)
+    builder.add_section('最新游戏研究', strip_fields(research, ('scraped_at', 'raw_html')), priority=3)
+    
+    instructions = """请完成以下分析：
 
 1. **当前完成度评估**（0-100%）：
    - 基础架构完成度
@@ -104,9 +85,18 @@ def analyze_progress_with_ai(git_stats, config, research):
 请以 JSON 格式输出，便于程序解析。
 """
     
+    prompt = f"""
+你是小小勇者克隆项目的首席架构师。请根据以下信息分析项目当前进度：
+
+{builder.render(instructions)}
+
+{instructions}"""
+    
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        ai_helper = create_ai_helper('architect')
+        analysis = ai_helper.generate_content(prompt)
+        print(f"💾 响应缓存: {ai_helper.cache_summary()}")
+        return analysis
     except Exception as e:
         print(f"❌ AI 分析失败: {e}")
         return None
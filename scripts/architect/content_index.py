@@ -0,0 +1,207 @@
+"""
+架构师 - 爬取内容索引
+按 URL 记录每条爬取内容的 SimHash 指纹，跨天对比：只有新增或内容明显变化的条目送去 AI 分析，
+未变化的条目在日报中只保留引用
+"""
+import re
+import json
+import hashlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from scripts.utils.state_file import read_json, write_json_atomic
+
+CONFIG_PATH = 'ai-orchestrator/project-config.json'
+INDEX_PATH = 'docs/game-research/content-index.json'
+
+# 来源中的条目列表字段；没有列表字段的来源整体视为一个条目
+ITEM_LIST_FIELDS = ('posts', 'videos')
+# 参与指纹计算的文本字段（点赞数、播放量等易变字段不参与）
+FINGERPRINT_FIELDS = ('title', 'content', 'description', 'text', 'headings', 'keywords')
+
+SIMHASH_BITS = 64
+# 指纹汉明距离不超过该值视为内容未明显变化
+DEFAULT_MAX_DISTANCE = 3
+# 超过该天数未再出现的条目从索引中移除
+RETENTION_DAYS = 90
+
+_WORD = re.compile(r'[a-z0-9]+|[一-鿿]+')
+
+
+def _features(text: str) -> List[str]:
+    """英文按词、中文按相邻双字切分"""
+    features = []
+    for token in _WORD.findall(text.lower()):
+        if token[0] >= '一' and len(token) > 1:
+            features.extend(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            features.append(token)
+    return features
+
+
+def simhash(text: str) -> int:
+    """64 位 SimHash 指纹"""
+    weights = [0] * SIMHASH_BITS
+    for feature in _features(text):
+        value = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(SIMHASH_BITS) if weights[bit] > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def item_text(item: Dict) -> str:
+    """条目中参与指纹计算的文本"""
+    parts = []
+    for field in FINGERPRINT_FIELDS:
+        value = item.get(field)
+        if isinstance(value, list):
+            parts.extend(str(v) for v in value)
+        elif value:
+            parts.append(str(value))
+    return '\n'.join(parts)
+
+
+class ContentIndex:
+    """爬取内容索引类"""
+
+    def __init__(
+        self,
+        index_path: str = INDEX_PATH,
+        max_distance: int = DEFAULT_MAX_DISTANCE,
+        retention_days: int = RETENTION_DAYS
+    ):
+        """
+        初始化索引
+
+        Args:
+            index_path: 索引文件路径
+            max_distance: 视为未变化的最大汉明距离
+            retention_days: 超过该天数未再出现的条目被移除
+        """
+        self.index_path = index_path
+        self.max_distance = max_distance
+        self.retention_days = retention_days
+        self.items: Dict[str, Dict] = read_json(index_path).get('items', {})
+        self.stats = {
+            'new': 0,
+            'changed': 0,
+            'unchanged': 0
+        }
+
+    @classmethod
+    def from_config(cls, config_path: str = CONFIG_PATH) -> 'ContentIndex':
+        """根据 scraperConfig.contentIndex 配置创建"""
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                index_config = json.load(f).get('scraperConfig', {}).get('contentIndex', {})
+        except (OSError, ValueError):
+            index_config = {}
+
+        return cls(
+            index_path=index_config.get('path', INDEX_PATH),
+            max_distance=index_config.get('maxDistance', DEFAULT_MAX_DISTANCE),
+            retention_days=index_config.get('retentionDays', RETENTION_DAYS)
+        )
+
+    def _classify(self, url: str, source_name: str, item: Dict, day: str) -> Tuple[str, Dict]:
+        """
+        对比指纹并更新索引
+
+        Returns:
+            (new / changed / unchanged, 索引条目)
+        """
+        fingerprint = simhash(item_text(item))
+        entry = self.items.get(url)
+
+        if entry is None:
+            status = 'new'
+            entry = {'source': source_name, 'firstSeen': day, 'lastChanged': day}
+        elif hamming_distance(int(entry['fingerprint'], 16), fingerprint) > self.max_distance:
+            status = 'changed'
+            entry['lastChanged'] = day
+        elif entry['lastChanged'] == day:
+            # 同一天内的再次爬取，沿用当天首次的判断，日报被覆盖时内容不会丢失
+            status = 'new' if entry['firstSeen'] == day else 'changed'
+        else:
+            status = 'unchanged'
+
+        # 未变化时保留原指纹，避免小改动逐日累积而始终检测不到
+        if status != 'unchanged':
+            entry['fingerprint'] = f"{fingerprint:016x}"
+        entry['title'] = item.get('title', '')
+        entry['lastSeen'] = day
+        self.items[url] = entry
+        self.stats[status] += 1
+        return status, entry
+
+    @staticmethod
+    def _reference(url: str, entry: Dict) -> Dict:
+        """未变化条目在日报中的引用"""
+        return {
+            'url': url,
+            'title': entry.get('title', ''),
+            'unchanged_since': entry['lastChanged'],
+            'fingerprint': entry['fingerprint']
+        }
+
+    def update(self, sources: List[Dict], day: str) -> Tuple[List[Dict], List[Dict]]:
+        """
+        用当天的爬取结果更新索引
+
+        Args:
+            sources: ContentScraper 的爬取结果
+            day: 日期（YYYY-MM-DD）
+
+        Returns:
+            (日报用的来源列表：未变化条目替换为引用, 需要 AI 分析的来源列表：只含新增或变化的条目)
+        """
+        report_sources = []
+        fresh_sources = []
+
+        for source in sources:
+            list_field = next((f for f in ITEM_LIST_FIELDS if f in source), None)
+
+            if list_field is None:
+                url = source.get('url') or source['source']
+                status, entry = self._classify(url, source['source'], source, day)
+                if status == 'unchanged':
+                    report_sources.append({
+                        'source': source['source'],
+                        'scraped_at': source.get('scraped_at'),
+                        **self._reference(url, entry)
+                    })
+                else:
+                    report_sources.append(dict(source, change=status))
+                    fresh_sources.append(source)
+                continue
+
+            report_items = []
+            fresh_items = []
+            for item in source[list_field]:
+                url = item.get('url') or f"{source['source']}:{item.get('title', '')}"
+                status, entry = self._classify(url, source['source'], item, day)
+                if status == 'unchanged':
+                    report_items.append(self._reference(url, entry))
+                else:
+                    report_items.append(dict(item, change=status))
+                    fresh_items.append(item)
+
+            report_sources.append(dict(source, **{list_field: report_items}))
+            if fresh_items:
+                fresh_sources.append(dict(source, **{list_field: fresh_items}))
+
+        return report_sources, fresh_sources
+
+    def save(self, day: str):
+        """保存索引，顺带移除长期未出现的条目"""
+        cutoff = (datetime.strptime(day, '%Y-%m-%d') - timedelta(days=self.retention_days)).strftime('%Y-%m-%d')
+        self.items = {url: entry for url, entry in self.items.items() if entry['lastSeen'] >= cutoff}
+        write_json_atomic(self.index_path, {'items': self.items})
+
+    def summary(self) -> str:
+        """统计摘要"""
+        return f"新增 {self.stats['new']}，变化 {self.stats['changed']}，未变化 {self.stats['unchanged']}"
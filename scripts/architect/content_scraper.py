@@ -0,0 +1,302 @@
+"""
+架构师 - 多来源并发爬取引擎
+按 scraperConfig.sources 配置并发爬取各来源：asyncio 调度、每个主机独立的连接池、全局并发上限，
+总耗时取决于最慢的来源而不是各来源之和；请求带 ETag/Last-Modified 条件头，未变化的内容从本地缓存读取；
+网页边下载边提取字段，提取完毕即断开连接
+"""
+import re
+import json
+import time
+import asyncio
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from scripts.architect.html_extract import PageExtractor
+from scripts.utils.http_cache import CachedResponse, HttpCache, DEFAULT_CACHE_DIR as HTTP_CACHE_DIR
+
+CONFIG_PATH = 'ai-orchestrator/project-config.json'
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+BILIBILI_HOME_URL = 'https://www.bilibili.com/'
+BILIBILI_SEARCH_URL = 'https://api.bilibili.com/x/web-interface/search/type'
+BILIBILI_RESULTS_PER_KEYWORD = 10
+
+STREAM_CHUNK_SIZE = 16 * 1024
+
+_HTML_TAG = re.compile(r'<[^>]+>')
+
+
+class ContentScraper:
+    """并发爬取类"""
+
+    def __init__(
+        self,
+        sources: List[Dict],
+        max_concurrency: int = 4,
+        per_host_connections: int = 2,
+        timeout: float = 10,
+        http_cache: Optional[HttpCache] = None
+    ):
+        """
+        初始化爬取引擎
+
+        Args:
+            sources: 来源配置列表（name、url、type，视频来源另有 keywords）
+            max_concurrency: 同时进行的请求数上限
+            per_host_connections: 每个主机的连接池大小
+            timeout: 单个请求超时（秒）
+            http_cache: 条件请求缓存，None 表示不缓存
+        """
+        self.sources = sources
+        self.max_concurrency = max_concurrency
+        self.per_host_connections = per_host_connections
+        self.timeout = timeout
+        self.http_cache = http_cache
+        self._sessions: Dict[str, requests.Session] = {}
+        self._sessions_lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        # 来源类型 -> 解析协程
+        self.parsers: Dict[str, Callable] = {
+            'game-info': self._scrape_game_info,
+            'community': self._scrape_community,
+            'video-content': self._scrape_video_content
+        }
+
+    @classmethod
+    def from_config(cls, config_path: str = CONFIG_PATH) -> 'ContentScraper':
+        """根据 scraperConfig 配置创建"""
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                scraper_config = json.load(f).get('scraperConfig', {})
+        except (OSError, ValueError):
+            scraper_config = {}
+
+        cache_config = scraper_config.get('httpCache', {})
+        http_cache = HttpCache(cache_config.get('dir', HTTP_CACHE_DIR)) if cache_config.get('enabled', True) else None
+
+        return cls(
+            sources=scraper_config.get('sources', []),
+            max_concurrency=scraper_config.get('maxConcurrency', 4),
+            per_host_connections=scraper_config.get('perHostConnections', 2),
+            timeout=scraper_config.get('timeout', 10000) / 1000,
+            http_cache=http_cache
+        )
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    def _session(self, url: str) -> requests.Session:
+        """获取目标主机的会话，同一主机的请求复用连接和 Cookie"""
+        host = urlparse(url).netloc
+        with self._sessions_lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                session.headers['User-Agent'] = USER_AGENT
+                # pool_block 保证每个主机的并发连接不超过连接池大小
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.per_host_connections, pool_block=True)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[host] = session
+        return session
+
+    def _get(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+             cache: bool = True, consumer: Optional[PageExtractor] = None) -> CachedResponse:
+        """
+        阻塞式 GET，在工作线程中执行；启用缓存时发送条件请求，304 返回本地副本
+
+        Args:
+            consumer: 流式消费者，逐块 feed 响应体，返回 True 时停止下载；
+                      此时返回（和缓存）的内容只是已读取的前缀
+        """
+        headers = dict(headers or {})
+        key = None
+        if cache and self.http_cache is not None:
+            key = self.http_cache.make_key(url, params)
+            headers.update(self.http_cache.conditional_headers(key))
+
+        response = self._session(url).get(
+            url, params=params, headers=headers, timeout=self.timeout, stream=consumer is not None
+        )
+        try:
+            if response.status_code == 304 and key is not None:
+                cached = self.http_cache.load(key)
+                if cached is not None:
+                    if consumer is not None:
+                        for offset in range(0, len(cached.content), STREAM_CHUNK_SIZE):
+                            if consumer.feed(cached.content[offset:offset + STREAM_CHUNK_SIZE]):
+                                break
+                    return cached
+                # 本地副本丢失，去掉条件头重新下载
+                return self._get(url, params=params, headers={
+                    k: v for k, v in headers.items() if k not in ('If-None-Match', 'If-Modified-Since')
+                }, cache=False, consumer=consumer)
+
+            response.raise_for_status()
+            if consumer is None:
+                content = response.content
+            else:
+                chunks = []
+                for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                    chunks.append(chunk)
+                    if consumer.feed(chunk):
+                        break
+                content = b''.join(chunks)
+
+            if key is not None:
+                self.http_cache.store(key, url, response, content)
+            return CachedResponse(content, response.status_code, dict(response.headers), response.encoding)
+        finally:
+            response.close()
+
+    async def fetch(self, url: str, **kwargs) -> CachedResponse:
+        """受全局并发上限约束的异步 GET"""
+        async with self._semaphore:
+            return await asyncio.to_thread(self._get, url, **kwargs)
+
+    def close(self):
+        """关闭所有会话"""
+        with self._sessions_lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    # ------------------------------------------------------------------
+    # 各类来源
+    # ------------------------------------------------------------------
+
+    async def _scrape_game_info(self, source: Dict) -> Dict:
+        """游戏详情页：流式提取标题、meta、JSON-LD 和少量正文"""
+        url = source['url']
+        extractor = PageExtractor(
+            max_bytes=source.get('maxBytes', 256 * 1024),
+            max_text_chars=source.get('maxTextChars', 2000)
+        )
+        await self.fetch(url, consumer=extractor)
+
+        return {
+            'source': source['name'],
+            'url': url,
+            'scraped_at': datetime.now().isoformat(),
+            **extractor.result()
+        }
+
+    async def _scrape_community(self, source: Dict) -> Dict:
+        """Reddit 社区：读取 top.json 中的热门帖子"""
+        url = source['url'].rstrip('/') + '/top.json'
+        response = await self.fetch(url, params={'limit': source.get('limit', 10)})
+        data = response.json()
+
+        posts = []
+        for post in data['data']['children']:
+            post_data = post['data']
+            posts.append({
+                'title': post_data.get('title', ''),
+                'content': post_data.get('selftext', ''),
+                'score': post_data.get('score', 0),
+                'url': f"https://www.reddit.com{post_data.get('permalink', '')}"
+            })
+
+        return {
+            'source': source['name'],
+            'scraped_at': datetime.now().isoformat(),
+            'posts': posts
+        }
+
+    async def _scrape_video_content(self, source: Dict) -> Dict:
+        """B 站视频：按关键词并发搜索"""
+        # 搜索接口需要首页下发的 buvid3 Cookie，会话按主机复用，先访问一次首页
+        await self.fetch(BILIBILI_HOME_URL, cache=False)
+        session = self._session(BILIBILI_HOME_URL)
+        api_session = self._session(BILIBILI_SEARCH_URL)
+        api_session.cookies.update(session.cookies)
+
+        keywords = source.get('keywords', [])
+        results = await asyncio.gather(
+            *(self._search_bilibili(keyword) for keyword in keywords),
+            return_exceptions=True
+        )
+
+        videos = []
+        seen = set()
+        for keyword, result in zip(keywords, results):
+            if isinstance(result, Exception):
+                print(f"⚠️  {source['name']} 关键词「{keyword}」搜索失败: {result}")
+                continue
+            for video in result:
+                if video['url'] not in seen:
+                    seen.add(video['url'])
+                    videos.append(video)
+
+        return {
+            'source': source['name'],
+            'scraped_at': datetime.now().isoformat(),
+            'videos': videos
+        }
+
+    async def _search_bilibili(self, keyword: str) -> List[Dict]:
+        response = await self.fetch(
+            BILIBILI_SEARCH_URL,
+            params={'search_type': 'video', 'keyword': keyword, 'page': 1},
+            headers={'Referer': BILIBILI_HOME_URL}
+        )
+        data = response.json()
+        if data.get('code') != 0:
+            raise RuntimeError(f"接口返回 {data.get('code')}: {data.get('message')}")
+
+        videos = []
+        for item in (data.get('data') or {}).get('result', [])[:BILIBILI_RESULTS_PER_KEYWORD]:
+            videos.append({
+                'keyword': keyword,
+                'title': _HTML_TAG.sub('', item.get('title', '')),
+                'author': item.get('author', ''),
+                'description': item.get('description', ''),
+                'play': item.get('play', 0),
+                'url': f"https://www.bilibili.com/video/{item.get('bvid', '')}"
+            })
+        return videos
+
+    # ------------------------------------------------------------------
+    # 调度
+    # ------------------------------------------------------------------
+
+    async def _scrape_source(self, source: Dict) -> Optional[Dict]:
+        """爬取单个来源，失败只记录日志，不影响其他来源"""
+        parser = self.parsers.get(source.get('type'))
+        if parser is None:
+            print(f"⚠️  未知来源类型 {source.get('type')}，跳过 {source.get('name')}")
+            return None
+
+        print(f"🔍 正在爬取 {source['name']}...")
+        started = time.perf_counter()
+        try:
+            result = await parser(source)
+        except Exception as e:
+            print(f"❌ {source['name']} 爬取失败: {e}")
+            return None
+        print(f"✅ {source['name']} 爬取完成 ({time.perf_counter() - started:.1f}s)")
+        return result
+
+    async def scrape_all(self) -> List[Dict]:
+        """并发爬取全部来源，按配置顺序返回成功的结果"""
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(*(self._scrape_source(source) for source in self.sources))
+        return [result for result in results if result]
+
+    def run(self) -> List[Dict]:
+        """同步入口"""
+        started = time.perf_counter()
+        try:
+            results = asyncio.run(self.scrape_all())
+        finally:
+            self.close()
+        print(f"⏱️  {len(self.sources)} 个来源爬取完成，成功 {len(results)} 个，耗时 {time.perf_counter() - started:.1f}s")
+        if self.http_cache is not None:
+            print(f"💾 HTTP 缓存: {self.http_cache.summary()}")
+        return results
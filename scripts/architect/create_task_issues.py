@@ -3,31 +3,29 @@
 将任务池中的任务转换为 GitHub Issues
 """
 import os
-import json
+import sys
 from datetime import datetime
 from github import Github
 
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from scripts.utils.task_store import TaskStore
+
 GH_PAT = os.getenv('GH_PAT')
 REPO_NAME = 'Anyeling0620/Small-Hero'
 
-def read_task_pool():
-    """读取任务池"""
-    task_path = 'ai-orchestrator/task-pool.json'
-    if os.path.exists(task_path):
-        with open(task_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {'taskPool': []}
-
 def create_github_issues():
     """创建 GitHub Issues"""
     print("🎫 创建 GitHub Issues...")
     
+    store = TaskStore()
     try:
         g = Github(GH_PAT)
         repo = g.get_repo(REPO_NAME)
         
-        task_data = read_task_pool()
-        pending_tasks = [t for t in task_data['taskPool'] if t['status'] == 'pending']
+        # 通过状态索引取出待创建的任务
+        pending_tasks = store.find(status='pending')
         
         created_count = 0
         for task in pending_tasks:
@@ -77,21 +75,19 @@ def create_github_issues():
             
             print(f"  ✅ 创建 Issue #{issue.number}: {title}")
             
-            # 更新任务状态，添加 Issue 编号
-            task['status'] = 'created'
-            task['github_issue'] = issue.number
+            # 立即提交单个任务的状态变更，中途失败也不会重复创建已建好的 Issue
+            store.set_status(task['id'], 'created', github_issue=issue.number)
             
             created_count += 1
         
-        # 保存更新后的任务池
-        task_path = 'ai-orchestrator/task-pool.json'
-        with open(task_path, 'w', encoding='utf-8') as f:
-            json.dump(task_data, f, ensure_ascii=False, indent=2)
-        
         print(f"\n✨ 成功创建 {created_count} 个 GitHub Issues")
         
     except Exception as e:
         print(f"❌ 创建 Issues 失败: {e}")
+    finally:
+        # 同步回仓库中的 task-pool.json
+        store.export_json()
+        store.close()
 
 def main():
     print("=" * 60)
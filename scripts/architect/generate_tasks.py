@@ -3,12 +3,17 @@
 根据进度分析和游戏研究生成具体的开发任务
 """
 import os
+import sys
 import json
 from datetime import datetime
-import google.generativeai as genai
 
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-genai.configure(api_key=GEMINI_API_KEY)
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from scripts.utils.ai_helper import create_ai_helper
+from scripts.utils.prompt_builder import PromptBuilder, select_config, summarize_task_pool
+from scripts.utils.task_store import TaskStore
+from scripts.utils.task_summaries import write_daily_summary
 
 def read_progress_report():
     """读取今日的进度报告"""
@@ -40,21 +45,19 @@ def generate_tasks_with_ai(progress_report, config, current_tasks):
     """使用 AI 生成今日任务"""
     print("🤖 生成今日开发任务...")
     
-    model = genai.GenerativeModel('gemini-2.0-flash-exp')
+    budget_config = config.get('aiModelConfig', {}).get('architect', {}).get('promptBudget', {})
     
-    prompt = f"""
-你是小小勇者克隆项目的首席架构师。根据以下信息生成今日的开发任务：
-
-**项目配置：**
-{json.dumps(config, ensure_ascii=False, indent=2)}
-
-**进度分析：**
-{json.dumps(progress_report, ensure_ascii=False, indent=2)}
-
-**当前任务池：**
-{json.dumps(current_tasks, ensure_ascii=False, indent=2)}
-
-**任务生成规则（必须严格遵守）：**
+    # 按 Token 预算组装上下文：配置只保留规划相关字段，任务池压缩为固定大小的摘要
+    builder = PromptBuilder.from_config(budget_config)
+    builder.add_section('项目配置', select_config(config), priority=1)
+    builder.add_section('进度分析', progress_report.get('analysis') or progress_report, priority=2)
+    builder.add_section(
+        '当前任务池',
+        summarize_task_pool(current_tasks, budget_config.get('maxOpenTasks', 30)),
+        priority=3
+    )
+    
+    instructions = """**任务生成规则（必须严格遵守）：**
 1. 每个任务必须预计新增至少 200 行有效代码
 2. 后端任务分配给 GitHub Copilot（backend-dev）
 3. 前端任务分配给 Gemini（frontend-dev）
@@ -77,10 +80,21 @@ def generate_tasks_with_ai(progress_report, config, current_tasks):
 以 JSON 数组格式输出任务列表。确保任务具体、可执行、符合硬性规定。
 """
     
+    prompt = f"""
+你是小小勇者克隆项目的首席架构师。根据以下信息生成今日的开发任务：
+
+{builder.render(instructions)}
+
+{instructions}"""
+    
     try:
-        response = model.generate_content(prompt)
+        ai_helper = create_ai_helper('architect')
+        text = ai_helper.generate_content(prompt)
+        print(f"💾 响应缓存: {ai_helper.cache_summary()}")
+        if not text:
+            return []
+        
         # 尝试从响应中提取 JSON
-        text = response.text
         # 移除可能的 markdown 代码块标记
         if '```json' in text:
             text = text.split('```json')[1].split('```')[0]
@@ -95,39 +109,22 @@ def generate_tasks_with_ai(progress_report, config, current_tasks):
 
 def update_task_pool(new_tasks):
     """更新任务池"""
-    task_path = 'ai-orchestrator/task-pool.json'
-    current_data = read_current_tasks()
-    
-    # 添加新任务到任务池
-    for task in new_tasks:
-        task['status'] = 'pending'
-        task['createdAt'] = datetime.now().isoformat()
-        current_data['taskPool'].append(task)
-    
-    # 保存更新后的任务池
-    with open(task_path, 'w', encoding='utf-8') as f:
-        json.dump(current_data, f, ensure_ascii=False, indent=2)
+    with TaskStore() as store:
+        # 在一个事务中追加新任务
+        now = datetime.now().isoformat()
+        for task in new_tasks:
+            task['status'] = 'pending'
+            task['createdAt'] = now
+        store.add_tasks(new_tasks)
+        
+        # 同步回仓库中的 task-pool.json
+        store.export_json()
     
     print(f"✅ 已添加 {len(new_tasks)} 个任务到任务池")
 
 def save_task_summary():
-    """保存任务摘要"""
-    today = datetime.now().strftime('%Y-%m-%d')
-    task_data = read_current_tasks()
-    
-    summary_dir = 'docs/game-research/task-summaries'
-    os.makedirs(summary_dir, exist_ok=True)
-    
-    summary_path = f"{summary_dir}/{today}.json"
-    with open(summary_path, 'w', encoding='utf-8') as f:
-        json.dump({
-            'date': today,
-            'pending_tasks': len([t for t in task_data['taskPool'] if t['status'] == 'pending']),
-            'in_progress_tasks': len([t for t in task_data['taskPool'] if t['status'] == 'in-progress']),
-            'completed_tasks': len(task_data['completedTasks']),
-            'tasks': task_data['taskPool']
-        }, f, ensure_ascii=False, indent=2)
-    
+    """保存任务摘要（相对前一天的增量，定期写入完整检查点）"""
+    summary_path = write_daily_summary(read_current_tasks())
     print(f"✅ 任务摘要已保存至: {summary_path}")
 
 def main():
@@ -0,0 +1,263 @@
+"""
+架构师 - 流式 HTML 字段提取
+边下载边解析，只保留 head 中的 meta/title、JSON-LD 和少量正文节点，
+字段收集完毕或读满字节上限即停止，CPU 和内存开销与页面大小无关；安装了 lxml 时使用 lxml 的增量解析器
+"""
+import json
+import codecs
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+try:
+    from lxml import etree
+except ImportError:  # 未安装 lxml 时使用标准库解析器
+    etree = None
+
+# 需要保留的 meta（name 或 property）
+WANTED_META = (
+    'description', 'keywords',
+    'og:title', 'og:description', 'og:image', 'og:url',
+    'twitter:title', 'twitter:description'
+)
+# 收集正文的节点
+TEXT_TAGS = ('h1', 'h2', 'h3', 'p', 'li')
+
+
+class _StopParsing(Exception):
+    """字段已收集完毕"""
+
+
+class _FieldCollector:
+    """解析器无关的字段收集逻辑"""
+
+    def __init__(self, max_text_chars: int, max_json_chars: int):
+        self.max_text_chars = max_text_chars
+        self.max_json_chars = max_json_chars
+        self.title = ''
+        self.meta: Dict[str, str] = {}
+        self.structured_data: List = []
+        self.headings: List[str] = []
+        self.paragraphs: List[str] = []
+        self.text_chars = 0
+        self.head_done = False
+
+    @property
+    def done(self) -> bool:
+        return self.head_done and self.text_chars >= self.max_text_chars
+
+    def wants_text(self, tag: str, attrs: Dict[str, str]) -> bool:
+        """该节点的文本是否需要收集"""
+        if tag == 'title':
+            return not self.title
+        if tag == 'script':
+            return attrs.get('type') == 'application/ld+json'
+        return tag in TEXT_TAGS and self.text_chars < self.max_text_chars
+
+    def start(self, tag: str, attrs: Dict[str, str]):
+        if tag == 'meta':
+            name = (attrs.get('name') or attrs.get('property') or '').lower()
+            if name in WANTED_META and attrs.get('content') and name not in self.meta:
+                self.meta[name] = attrs['content'].strip()
+        elif tag == 'body':
+            self.head_done = True
+
+    def end(self, tag: str, text: Optional[str] = None):
+        if tag == 'head':
+            self.head_done = True
+        if text is None:
+            return
+
+        text = ' '.join(text.split())
+        if not text:
+            return
+        if tag == 'title':
+            self.title = text
+        elif tag == 'script':
+            if len(text) <= self.max_json_chars:
+                try:
+                    self.structured_data.append(json.loads(text))
+                except ValueError:
+                    pass
+        else:
+            text = text[:self.max_text_chars - self.text_chars]
+            (self.headings if tag.startswith('h') else self.paragraphs).append(text)
+            self.text_chars += len(text)
+
+    def result(self) -> Dict:
+        return {
+            'title': self.title or self.meta.get('og:title', ''),
+            'description': self.meta.get('description') or self.meta.get('og:description', ''),
+            'keywords': [k.strip() for k in self.meta.get('keywords', '').split(',') if k.strip()],
+            'meta': self.meta,
+            'structured_data': self.structured_data,
+            'headings': self.headings,
+            'text': '\n'.join(self.paragraphs)
+        }
+
+
+class _StdlibDriver(HTMLParser):
+    """html.parser 增量驱动"""
+
+    def __init__(self, collector: _FieldCollector, encoding: str):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+        # 增量解码，多字节字符被分块截断时不会乱码
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self._capture_tag: Optional[str] = None
+        self._buffer: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {k: v or '' for k, v in attrs}
+        self.collector.start(tag, attrs)
+        if self._capture_tag is None and self.collector.wants_text(tag, attrs):
+            self._capture_tag = tag
+            self._buffer = []
+
+    def handle_endtag(self, tag):
+        if tag == self._capture_tag:
+            self._capture_tag = None
+            self.collector.end(tag, ''.join(self._buffer))
+        else:
+            self.collector.end(tag)
+        if self.collector.done:
+            raise _StopParsing()
+
+    def handle_data(self, data):
+        if self._capture_tag is not None:
+            self._buffer.append(data)
+
+    def feed_bytes(self, chunk: bytes):
+        self.feed(self.decoder.decode(chunk))
+
+    def finish(self):
+        """流结束：解析缓冲中的剩余内容，未闭合节点中已收到的文本照常收集"""
+        self.feed(self.decoder.decode(b'', final=True))
+        self.close()
+        if self._capture_tag is not None:
+            tag, self._capture_tag = self._capture_tag, None
+            self.collector.end(tag, ''.join(self._buffer))
+
+
+class _LxmlDriver:
+    """lxml 增量驱动，处理完的节点立即清空以限制内存"""
+
+    def __init__(self, collector: _FieldCollector, encoding: str):
+        self.collector = collector
+        self.parser = etree.HTMLPullParser(events=('start', 'end'), encoding=encoding)
+        self._capture = None
+
+    def feed_bytes(self, chunk: bytes):
+        self.parser.feed(chunk)
+        self._handle_events()
+
+    def finish(self):
+        """流结束：补齐未闭合节点的结束事件，未闭合节点中已收到的文本照常收集"""
+        try:
+            self.parser.close()
+        except etree.XMLSyntaxError:
+            pass
+        self._handle_events()
+        if self._capture is not None:
+            element, self._capture = self._capture, None
+            self.collector.end(element.tag, ''.join(element.itertext()))
+
+    def _handle_events(self):
+        for event, element in self.parser.read_events():
+            tag = element.tag if isinstance(element.tag, str) else ''
+            if event == 'start':
+                attrs = dict(element.attrib)
+                self.collector.start(tag, attrs)
+                if self._capture is None and self.collector.wants_text(tag, attrs):
+                    self._capture = element
+            elif element is self._capture:
+                self._capture = None
+                self.collector.end(tag, ''.join(element.itertext()))
+                element.clear()
+            else:
+                self.collector.end(tag)
+                if self._capture is None:
+                    element.clear()
+            if self.collector.done:
+                raise _StopParsing()
+
+
+class PageExtractor:
+    """
+    流式页面字段提取
+
+    逐块调用 feed，返回 True 表示已提取完毕，调用方可以停止下载
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024,
+        max_text_chars: int = 2000,
+        max_json_chars: int = 20000,
+        encoding: str = 'utf-8',
+        use_lxml: bool = True
+    ):
+        """
+        初始化提取器
+
+        Args:
+            max_bytes: 最多解析的字节数
+            max_text_chars: 正文（标题 + 段落）最多收集的字符数
+            max_json_chars: 单个 JSON-LD 块的长度上限
+            encoding: 页面编码
+            use_lxml: 安装了 lxml 时是否使用
+        """
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.finished = False
+        self._closed = False
+        self.collector = _FieldCollector(max_text_chars, max_json_chars)
+        driver = _LxmlDriver if use_lxml and etree is not None else _StdlibDriver
+        self.driver = driver(self.collector, encoding)
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        解析一块数据
+
+        Returns:
+            是否已提取完毕
+        """
+        if self.finished:
+            return True
+
+        chunk = chunk[:self.max_bytes - self.bytes_read]
+        self.bytes_read += len(chunk)
+        try:
+            self.driver.feed_bytes(chunk)
+        except _StopParsing:
+            self.finished = True
+        if self.bytes_read >= self.max_bytes:
+            self.finished = True
+        return self.finished
+
+    def result(self) -> Dict:
+        """提取到的结构化字段（首次调用时结束解析，收集末尾未闭合节点中的文本）"""
+        if not self._closed:
+            self._closed = True
+            try:
+                self.driver.finish()
+            except _StopParsing:
+                pass
+        fields = self.collector.result()
+        fields['bytes_parsed'] = self.bytes_read
+        return fields
+
+
+def extract_page_fields(content: bytes, chunk_size: int = 16 * 1024, **kwargs) -> Dict:
+    """
+    从已下载的页面中提取字段
+
+    Args:
+        content: 页面内容
+        chunk_size: 分块大小
+        **kwargs: 传给 PageExtractor 的参数
+    """
+    extractor = PageExtractor(**kwargs)
+    for offset in range(0, len(content), chunk_size):
+        if extractor.feed(content[offset:offset + chunk_size]):
+            break
+    return extractor.result()
@@ -3,87 +3,48 @@
 每日自动爬取小小勇者相关的游戏资讯、更新日志、玩家反馈等
 """
 import os
+import sys
 import json
-import requests
+import hashlib
 from datetime import datetime
-from bs4 import BeautifulSoup
-import google.generativeai as genai
 
-# 配置 Gemini API
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-genai.configure(api_key=GEMINI_API_KEY)
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-def scrape_taptap():
-    """爬取 TapTap 小小勇者页面"""
-    print("🔍 正在爬取 TapTap 游戏信息...")
-    
-    url = "https://www.taptap.cn/app/233851"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # 提取游戏信息
-        game_info = {
-            'source': 'TapTap',
-            'url': url,
-            'scraped_at': datetime.now().isoformat(),
-            'description': soup.find('meta', {'name': 'description'})['content'] if soup.find('meta', {'name': 'description'}) else '',
-            'raw_html': str(soup)[:5000]  # 保存部分 HTML 供 AI 分析
-        }
-        
-        return game_info
-    except Exception as e:
-        print(f"❌ TapTap 爬取失败: {e}")
-        return None
+from scripts.utils.ai_helper import create_ai_helper
+from scripts.architect.content_scraper import ContentScraper
+from scripts.architect.content_index import ContentIndex
+from scripts.utils.state_file import read_json, write_json_atomic
 
-def scrape_reddit():
-    """爬取 Reddit 相关讨论"""
-    print("🔍 正在爬取 Reddit 社区讨论...")
-    
-    url = "https://www.reddit.com/r/TinyRogues/top.json?limit=10"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        data = response.json()
-        
-        posts = []
-        for post in data['data']['children']:
-            post_data = post['data']
-            posts.append({
-                'title': post_data.get('title', ''),
-                'content': post_data.get('selftext', ''),
-                'score': post_data.get('score', 0),
-                'url': f"https://www.reddit.com{post_data.get('permalink', '')}"
-            })
-        
-        return {
-            'source': 'Reddit',
-            'scraped_at': datetime.now().isoformat(),
-            'posts': posts
-        }
-    except Exception as e:
-        print(f"❌ Reddit 爬取失败: {e}")
-        return None
+# 上次分析的内容哈希和结果，来源内容不变时直接复用
+ANALYSIS_STATE_FILE = '.cache/http/analysis-state.json'
+
+def strip_volatile(sources):
+    """去掉抓取时间戳，同一份内容得到相同的数据"""
+    return [
+        {k: v for k, v in source.items() if k != 'scraped_at'}
+        for source in sources
+    ]
+
+def content_hash(sources):
+    """来源内容的哈希，用于判断是否需要重新分析"""
+    material = json.dumps(strip_volatile(sources), ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
 
 def analyze_with_gemini(scraped_data):
     """使用 Gemini AI 分析爬取的内容"""
     print("🤖 使用 Gemini AI 分析游戏内容...")
     
-    model = genai.GenerativeModel('gemini-2.0-flash-exp')
+    # 去掉抓取时间戳，保证同一份数据生成相同的提示词以便命中响应缓存
+    prompt_data = dict(scraped_data)
+    prompt_data['sources'] = strip_volatile(scraped_data.get('sources', []))
     
     prompt = f"""
 你是一位资深游戏架构师，专门负责分析小小勇者（Tiny Hero）游戏的核心机制。
 
-请分析以下爬取的游戏信息：
+请分析以下爬取的游戏信息（仅包含相较之前新增或有明显变化的内容）：
 
-{json.dumps(scraped_data, ensure_ascii=False, indent=2)}
+{json.dumps(prompt_data, ensure_ascii=False, indent=2)}
 
 请提取以下关键信息：
 1. **核心玩法机制**：战斗系统、升级系统、装备系统等
@@ -96,8 +57,10 @@ def analyze_with_gemini(scraped_data):
 """
     
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        ai_helper = create_ai_helper('architect')
+        analysis = ai_helper.generate_content(prompt)
+        print(f"💾 响应缓存: {ai_helper.cache_summary()}")
+        return analysis
     except Exception as e:
         print(f"❌ Gemini 分析失败: {e}")
         return None
@@ -119,26 +82,48 @@ def main():
     print("🏗️  架构师 - 每日游戏内容爬取")
     print("=" * 60)
     
-    # 爬取各个来源
+    today = datetime.now().strftime('%Y-%m-%d')
+    
+    # 按 scraperConfig.sources 并发爬取各个来源
+    sources = ContentScraper.from_config().run()
+    
+    # 与内容索引对比：未变化的条目在日报中只保留引用，只分析新增或变化的条目
+    index = ContentIndex.from_config()
+    report_sources, fresh_sources = index.update(sources, today)
+    print(f"🗂️  内容索引: {index.summary()}")
+    
     scraped_data = {
-        'date': datetime.now().strftime('%Y-%m-%d'),
-        'sources': []
+        'date': today,
+        'sources': report_sources
     }
     
-    # TapTap
-    taptap_data = scrape_taptap()
-    if taptap_data:
-        scraped_data['sources'].append(taptap_data)
-    
-    # Reddit
-    reddit_data = scrape_reddit()
-    if reddit_data:
-        scraped_data['sources'].append(reddit_data)
+    # AI 分析：没有新内容，或新内容与上次分析时相同，则直接复用结果
+    digest = content_hash(fresh_sources)
+    scraped_data['content_hash'] = digest
+    state = read_json(ANALYSIS_STATE_FILE)
+    analyzed = True
+    if not fresh_sources or state.get('contentHash') == digest:
+        if not fresh_sources:
+            print("♻️  没有新增或明显变化的内容，跳过 Gemini 分析")
+        else:
+            print(f"♻️  新内容自 {state.get('date')} 以来无变化，跳过 Gemini 分析")
+        if state.get('analysis'):
+            scraped_data['ai_analysis'] = state['analysis']
+            scraped_data['analysis_reused_from'] = state.get('date')
+    else:
+        analysis = analyze_with_gemini({'date': today, 'sources': fresh_sources})
+        analyzed = bool(analysis)
+        if analysis:
+            scraped_data['ai_analysis'] = analysis
+            write_json_atomic(ANALYSIS_STATE_FILE, {
+                'contentHash': digest,
+                'date': today,
+                'analysis': analysis
+            })
     
-    # AI 分析
-    analysis = analyze_with_gemini(scraped_data)
-    if analysis:
-        scraped_data['ai_analysis'] = analysis
+    # 分析失败时不更新索引，下次运行这些条目仍按新内容处理
+    if analyzed:
+        index.save(today)
     
     # 保存报告
     save_report(scraped_data)
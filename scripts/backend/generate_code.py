@@ -10,6 +10,7 @@ import json
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 from scripts.utils.ai_helper import create_ai_helper
+from scripts.utils.code_extractor import CodeExtractor
 
 def generate_backend_code():
     """生成后端代码"""
@@ -67,31 +68,41 @@ def generate_backend_code():
 - 代码至少 200 行
 - 更新 OpenAPI 文档
 
+每个文件使用单独的 Markdown 代码块，并在代码块前用 `### 文件路径` 标明文件名。
 请直接输出可运行的 Java 代码。
 """
         
-        # 使用 AI 生成代码
+        # 保存生成的代码
+        output_dir = f'backend/src/main/generated/issue-{issue_number}'
+        os.makedirs(output_dir, exist_ok=True)
+        # 原始响应单独保存，生成目录中只放拆分出的源文件
+        os.makedirs('.github/temp', exist_ok=True)
+        output_file = f'.github/temp/issue-{issue_number}-response.md'
+        
+        # 使用 AI 流式生成代码：原始响应边生成边写入文件，每个代码块结束即拆分为独立文件并行写入
+        extractor = CodeExtractor(output_dir, 'backend')
         ai_helper = create_ai_helper('backendDev')
-        response = ai_helper.generate_content(prompt)
+        try:
+            written = ai_helper.generate_to_file(prompt, output_file, on_chunk=extractor)
+        except Exception:
+            # 中途失败：删除已拆分出的部分文件，重试时从干净的目录开始
+            extractor.abort()
+            raise
         
-        if not response:
+        if not written:
+            extractor.abort()
             print("❌ AI 生成失败")
             return 1
         
         print("✅ 后端代码生成成功")
-        print(f"生成内容长度: {len(response)} 字符")
-        
-        # 保存生成的代码
-        output_dir = f'backend/src/main/generated/issue-{issue_number}'
-        os.makedirs(output_dir, exist_ok=True)
+        print(f"生成内容长度: {written} 字符")
         
-        output_file = f'{output_dir}/generated-code.java'
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(response)
+        print(f"✅ 原始响应已保存到: {output_file}")
         
-        print(f"✅ 代码已保存到: {output_file}")
-        
-        # TODO: 解析 AI 响应，按照 Java 包结构保存文件
+        manifest = extractor.finish()
+        if not manifest['files']:
+            print("❌ AI 响应中没有可提取的代码")
+            return 1
         
         return 0
     
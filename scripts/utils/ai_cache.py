@@ -0,0 +1,201 @@
+"""
+AI 响应缓存
+基于内容寻址的磁盘缓存，支持 TTL 过期和按容量的 LRU 淘汰
+"""
+import os
+import json
+import time
+import hashlib
+from typing import Optional, Dict, Any
+
+DEFAULT_CACHE_DIR = '.cache/ai-responses'
+
+
+class ResponseCache:
+    """AI 响应缓存类，键由 (模型, 温度, 最大 Token 数, 提示词哈希) 决定"""
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        ttl_hours: float = 24,
+        max_entries: int = 500,
+        max_size_mb: float = 50
+    ):
+        """
+        初始化响应缓存
+
+        Args:
+            cache_dir: 缓存目录
+            ttl_hours: 缓存有效期（小时）
+            max_entries: 最多保留的条目数
+            max_size_mb: 缓存目录最大体积（MB）
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'writes': 0,
+            'evictions': 0
+        }
+
+    @classmethod
+    def from_config(cls, cache_config: Dict[str, Any]) -> Optional['ResponseCache']:
+        """
+        根据角色配置中的 cache 字段创建缓存，未启用时返回 None
+
+        Args:
+            cache_config: aiModelConfig.<role>.cache 配置
+        """
+        if not cache_config or not cache_config.get('enabled'):
+            return None
+
+        return cls(
+            cache_dir=cache_config.get('dir', DEFAULT_CACHE_DIR),
+            ttl_hours=cache_config.get('ttlHours', 24),
+            max_entries=cache_config.get('maxEntries', 500),
+            max_size_mb=cache_config.get('maxSizeMB', 50)
+        )
+
+    @staticmethod
+    def make_key(model_config: Dict, prompt: str) -> str:
+        """
+        计算缓存键
+
+        Args:
+            model_config: 模型配置
+            prompt: 提示词
+
+        Returns:
+            十六进制 SHA-256 键
+        """
+        prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        material = json.dumps({
+            'model': model_config.get('model', ''),
+            'temperature': model_config.get('temperature', 0.7),
+            'maxTokens': model_config.get('maxTokens', 8000),
+            'prompt': prompt_hash
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        """缓存条目路径，按键前两位分桶"""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的响应，未命中或已过期返回 None
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.stats['misses'] += 1
+            return None
+
+        if time.time() - entry.get('createdAt', 0) > self.ttl:
+            self.stats['expired'] += 1
+            self.stats['misses'] += 1
+            self._remove(path)
+            return None
+
+        # 以文件修改时间记录最近访问，供 LRU 淘汰使用
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        self.stats['hits'] += 1
+        return entry.get('response')
+
+    def set(self, key: str, response: str, model_config: Dict):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            response: 模型响应
+            model_config: 产生该响应的模型配置
+        """
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        entry = {
+            'model': model_config.get('model', ''),
+            'temperature': model_config.get('temperature', 0.7),
+            'maxTokens': model_config.get('maxTokens', 8000),
+            'createdAt': time.time(),
+            'response': response
+        }
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self.stats['writes'] += 1
+        except OSError as e:
+            print(f"⚠️  写入响应缓存失败: {e}")
+            self._remove(tmp_path)
+            return
+
+        self._evict()
+
+    def _evict(self):
+        """超过条目数或体积上限时，按最近访问时间淘汰最旧的条目"""
+        entries = []
+        total_bytes = 0
+
+        if not os.path.isdir(self.cache_dir):
+            return
+
+        for bucket in os.scandir(self.cache_dir):
+            if not bucket.is_dir():
+                continue
+            for item in os.scandir(bucket.path):
+                if not item.name.endswith('.json'):
+                    continue
+                try:
+                    st = item.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, item.path))
+                total_bytes += st.st_size
+
+        if len(entries) <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+
+        entries.sort()
+        count = len(entries)
+        for _, size, path in entries:
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            self._remove(path)
+            count -= 1
+            total_bytes -= size
+            self.stats['evictions'] += 1
+
+    @staticmethod
+    def _remove(path: str):
+        """删除文件，忽略不存在的情况"""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def summary(self) -> str:
+        """缓存命中统计摘要"""
+        lookups = self.stats['hits'] + self.stats['misses']
+        rate = (self.stats['hits'] / lookups * 100) if lookups else 0
+        return (f"命中 {self.stats['hits']} / 未命中 {self.stats['misses']} "
+                f"(命中率 {rate:.1f}%)，写入 {self.stats['writes']}，淘汰 {self.stats['evictions']}")
@@ -5,13 +5,88 @@ AI 模型辅助工具
 import os
 import time
 import json
-from typing import Optional, Dict, Any
+import asyncio
+import re
+import queue
+import random
+import threading
+import weakref
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, List, Tuple, Iterator, Callable
 import google.generativeai as genai
 
+try:
+    from scripts.utils.ai_cache import ResponseCache
+    from scripts.utils.provider_health import ProviderHealth, CircuitBreaker, DEFAULT_STATE_FILE as HEALTH_STATE_FILE
+except ImportError:  # 直接运行本文件时
+    from ai_cache import ResponseCache
+    from provider_health import ProviderHealth, CircuitBreaker, DEFAULT_STATE_FILE as HEALTH_STATE_FILE
+
 # 配置 API 密钥
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
 
+# 进程内共享的 HTTP 连接池和 Gemini 模型对象
+HTTP_POOL_SIZE = 10
+_http_session = None
+_gemini_models: Dict[tuple, Any] = {}
+_shared_lock = threading.Lock()
+
+
+def _get_http_session():
+    """获取共享的 keep-alive HTTP 会话"""
+    global _http_session
+    
+    with _shared_lock:
+        if _http_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _http_session = session
+    return _http_session
+
+
+def _retry_after_seconds(error: Optional[Exception]) -> Optional[float]:
+    """
+    从异常中解析服务端建议的重试等待时间（秒）
+    
+    支持 HTTP Retry-After 头（秒数或 HTTP 日期）以及 Gemini 429 错误中的 retry_delay
+    """
+    if error is None:
+        return None
+    
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    value = headers.get('Retry-After') if hasattr(headers, 'get') else None
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    
+    match = re.search(r'retry_delay\s*\{\s*seconds:\s*(\d+)', str(error))
+    if match:
+        return float(match.group(1))
+    return None
+
+
+def _provider_of(model_config: Dict) -> Optional[str]:
+    """根据模型名称判断提供方，不支持时返回 None"""
+    model_type = model_config.get('model', '').lower()
+    if 'gemini' in model_type:
+        return 'gemini'
+    if 'deepseek' in model_type:
+        return 'deepseek'
+    return None
+
+
 class AIModelHelper:
     """AI 模型辅助类，支持主备切换和重试"""
     
@@ -27,6 +102,16 @@ class AIModelHelper:
         self.fallback_model = config.get('fallback', {})
         self.retry_attempts = config.get('retryAttempts', 3)
         self.retry_delay = config.get('retryDelay', 5000) / 1000  # 转换为秒
+        self.max_retry_delay = config.get('maxRetryDelay', 60000) / 1000
+        self.cache = ResponseCache.from_config(config.get('cache', {}))
+        self.routing = config.get('routing', {})
+        self.health = ProviderHealth(self.routing.get('stateFile', HEALTH_STATE_FILE))
+        self.breaker = CircuitBreaker.from_config(
+            config.get('circuitBreaker', {}),
+            self.routing.get('stateFile', HEALTH_STATE_FILE)
+        )
+        # 信号量与事件循环绑定，按循环分别维护
+        self._semaphores = weakref.WeakKeyDictionary()
         
         # 配置 Gemini
         if GEMINI_API_KEY:
@@ -36,26 +121,148 @@ class AIModelHelper:
         """
         生成内容，自动重试和备用模型切换
         
+        开启 routing.hedging 时，首选模型超过对冲延迟仍未返回会并行请求次选模型
+        
         Args:
             prompt: 提示词
             
         Returns:
             生成的内容，失败返回 None
         """
-        # 首先尝试主模型
-        result = self._try_model(self.primary_model, prompt, "主模型")
-        if result:
-            return result
+        # 命中缓存则直接返回，不消耗配额
+        cached = self._get_cached(prompt)
+        if cached:
+            return cached
+        
+        candidates = self._ordered_candidates()
+        
+        if self.routing.get('hedging') and len(candidates) >= 2:
+            result, model_config = self._generate_hedged(prompt, candidates)
+        else:
+            result, model_config = self._generate_sequential(prompt, candidates)
         
-        # 主模型失败，尝试备用模型
-        print(f"⚠️  主模型失败，切换到备用模型...")
-        result = self._try_model(self.fallback_model, prompt, "备用模型")
         if result:
+            self._set_cached(model_config, prompt, result)
             return result
         
         print(f"❌ 所有模型均失败！")
         return None
     
+    def _ordered_candidates(self) -> List[Tuple[Dict, str]]:
+        """
+        返回按优先级排列的 (模型配置, 日志名称) 列表
+        
+        开启 routing.adaptive 时，根据近期延迟和错误率把更快、更健康的模型排在前面
+        """
+        candidates = [
+            (model_config, name)
+            for model_config, name in ((self.primary_model, "主模型"), (self.fallback_model, "备用模型"))
+            if model_config
+        ]
+        
+        if not self.routing.get('adaptive') or len(candidates) < 2:
+            return candidates
+        
+        models = [c.get('model', '') for c, _ in candidates]
+        ranked = self.health.rank(
+            models,
+            min_samples=self.routing.get('minSamples', 5),
+            max_error_rate=self.routing.get('maxErrorRate', 0.5)
+        )
+        if ranked != models:
+            print(f"📈 根据近期延迟和错误率，优先使用 {ranked[0]}")
+        return sorted(candidates, key=lambda c: ranked.index(c[0].get('model', '')))
+    
+    def _generate_sequential(self, prompt: str, candidates: List[Tuple[Dict, str]]) -> Tuple[Optional[str], Optional[Dict]]:
+        """依次尝试各个模型，前一个失败才切换到下一个"""
+        for index, (model_config, name) in enumerate(candidates):
+            if index > 0:
+                print(f"⚠️  {candidates[index - 1][1]}失败，切换到{name}...")
+            result = self._try_model(model_config, prompt, name)
+            if result:
+                return result, model_config
+        return None, None
+    
+    def _generate_hedged(self, prompt: str, candidates: List[Tuple[Dict, str]]) -> Tuple[Optional[str], Optional[Dict]]:
+        """
+        对冲请求：首选模型超过对冲延迟仍未返回时，并行启动次选模型，采用先返回的结果
+        
+        使用守护线程，落后的请求不会阻塞进程退出
+        """
+        (first_config, first_name), (second_config, second_name) = candidates[:2]
+        results: queue.Queue = queue.Queue()
+        
+        def worker(model_config: Dict, name: str):
+            try:
+                result = self._try_model(model_config, prompt, name)
+            except Exception as e:
+                print(f"❌ {name} 调用异常: {e}")
+                result = None
+            results.put((result, model_config))
+        
+        def launch(model_config: Dict, name: str):
+            threading.Thread(target=worker, args=(model_config, name), daemon=True).start()
+        
+        delay = self._hedge_delay(first_config)
+        launch(first_config, first_name)
+        
+        try:
+            result, model_config = results.get(timeout=delay)
+            if result:
+                return result, model_config
+            print(f"⚠️  {first_name}失败，切换到{second_name}...")
+            launch(second_config, second_name)
+            return results.get()
+        except queue.Empty:
+            print(f"⏱️  {first_name} 超过对冲延迟 {delay:.1f} 秒未返回，同时启动{second_name}")
+        
+        launch(second_config, second_name)
+        for _ in range(2):
+            result, model_config = results.get()
+            if result:
+                return result, model_config
+        return None, None
+    
+    def _hedge_delay(self, model_config: Dict) -> float:
+        """
+        对冲延迟（秒）：取该模型成功调用的延迟分位数（默认 p95），并限制在上下限之间
+        """
+        default_delay = self.routing.get('hedgeDefaultDelay', 30000) / 1000
+        min_delay = self.routing.get('hedgeMinDelay', 5000) / 1000
+        max_delay = self.routing.get('hedgeMaxDelay', 90000) / 1000
+        
+        observed = self.health.latency_percentile(
+            model_config.get('model', ''),
+            self.routing.get('hedgePercentile', 0.95)
+        )
+        delay = observed if observed is not None else default_delay
+        return min(max_delay, max(min_delay, delay))
+    
+    def _get_cached(self, prompt: str) -> Optional[str]:
+        """按主模型、备用模型的顺序查找缓存"""
+        if not self.cache:
+            return None
+        
+        for model_config in (self.primary_model, self.fallback_model):
+            if not model_config:
+                continue
+            result = self.cache.get(ResponseCache.make_key(model_config, prompt))
+            if result:
+                print(f"💾 命中响应缓存 ({model_config.get('model', '')})，跳过模型调用")
+                return result
+        return None
+    
+    def _set_cached(self, model_config: Dict, prompt: str, result: str):
+        """写入响应缓存"""
+        if self.cache:
+            self.cache.set(ResponseCache.make_key(model_config, prompt), result, model_config)
+    
+    def cache_summary(self) -> str:
+        """返回缓存命中统计，未启用缓存时返回提示"""
+        if not self.cache:
+            return "响应缓存未启用"
+        return self.cache.summary()
+    
     def _try_model(self, model_config: Dict, prompt: str, model_name: str) -> Optional[str]:
         """
         尝试使用指定模型生成内容，带重试机制
@@ -70,58 +277,207 @@ class AIModelHelper:
         """
         model_type = model_config.get('model', '')
         
+        if not _provider_of(model_config):
+            print(f"❌ 不支持的模型类型: {model_type}")
+            return None
+        
         for attempt in range(1, self.retry_attempts + 1):
+            if not self._circuit_allows(model_type, model_name):
+                return None
+            
             try:
                 print(f"🤖 尝试使用 {model_name} ({model_type})，第 {attempt}/{self.retry_attempts} 次...")
                 
-                # Gemini 模型
-                if 'gemini' in model_type.lower():
-                    result = self._call_gemini(model_config, prompt)
-                    if result:
-                        print(f"✅ {model_name} 成功生成内容")
-                        return result
-                
-                # DeepSeek 模型
-                elif 'deepseek' in model_type.lower():
-                    result = self._call_deepseek(model_config, prompt)
-                    if result:
-                        print(f"✅ {model_name} 成功生成内容")
-                        return result
-                
-                else:
-                    print(f"❌ 不支持的模型类型: {model_type}")
-                    return None
+                result = self._call_model(model_config, prompt)
+                if result:
+                    print(f"✅ {model_name} 成功生成内容")
+                    return result
+                error = None
                     
             except Exception as e:
                 print(f"❌ {model_name} 第 {attempt} 次尝试失败: {e}")
-                
-                if attempt < self.retry_attempts:
-                    print(f"⏳ 等待 {self.retry_delay} 秒后重试...")
-                    time.sleep(self.retry_delay)
+                error = e
+            
+            if attempt < self.retry_attempts:
+                delay = self._backoff_delay(attempt, error)
+                print(f"⏳ 等待 {delay:.1f} 秒后重试...")
+                time.sleep(delay)
+        
+        return None
+    
+    def _circuit_allows(self, model_type: str, model_name: str) -> bool:
+        """熔断器是否放行，打开时直接跳过该模型"""
+        if self.breaker and not self.breaker.allow(model_type):
+            print(f"🚫 {model_name} ({model_type}) 处于熔断状态，跳过")
+            return False
+        return True
+    
+    def _backoff_delay(self, attempt: int, error: Optional[Exception]) -> float:
+        """
+        计算重试等待时间（秒）
+        
+        优先遵循服务端的 Retry-After；否则以 retryDelay 为基数指数退避，并加入随机抖动避免多个任务同时重试
+        """
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            return min(self.max_retry_delay, retry_after)
+        
+        backoff = min(self.max_retry_delay, self.retry_delay * 2 ** (attempt - 1))
+        return backoff / 2 + random.uniform(0, backoff / 2)
+    
+    def _call_model(self, model_config: Dict, prompt: str) -> Optional[str]:
+        """按模型类型分发到对应的 API 调用，并记录延迟和成败"""
+        provider = _provider_of(model_config)
+        if not provider:
+            raise ValueError(f"不支持的模型类型: {model_config.get('model', '')}")
+        
+        start = time.time()
+        try:
+            if provider == 'gemini':
+                result = self._call_gemini(model_config, prompt)
+            else:
+                result = self._call_deepseek(model_config, prompt)
+        except Exception:
+            self._record_outcome(model_config, time.time() - start, False)
+            raise
+        
+        self._record_outcome(model_config, time.time() - start, bool(result))
+        return result
+    
+    def _record_outcome(self, model_config: Dict, latency: float, ok: bool):
+        """把一次调用结果同步到健康度统计和熔断器"""
+        model_type = model_config.get('model', '')
+        self.health.record(model_type, latency, ok)
+        if self.breaker:
+            if ok:
+                self.breaker.record_success(model_type)
+            else:
+                self.breaker.record_failure(model_type)
+    
+    async def agenerate_content(self, prompt: str) -> Optional[str]:
+        """
+        异步生成内容，行为与 generate_content 一致
+        
+        同一提供方的并发请求数受 maxConcurrency 限制，HTTP 连接复用共享连接池
+        
+        Args:
+            prompt: 提示词
+            
+        Returns:
+            生成的内容，失败返回 None
+        """
+        cached = self._get_cached(prompt)
+        if cached:
+            return cached
         
+        candidates = self._ordered_candidates()
+        for index, (model_config, name) in enumerate(candidates):
+            if index > 0:
+                print(f"⚠️  {candidates[index - 1][1]}失败，切换到{name}...")
+            result = await self._atry_model(model_config, prompt, name)
+            if result:
+                self._set_cached(model_config, prompt, result)
+                return result
+        
+        print(f"❌ 所有模型均失败！")
         return None
     
+    async def agenerate_many(self, prompts: List[str]) -> List[Optional[str]]:
+        """
+        并发生成多个提示词的内容
+        
+        Args:
+            prompts: 提示词列表
+            
+        Returns:
+            与 prompts 顺序一致的结果列表，失败项为 None
+        """
+        results = await asyncio.gather(
+            *(self.agenerate_content(prompt) for prompt in prompts),
+            return_exceptions=True
+        )
+        return [None if isinstance(r, BaseException) else r for r in results]
+    
+    def generate_many(self, prompts: List[str]) -> List[Optional[str]]:
+        """同步入口：并发生成多个提示词的内容"""
+        return asyncio.run(self.agenerate_many(prompts))
+    
+    async def _atry_model(self, model_config: Dict, prompt: str, model_name: str) -> Optional[str]:
+        """_try_model 的异步版本，重试等待不阻塞事件循环"""
+        model_type = model_config.get('model', '')
+        provider = _provider_of(model_config)
+        
+        if not provider:
+            print(f"❌ 不支持的模型类型: {model_type}")
+            return None
+        
+        semaphore = self._get_semaphore(provider, model_config)
+        
+        for attempt in range(1, self.retry_attempts + 1):
+            if not self._circuit_allows(model_type, model_name):
+                return None
+            
+            try:
+                async with semaphore:
+                    print(f"🤖 尝试使用 {model_name} ({model_type})，第 {attempt}/{self.retry_attempts} 次...")
+                    result = await asyncio.to_thread(self._call_model, model_config, prompt)
+                if result:
+                    print(f"✅ {model_name} 成功生成内容")
+                    return result
+                error = None
+            
+            except Exception as e:
+                print(f"❌ {model_name} 第 {attempt} 次尝试失败: {e}")
+                error = e
+            
+            if attempt < self.retry_attempts:
+                delay = self._backoff_delay(attempt, error)
+                print(f"⏳ 等待 {delay:.1f} 秒后重试...")
+                await asyncio.sleep(delay)
+        
+        return None
+    
+    def _get_semaphore(self, provider: str, model_config: Dict) -> asyncio.Semaphore:
+        """获取提供方的并发信号量，上限取 maxConcurrency（默认 4）"""
+        semaphores = self._semaphores.setdefault(asyncio.get_running_loop(), {})
+        if provider not in semaphores:
+            semaphores[provider] = asyncio.Semaphore(model_config.get('maxConcurrency', 4))
+        return semaphores[provider]
+    
     def _call_gemini(self, config: Dict, prompt: str) -> Optional[str]:
         """调用 Gemini API"""
+        response = self._get_gemini_model(config).generate_content(prompt)
+        return response.text
+    
+    def _get_gemini_model(self, config: Dict):
+        """获取 Gemini 模型对象，同一配置复用"""
         model_name = config.get('model', 'gemini-2.5-flash-latest')
         temperature = config.get('temperature', 0.7)
         max_tokens = config.get('maxTokens', 8000)
         
-        model = genai.GenerativeModel(
-            model_name=model_name,
-            generation_config=genai.GenerationConfig(
-                temperature=temperature,
-                max_output_tokens=max_tokens,
-            )
-        )
-        
-        response = model.generate_content(prompt)
-        return response.text
+        cache_key = (model_name, temperature, max_tokens)
+        with _shared_lock:
+            model = _gemini_models.get(cache_key)
+            if model is None:
+                model = genai.GenerativeModel(
+                    model_name=model_name,
+                    generation_config=genai.GenerationConfig(
+                        temperature=temperature,
+                        max_output_tokens=max_tokens,
+                    )
+                )
+                _gemini_models[cache_key] = model
+        return model
     
     def _call_deepseek(self, config: Dict, prompt: str) -> Optional[str]:
         """调用 DeepSeek API"""
-        import requests
+        response = self._post_deepseek(config, prompt, stream=False)
+        result = response.json()
         
+        return result['choices'][0]['message']['content']
+    
+    def _post_deepseek(self, config: Dict, prompt: str, stream: bool):
+        """发送 DeepSeek chat/completions 请求，返回已检查状态码的响应"""
         model_name = config.get('model', 'deepseek-chat')
         base_url = config.get('baseUrl', 'https://api.deepseek.com/v1')
         temperature = config.get('temperature', 0.7)
@@ -141,20 +497,168 @@ class AIModelHelper:
                 {'role': 'user', 'content': prompt}
             ],
             'temperature': temperature,
-            'max_tokens': max_tokens
+            'max_tokens': max_tokens,
+            'stream': stream
         }
         
-        response = requests.post(
+        response = _get_http_session().post(
             f"{base_url}/chat/completions",
             headers=headers,
             json=data,
-            timeout=60
+            timeout=60,
+            stream=stream
         )
         
         response.raise_for_status()
-        result = response.json()
+        return response
+    
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """
+        流式生成内容，按到达顺序逐块返回文本
         
-        return result['choices'][0]['message']['content']
+        模型在输出首个片段前失败会按 generate_content 的规则重试和切换；
+        已经输出部分内容后失败则直接抛出异常，由调用方保留已写出的部分
+        
+        Args:
+            prompt: 提示词
+            
+        Yields:
+            文本片段；所有模型都失败时不产生任何片段
+        """
+        cached = self._get_cached(prompt)
+        if cached:
+            yield cached
+            return
+        
+        candidates = self._ordered_candidates()
+        for index, (model_config, name) in enumerate(candidates):
+            if index > 0:
+                print(f"⚠️  {candidates[index - 1][1]}失败，切换到{name}...")
+            
+            model_type = model_config.get('model', '')
+            if not _provider_of(model_config):
+                print(f"❌ 不支持的模型类型: {model_type}")
+                continue
+            
+            for attempt in range(1, self.retry_attempts + 1):
+                if not self._circuit_allows(model_type, name):
+                    break
+                
+                print(f"🤖 流式调用 {name} ({model_type})，第 {attempt}/{self.retry_attempts} 次...")
+                # 仅在启用缓存时保留完整内容，避免无谓的内存占用
+                parts: Optional[List[str]] = [] if self.cache else None
+                produced = False
+                start = time.time()
+                
+                try:
+                    for chunk in self._stream_model(model_config, prompt):
+                        produced = True
+                        if parts is not None:
+                            parts.append(chunk)
+                        yield chunk
+                except Exception as e:
+                    self._record_outcome(model_config, time.time() - start, False)
+                    print(f"❌ {name} 第 {attempt} 次流式调用失败: {e}")
+                    if produced:
+                        raise
+                    
+                    if attempt < self.retry_attempts:
+                        delay = self._backoff_delay(attempt, e)
+                        print(f"⏳ 等待 {delay:.1f} 秒后重试...")
+                        time.sleep(delay)
+                    continue
+                
+                self._record_outcome(model_config, time.time() - start, produced)
+                if produced:
+                    print(f"✅ {name} 流式生成完成")
+                    if parts is not None:
+                        self._set_cached(model_config, prompt, ''.join(parts))
+                    return
+        
+        print(f"❌ 所有模型均失败！")
+    
+    def generate_to_file(
+        self,
+        prompt: str,
+        output_file: str,
+        on_chunk: Optional[Callable[[str], None]] = None
+    ) -> int:
+        """
+        流式生成并边收边写入文件，打印首个 token 耗时
+        
+        中途失败时文件中保留已收到的部分内容；没有收到任何内容时删除空文件
+        
+        Args:
+            prompt: 提示词
+            output_file: 输出文件路径
+            on_chunk: 每收到一段内容时的回调（如 CodeExtractor，边生成边拆分文件）
+            
+        Returns:
+            写入的字符数，0 表示生成失败
+        """
+        start = time.time()
+        total_chars = 0
+        
+        with open(output_file, 'w', encoding='utf-8') as f:
+            try:
+                for chunk in self.generate_stream(prompt):
+                    if not total_chars:
+                        print(f"⚡ 首个 token 耗时: {time.time() - start:.2f} 秒")
+                    f.write(chunk)
+                    f.flush()
+                    if on_chunk is not None:
+                        on_chunk(chunk)
+                    total_chars += len(chunk)
+            except Exception as e:
+                print(f"❌ 流式生成中断: {e}")
+                print(f"⚠️  已保留部分输出 ({total_chars} 字符): {output_file}")
+                raise
+        
+        if not total_chars:
+            os.remove(output_file)
+        else:
+            print(f"⏱️  生成总耗时: {time.time() - start:.2f} 秒")
+        return total_chars
+    
+    def _stream_model(self, model_config: Dict, prompt: str) -> Iterator[str]:
+        """按模型类型分发到对应的流式 API"""
+        if _provider_of(model_config) == 'gemini':
+            return self._stream_gemini(model_config, prompt)
+        return self._stream_deepseek(model_config, prompt)
+    
+    def _stream_gemini(self, config: Dict, prompt: str) -> Iterator[str]:
+        """流式调用 Gemini API"""
+        response = self._get_gemini_model(config).generate_content(prompt, stream=True)
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # 没有文本部分的片段（如仅含安全评级）
+                continue
+            if text:
+                yield text
+    
+    def _stream_deepseek(self, config: Dict, prompt: str) -> Iterator[str]:
+        """流式调用 DeepSeek API，解析 SSE 格式的 chat/completions 响应"""
+        response = self._post_deepseek(config, prompt, stream=True)
+        response.encoding = 'utf-8'
+        
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                
+                payload = line[len('data:'):].strip()
+                if payload == '[DONE]':
+                    break
+                
+                event = json.loads(payload)
+                choices = event.get('choices') or [{}]
+                text = (choices[0].get('delta') or {}).get('content')
+                if text:
+                    yield text
+        finally:
+            response.close()
 
 
 def create_ai_helper(role: str) -> AIModelHelper:
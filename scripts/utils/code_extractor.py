@@ -0,0 +1,380 @@
+"""
+生成代码的多文件提取
+边接收 AI 流式输出边识别 Markdown 代码块和文件路径标题，每个代码块结束即按 Java 包路径或前端模块路径
+交给线程池并行写入；内容哈希与上次清单相同的文件跳过写入，最后输出 manifest.json
+"""
+import os
+import re
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+try:
+    from scripts.utils.state_file import read_json, write_json_atomic
+except ImportError:  # 直接运行本文件时
+    from state_file import read_json, write_json_atomic
+
+MANIFEST_NAME = 'manifest.json'
+
+# 代码块语言 -> 扩展名
+LANGUAGE_EXTENSIONS = {
+    'java': '.java',
+    'tsx': '.tsx',
+    'typescript': '.ts',
+    'ts': '.ts',
+    'jsx': '.jsx',
+    'javascript': '.js',
+    'js': '.js',
+    'css': '.css',
+    'scss': '.scss',
+    'json': '.json',
+    'yaml': '.yml',
+    'yml': '.yml',
+    'xml': '.xml',
+    'sql': '.sql',
+    'properties': '.properties',
+    'html': '.html'
+}
+
+# 识别为文件路径的扩展名
+_KNOWN_EXTENSIONS = set(LANGUAGE_EXTENSIONS.values()) | {'.md', '.txt', '.env', '.gradle', '.kts', '.less', '.svg', '.yaml'}
+
+_FENCE = re.compile(r'^\s*(`{3,}|~{3,})\s*([\w+#.-]*)\s*(.*)$')
+# 文本中的文件路径：带扩展名、可含目录
+_PATH = re.compile(r'([\w@.\-]+(?:/[\w@.\-\[\]]+)*\.[A-Za-z]{1,10})')
+# 代码块首行的路径注释，如 // File: src/App.tsx、/* HeroCard.tsx */、# config/app.yml
+_PATH_COMMENT = re.compile(r'^\s*(?://|/\*|#|<!--)\s*(?:(?:file|path|文件|路径)\s*[:：]\s*)?(\S+?)\s*(?:\*/|-->)?\s*$', re.I)
+# 标题或说明行中提示文件名的标记
+_HEADER_MARK = re.compile(r'(^\s*#|\*\*|`|file|path|文件|路径)', re.I)
+
+_JAVA_PACKAGE = re.compile(r'^\s*package\s+([\w.]+)\s*;', re.M)
+_JAVA_TYPE = re.compile(r'^\s*(?:public\s+)?(?:abstract\s+|final\s+|sealed\s+)*(?:class|interface|enum|record|@interface)\s+(\w+)', re.M)
+_TS_EXPORT = re.compile(r'export\s+(?:default\s+)?(?:async\s+)?(?:function|const|class|interface|type|enum)\s+(\w+)')
+
+
+class CodeBlock:
+    """一个代码块"""
+
+    def __init__(self, language: str, content: str, path_hint: Optional[str], index: int):
+        self.language = language.lower()
+        self.content = content
+        self.path_hint = path_hint
+        self.index = index
+
+
+class CodeBlockParser:
+    """
+    Markdown 代码块流式解析
+
+    逐块 feed 文本，每当一个代码块闭合就回调 on_block；
+    路径可以来自代码块前的标题/说明行、开头围栏后的文字或代码块首行注释
+    """
+
+    def __init__(self, on_block: Callable[[CodeBlock], None]):
+        self.on_block = on_block
+        self._buffer = ''
+        self._fence: Optional[str] = None
+        self._language = ''
+        self._path_hint: Optional[str] = None
+        self._lines: List[str] = []
+        self._prose: List[str] = []
+        self.blocks = 0
+
+    def feed(self, chunk: str):
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split('\n')
+        for line in lines:
+            self._handle_line(line)
+
+    def close(self):
+        """流结束：处理剩余内容，未闭合的代码块按已收到的部分输出；完全没有代码块时整体作为一个代码块"""
+        if self._buffer:
+            self._handle_line(self._buffer)
+            self._buffer = ''
+        if self._fence is not None:
+            self._emit()
+        elif not self.blocks and any(line.strip() for line in self._prose):
+            self._language = ''
+            self._lines = self._prose
+            self._path_hint = None
+            self._emit()
+
+    def _handle_line(self, line: str):
+        match = _FENCE.match(line)
+        if self._fence is None:
+            if match:
+                self._fence = match.group(1)
+                self._language = match.group(2)
+                self._lines = []
+                # ```java src/main/java/.../Hero.java 或 ```tsx title="HeroCard.tsx"
+                inline = _find_path(match.group(3))
+                if inline:
+                    self._path_hint = inline
+            else:
+                # 标题、加粗、行内代码或带目录的路径视为下一个代码块的文件名
+                self._prose.append(line)
+                path = _find_path(line)
+                if path and ('/' in path or _HEADER_MARK.search(line)):
+                    self._path_hint = path
+            return
+
+        if match and match.group(1)[0] == self._fence[0] and len(match.group(1)) >= len(self._fence) \
+                and not match.group(2) and not match.group(3):
+            self._emit()
+            return
+
+        if not self._lines and self._path_hint is None:
+            comment = _PATH_COMMENT.match(line)
+            if comment and _find_path(comment.group(1)) == comment.group(1):
+                self._path_hint = comment.group(1)
+        self._lines.append(line)
+
+    def _emit(self):
+        block = CodeBlock(self._language, '\n'.join(self._lines).strip('\n') + '\n', self._path_hint, self.blocks)
+        self._fence = None
+        self._path_hint = None
+        self._lines = []
+        self.blocks += 1
+        if block.content.strip():
+            self.on_block(block)
+
+
+def _find_path(text: str) -> Optional[str]:
+    """文本中第一个扩展名可识别的文件路径"""
+    for match in _PATH.finditer(text):
+        if os.path.splitext(match.group(1))[1].lower() in _KNOWN_EXTENSIONS:
+            return match.group(1)
+    return None
+
+
+def _safe_relative(path: str) -> Optional[str]:
+    """规范化相对路径，拒绝绝对路径和 .. 越界"""
+    path = os.path.normpath(path.replace('\\', '/').lstrip('/'))
+    if path.startswith('..') or os.path.isabs(path) or path == '.':
+        return None
+    return path.replace(os.sep, '/')
+
+
+def _extension(block: CodeBlock, default: str) -> str:
+    return LANGUAGE_EXTENSIONS.get(block.language, default)
+
+
+def route_backend(block: CodeBlock) -> str:
+    """Java 文件按 package 声明放到包路径下，其他文件按提示路径或 resources/ 存放"""
+    package = _JAVA_PACKAGE.search(block.content)
+    java_type = _JAVA_TYPE.search(block.content)
+    if block.language == 'java' or (package and java_type):
+        name = java_type.group(1) if java_type else os.path.splitext(os.path.basename(block.path_hint or ''))[0]
+        name = name or f"Generated{block.index + 1}"
+        package_dir = package.group(1).replace('.', '/') if package else ''
+        return '/'.join(p for p in (package_dir, f"{name}.java") if p)
+
+    if block.path_hint:
+        return f"resources/{os.path.basename(block.path_hint)}"
+    return f"resources/snippet-{block.index + 1}{_extension(block, '.txt')}"
+
+
+def route_frontend(block: CodeBlock) -> str:
+    """
+    前端文件按提示路径放到模块目录下（去掉 frontend/ 和 src/ 前缀）；
+    没有路径时按导出名推断：组件放 components/，纯类型放 types/，测试放 __tests__/
+    """
+    if block.path_hint:
+        hint = _safe_relative(block.path_hint)
+        if hint:
+            for prefix in ('frontend/', 'src/'):
+                if hint.startswith(prefix):
+                    hint = hint[len(prefix):]
+            if '.' not in os.path.basename(hint):
+                hint += _extension(block, '.ts')
+            return hint
+
+    ext = _extension(block, '.ts')
+    export = _TS_EXPORT.search(block.content)
+    name = export.group(1) if export else f"module-{block.index + 1}"
+    if re.search(r'\b(describe|it|test)\s*\(', block.content):
+        return f"__tests__/{name}.test{ext}"
+    if ext in ('.css', '.scss'):
+        return f"styles/{name}{ext}"
+    if ext in ('.tsx', '.jsx') or re.search(r'return\s*\(?\s*<', block.content):
+        return f"components/{name}{'.tsx' if ext == '.ts' else ext}"
+    if export and re.match(r'export\s+(?:interface|type|enum)', block.content[export.start():]):
+        return f"types/{name}{ext}"
+    return f"{name}{ext}"
+
+
+ROUTERS = {
+    'backend': route_backend,
+    'frontend': route_frontend
+}
+
+
+class CodeExtractor:
+    """
+    生成代码提取器
+
+    作为 generate_to_file 的 on_chunk 回调使用，成功后调用 finish 等待写入完成并保存清单；
+    生成失败时调用 abort 删除本次已写入的文件，避免半成品留在输出目录
+    """
+
+    def __init__(self, output_dir: str, target: str, max_workers: int = 4):
+        """
+        初始化提取器
+
+        Args:
+            output_dir: 输出目录（如 backend/src/main/generated/issue-12）
+            target: backend / frontend，决定路径规则
+            max_workers: 并行写入的线程数
+        """
+        self.output_dir = output_dir
+        self.router = ROUTERS[target]
+        self.manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        self.previous_files: List[Dict] = read_json(self.manifest_path).get('files', [])
+        self.previous = {f['path']: f['sha256'] for f in self.previous_files}
+        self.parser = CodeBlockParser(self._on_block)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.files: Dict[str, Dict] = {}
+        self._futures: Dict[str, Future] = {}
+        # 本次运行实际写入磁盘的路径，abort 时删除
+        self._written = set()
+        self._lock = threading.Lock()
+
+    def feed(self, chunk: str):
+        self.parser.feed(chunk)
+
+    __call__ = feed
+
+    def _on_block(self, block: CodeBlock):
+        path = _safe_relative(self.router(block))
+        if path is None or path == MANIFEST_NAME:
+            print(f"⚠️  跳过路径不安全的代码块: {block.path_hint}")
+            return
+
+        # 同一路径出现多次时后者覆盖前者，等前一次写完再写，保证顺序
+        with self._lock:
+            if path in self.files:
+                print(f"⚠️  重复的文件路径，使用后出现的版本: {path}")
+            previous = self._futures.get(path)
+            self._futures[path] = self.executor.submit(self._write, path, block, previous)
+
+    def _write(self, path: str, block: CodeBlock, previous: Optional[Future]):
+        if previous is not None:
+            previous.result()
+
+        digest = hashlib.sha256(block.content.encode('utf-8')).hexdigest()
+        full_path = os.path.join(self.output_dir, path)
+        unchanged = self.previous.get(path) == digest and os.path.exists(full_path)
+
+        if not unchanged:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            tmp_path = f"{full_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(block.content)
+                with self._lock:
+                    self._written.add(path)
+                os.replace(tmp_path, full_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        with self._lock:
+            self.files[path] = {
+                'path': path,
+                'language': block.language or os.path.splitext(path)[1].lstrip('.'),
+                'lines': block.content.count('\n'),
+                'sha256': digest,
+                'status': 'unchanged' if unchanged else 'written'
+            }
+
+    def finish(self) -> Dict:
+        """
+        处理剩余内容、等待全部写入完成并保存清单
+
+        Returns:
+            清单
+        """
+        try:
+            self.parser.close()
+            for future in self._pending():
+                future.result()
+        except Exception:
+            self.abort()
+            raise
+        self.executor.shutdown(wait=True)
+
+        # 输出目录中不属于这次结果的文件（上次生成或失败运行残留的）全部删除，避免参与质量验证
+        for root, _, names in os.walk(self.output_dir):
+            for name in names:
+                path = os.path.relpath(os.path.join(root, name), self.output_dir).replace(os.sep, '/')
+                if path != MANIFEST_NAME and path not in self.files:
+                    self._remove(path)
+
+        files = sorted(self.files.values(), key=lambda f: f['path'])
+        manifest = {
+            'generatedAt': datetime.now().isoformat(),
+            'files': files
+        }
+        write_json_atomic(self.manifest_path, manifest)
+
+        written = sum(1 for f in files if f['status'] == 'written')
+        print(f"📦 提取 {len(files)} 个文件（写入 {written}，未变化 {len(files) - written}），清单: {self.manifest_path}")
+        return manifest
+
+    def abort(self):
+        """
+        生成失败时调用：等待已提交的写入结束，删除本次写入的文件，
+        清单只保留上次生成中未被覆盖的文件
+        """
+        for future in self._pending():
+            future.cancel()
+        self.executor.shutdown(wait=True)
+
+        with self._lock:
+            written = set(self._written)
+        for path in written:
+            self._remove(path)
+
+        kept = [f for f in self.previous_files
+                if f['path'] not in written and os.path.exists(os.path.join(self.output_dir, f['path']))]
+        if kept or os.path.exists(self.manifest_path):
+            write_json_atomic(self.manifest_path, {'generatedAt': datetime.now().isoformat(), 'files': kept})
+        print(f"🧹 生成未完成，已删除本次写入的 {len(written)} 个文件: {self.output_dir}")
+
+    def _pending(self) -> List[Future]:
+        with self._lock:
+            return list(self._futures.values())
+
+    def _remove(self, path: str):
+        """删除输出目录中的文件及随之变空的目录"""
+        full_path = os.path.join(self.output_dir, path)
+        try:
+            os.remove(full_path)
+        except OSError:
+            return
+        directory = os.path.dirname(full_path)
+        while os.path.normpath(directory) != os.path.normpath(self.output_dir):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                break
+            directory = os.path.dirname(directory)
+
+
+def extract_files(text: str, output_dir: str, target: str) -> Dict:
+    """从完整的 AI 响应中提取文件（非流式场景）"""
+    extractor = CodeExtractor(output_dir, target)
+    extractor.feed(text)
+    return extractor.finish()
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) != 4:
+        print("用法: python scripts/utils/code_extractor.py <AI 响应文件> <输出目录> <backend|frontend>")
+        sys.exit(1)
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        extract_files(f.read(), sys.argv[2], sys.argv[3])
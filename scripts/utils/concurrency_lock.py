@@ -1,29 +1,108 @@
 """
 并发锁管理工具
-防止多个任务同时执行，确保串行处理
+按 concurrencyControl 配置限制同时执行的任务数：全局最多 maxConcurrentTasks 个，
+每种任务类型最多 maxConcurrentPerType 个，默认退化为单槽位互斥锁
+
+进程内持有的租约带短 TTL，由心跳线程续约，并记录 PID/主机名，持有者崩溃后几秒内即可回收；
+跨 workflow 步骤持有的租约（获取和释放在不同进程）仍按 lockTimeout 超时
+
+等待者在锁文件中排队领取号码，按任务优先级（high/medium/low）和先来后到依次获得槽位
 """
 import os
 import json
+import math
 import time
+import socket
+import threading
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 from pathlib import Path
 
+try:
+    from scripts.utils.file_watch import FileWatcher
+    from scripts.utils.state_file import file_lock, write_json_atomic
+except ImportError:  # 直接运行本文件时
+    from file_watch import FileWatcher
+    from state_file import file_lock, write_json_atomic
+
+CONFIG_PATH = 'ai-orchestrator/project-config.json'
+
+# 等待期间打印进度的间隔（秒）
+WAIT_LOG_INTERVAL = 10
+
+UNLOCKED = {
+    'locked': False,
+    'leases': []
+}
+
+# 按锁持有者推断任务类型
+TASK_TYPES = ('backend', 'frontend', 'qa')
+
+# 同一主机上有心跳租约时，检查持有进程是否存活的间隔（秒）
+LIVENESS_CHECK_INTERVAL = 1
+
+# 任务优先级对应的排队等级，数值越小越先获得槽位
+PRIORITY_RANKS = {'high': 0, 'medium': 1, 'low': 2}
+DEFAULT_PRIORITY = 'medium'
+
+# 排队每满该时长（秒）提升一个优先级等级，避免低优先级任务饿死
+PRIORITY_AGING = 600
+
+# 排队号码超过该时长（秒）未刷新视为等待者已退出
+TICKET_TTL = 3 * WAIT_LOG_INTERVAL
+
+# 平均持有时间的指数移动平均系数
+HOLD_TIME_ALPHA = 0.3
+
 class ConcurrencyLock:
-    """并发锁类"""
+    """并发锁类（多槽位租约）"""
     
-    def __init__(self, lock_file: str = ".github/.task-lock.json", timeout: int = 3600000):
+    def __init__(
+        self,
+        lock_file: str = ".github/.task-lock.json",
+        timeout: int = 3600000,
+        max_slots: int = 1,
+        max_per_type: Optional[Dict[str, int]] = None,
+        lease_ttl: int = 30000
+    ):
         """
         初始化并发锁
         
         Args:
             lock_file: 锁文件路径
             timeout: 锁超时时间（毫秒）
+            max_slots: 全局最多同时持有的租约数
+            max_per_type: 每种任务类型最多同时持有的租约数，未列出的类型只受全局限制
+            lease_ttl: 心跳租约的有效期（毫秒），超过该时间未续约视为持有者已失效
         """
         self.lock_file = lock_file
         self.timeout = timeout / 1000  # 转换为秒
+        self.max_slots = max(1, max_slots)
+        self.max_per_type = max_per_type or {}
+        self.lease_ttl = lease_ttl / 1000
+        self.host = socket.gethostname()
+        # 本实例持有的租约：taskId -> 围栏令牌
+        self.tokens: Dict[str, int] = {}
         self._ensure_lock_file()
     
+    @classmethod
+    def from_config(cls, config_path: str = CONFIG_PATH) -> 'ConcurrencyLock':
+        """根据 project-config.json 的 concurrencyControl 创建"""
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                control = json.load(f).get('concurrencyControl', {})
+        except (OSError, ValueError) as e:
+            print(f"⚠️  读取并发配置失败，使用单槽位互斥锁: {e}")
+            control = {}
+        
+        return cls(
+            lock_file=control.get('lockFile', '.github/.task-lock.json'),
+            timeout=control.get('lockTimeout', 3600000),
+            max_slots=control.get('maxConcurrentTasks', 1),
+            max_per_type=control.get('maxConcurrentPerType'),
+            lease_ttl=control.get('leaseTtl', 30000)
+        )
+    
     def _ensure_lock_file(self):
         """确保锁文件存在"""
         lock_dir = os.path.dirname(self.lock_file)
@@ -31,57 +110,262 @@ class ConcurrencyLock:
             os.makedirs(lock_dir, exist_ok=True)
         
         if not os.path.exists(self.lock_file):
-            self._write_lock_data({
-                'locked': False,
-                'taskId': None,
-                'lockedAt': None,
-                'lockedBy': None
-            })
+            # 加锁后再检查一次，避免覆盖其他进程刚写入的锁
+            with file_lock(self.lock_file):
+                if not os.path.exists(self.lock_file):
+                    self._write_lock_data(UNLOCKED)
     
     def _read_lock_data(self) -> Dict:
-        """读取锁数据"""
+        """读取锁数据（兼容只有单个 taskId 的旧格式）"""
         try:
             with open(self.lock_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                data = json.load(f)
         except Exception as e:
             print(f"⚠️  读取锁文件失败: {e}")
-            return {
-                'locked': False,
-                'taskId': None,
-                'lockedAt': None,
-                'lockedBy': None
-            }
+            return {'locked': False, 'leases': []}
+        
+        if 'leases' not in data:
+            leases = []
+            if data.get('locked'):
+                leases.append({
+                    'taskId': data.get('taskId'),
+                    'type': infer_task_type(data.get('lockedBy'), data.get('taskId')),
+                    'lockedAt': data.get('lockedAt'),
+                    'lockedBy': data.get('lockedBy')
+                })
+            data = {'locked': bool(leases), 'leases': leases}
+        return data
     
-    def _write_lock_data(self, data: Dict):
-        """写入锁数据"""
+    def _write_lock_data(self, data: Dict) -> bool:
+        """写入锁数据（写临时文件后 rename，读者不会看到空文件）"""
+        data['locked'] = bool(data.get('leases'))
         try:
-            with open(self.lock_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            write_json_atomic(self.lock_file, data)
+            return True
         except Exception as e:
             print(f"❌ 写入锁文件失败: {e}")
+            return False
     
-    def is_locked(self) -> bool:
-        """检查是否被锁定"""
-        lock_data = self._read_lock_data()
-        
-        if not lock_data.get('locked'):
+    def _is_expired(self, lease: Dict) -> bool:
+        """租约是否已超时，心跳租约的持有进程已退出也视为超时"""
+        if lease.get('ttl') and self._holder_dead(lease):
+            return True
+        return self._seconds_until_expiry(lease) <= 0
+    
+    def _holder_dead(self, lease: Dict) -> bool:
+        """同一主机上的持有进程是否已经不存在"""
+        owner = lease.get('owner') or {}
+        if owner.get('host') != self.host or not owner.get('pid'):
+            return False
+        try:
+            os.kill(owner['pid'], 0)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            # 进程存在但无权限发送信号
+            return False
+        return False
+    
+    def _active_leases(self, lock_data: Dict) -> Tuple[List[Dict], List[Dict]]:
+        """拆分为 (有效租约, 已超时租约)"""
+        active, expired = [], []
+        for lease in lock_data.get('leases', []):
+            (expired if self._is_expired(lease) else active).append(lease)
+        return active, expired
+    
+    def _has_free_slot(self, leases: List[Dict], task_type: Optional[str]) -> bool:
+        """全局和该类型的槽位是否都还有空余"""
+        if len(leases) >= self.max_slots:
             return False
+        limit = self.max_per_type.get(task_type)
+        if limit is not None and sum(1 for lease in leases if lease.get('type') == task_type) >= limit:
+            return False
+        return True
+    
+    def is_locked(self, task_type: Optional[str] = None) -> bool:
+        """
+        检查是否被锁定（没有可用槽位）
         
-        # 检查是否超时
-        locked_at_str = lock_data.get('lockedAt')
-        if locked_at_str:
+        Args:
+            task_type: 任务类型，指定时同时检查该类型的槽位
+        """
+        active, expired = self._active_leases(self._read_lock_data())
+
+        # 有超时租约时在文件锁内重新读取并清理：只移除重新读取后仍超时的租约，
+        # 读取之后新获取的同名租约不受影响
+        if expired:
+            with file_lock(self.lock_file):
+                lock_data = self._read_lock_data()
+                active, expired = self._active_leases(lock_data)
+                for lease in expired:
+                    print(f"⚠️  锁已超时，自动释放: {lease.get('taskId')}")
+                if expired:
+                    self._write_lock_data({**lock_data, 'leases': active})
+
+        return not self._has_free_slot(active, task_type)
+    
+    def _live_tickets(self, lock_data: Dict) -> Tuple[List[Dict], List[Dict]]:
+        """
+        拆分为 (仍在等待的排队号码, 等待者已退出的排队号码)
+        """
+        now = datetime.now()
+        live, dead = [], []
+        for ticket in lock_data.get('queue', []):
             try:
-                locked_at = datetime.fromisoformat(locked_at_str)
-                if datetime.now() > locked_at + timedelta(seconds=self.timeout):
-                    print(f"⚠️  锁已超时，自动释放")
-                    self.release()
-                    return False
-            except Exception:
-                pass
+                refreshed = datetime.fromisoformat(ticket.get('heartbeatAt'))
+                stale = (now - refreshed).total_seconds() > TICKET_TTL
+            except (TypeError, ValueError):
+                stale = True
+            (dead if stale or self._holder_dead(ticket) else live).append(ticket)
+        return live, dead
+    
+    @staticmethod
+    def _queue_order(ticket: Dict) -> Tuple[int, int]:
+        """排队顺序：(等级 - 等待时长带来的提升, 号码)"""
+        try:
+            waited = (datetime.now() - datetime.fromisoformat(ticket.get('enqueuedAt'))).total_seconds()
+        except (TypeError, ValueError):
+            waited = 0
+        rank = PRIORITY_RANKS.get(ticket.get('priority'), PRIORITY_RANKS[DEFAULT_PRIORITY])
+        return (rank - int(waited // PRIORITY_AGING), ticket['ticket'])
+    
+    def _first_served(self, active: List[Dict], queue: List[Dict], me: Dict) -> Tuple[bool, int]:
+        """
+        按排队顺序模拟分配空余槽位，判断 me 能否获得槽位
         
-        return True
+        排在前面但所需类型槽位已满的等待者不会挡住其他类型的等待者
+        
+        Returns:
+            (能否获得槽位, 排在前面的等待者数量)
+        """
+        ordered = sorted(queue, key=self._queue_order)
+        ahead = 0
+        granted = list(active)
+        for ticket in ordered:
+            if ticket is me:
+                return self._has_free_slot(granted, me.get('type')), ahead
+            ahead += 1
+            if self._has_free_slot(granted, ticket.get('type')):
+                granted.append(ticket)
+        return False, ahead
     
-    def acquire(self, task_id: str, locked_by: str, max_wait: int = 300) -> bool:
+    def _try_acquire(
+        self,
+        task_id: str,
+        locked_by: str,
+        task_type: Optional[str],
+        heartbeat: bool,
+        priority: str,
+        ticket_no: Optional[int],
+        enqueue: bool
+    ) -> Tuple[bool, List[Dict], Optional[int], int]:
+        """
+        在文件锁保护下完成检查和写入，槽位不会被超额分配，也不会被后来者插队
+        
+        Args:
+            ticket_no: 已领取的排队号码
+            enqueue: 无法立即获取时是否领取排队号码
+        
+        Returns:
+            (是否获取成功, 当前有效租约, 排队号码, 排在前面的等待者数量)
+        """
+        with file_lock(self.lock_file):
+            lock_data = self._read_lock_data()
+            active, expired = self._active_leases(lock_data)
+            queue, abandoned = self._live_tickets(lock_data)
+            changed = bool(expired or abandoned)
+            
+            for lease in expired:
+                print(f"⚠️  锁已超时，自动释放: {lease.get('taskId')}")
+            for ticket in abandoned:
+                print(f"⚠️  清理已退出的等待者: {ticket.get('taskId')}")
+            
+            now = datetime.now().isoformat()
+            me = next((t for t in queue if t['ticket'] == ticket_no), None) if ticket_no is not None else None
+            if me is None:
+                # 尚未排队（或号码已被清理）：以下一个号码参与排序
+                me = {
+                    'ticket': lock_data.get('nextTicket', 1),
+                    'taskId': task_id,
+                    'type': task_type,
+                    'priority': priority,
+                    'lockedBy': locked_by,
+                    'enqueuedAt': now,
+                    'heartbeatAt': now,
+                    'owner': {'pid': os.getpid(), 'host': self.host}
+                }
+                queued = False
+            else:
+                queued = True
+            
+            served, ahead = self._first_served(active, queue if queued else queue + [me], me)
+            
+            if not served:
+                if not queued and enqueue:
+                    queue.append(me)
+                    lock_data['nextTicket'] = me['ticket'] + 1
+                    ticket_no = me['ticket']
+                    changed = True
+                elif queued and self._ticket_stale(me):
+                    me['heartbeatAt'] = now
+                    changed = True
+                if changed:
+                    self._write_lock_data({**lock_data, 'leases': active, 'queue': queue})
+                return False, active, ticket_no, ahead
+            
+            queue = [t for t in queue if t is not me]
+            if not queued:
+                lock_data['nextTicket'] = me['ticket'] + 1
+            
+            # 围栏令牌单调递增，超时被接管后旧持有者无法再续约或释放新租约
+            token = lock_data.get('fencingToken', 0) + 1
+            now = datetime.now().isoformat()
+            lease = {
+                'taskId': task_id,
+                'type': task_type,
+                'lockedAt': now,
+                'lockedBy': locked_by,
+                'token': token
+            }
+            if heartbeat:
+                lease.update({
+                    'owner': {'pid': os.getpid(), 'host': self.host},
+                    'ttl': self.lease_ttl,
+                    'heartbeatAt': now
+                })
+            active.append(lease)
+            
+            if not self._write_lock_data({**lock_data, 'leases': active, 'queue': queue, 'fencingToken': token}):
+                return False, active, ticket_no, ahead
+            self.tokens[task_id] = token
+            return True, active, None, 0
+    
+    @staticmethod
+    def _ticket_stale(ticket: Dict) -> bool:
+        """排队号码是否需要刷新（刷新间隔远小于 TICKET_TTL，且不会每次唤醒都写文件）"""
+        try:
+            refreshed = datetime.fromisoformat(ticket.get('heartbeatAt'))
+        except (TypeError, ValueError):
+            return True
+        return (datetime.now() - refreshed).total_seconds() >= WAIT_LOG_INTERVAL
+    
+    def _dequeue(self, ticket_no: int):
+        """放弃等待时交回排队号码"""
+        with file_lock(self.lock_file):
+            lock_data = self._read_lock_data()
+            queue = [t for t in lock_data.get('queue', []) if t.get('ticket') != ticket_no]
+            if len(queue) != len(lock_data.get('queue', [])):
+                self._write_lock_data({**lock_data, 'queue': queue})
+    
+    def acquire(
+        self,
+        task_id: str,
+        locked_by: str,
+        max_wait: int = 300,
+        task_type: Optional[str] = None,
+        heartbeat: bool = False,
+        priority: Optional[str] = None
+    ) -> bool:
         """
         获取锁
         
@@ -89,93 +373,246 @@ class ConcurrencyLock:
             task_id: 任务ID
             locked_by: 锁持有者（如 architect, backend-dev 等）
             max_wait: 最大等待时间（秒），0 表示不等待
+            task_type: 任务类型（backend/frontend/qa），默认根据 locked_by 推断
+            heartbeat: 是否为心跳租约（需由本进程定期调用 renew，进程退出即失效）；
+                默认的普通租约可跨进程持有，按 lockTimeout 超时
+            priority: 任务优先级（high/medium/low），决定排队顺序，默认 medium
             
         Returns:
             bool: 是否成功获取锁
         """
+        task_type = task_type or infer_task_type(locked_by, task_id)
+        priority = priority if priority in PRIORITY_RANKS else DEFAULT_PRIORITY
         start_time = time.time()
+        last_log = None
+        ticket_no = None
         
-        while True:
-            if not self.is_locked():
-                # 锁可用，尝试获取
-                lock_data = {
-                    'locked': True,
-                    'taskId': task_id,
-                    'lockedAt': datetime.now().isoformat(),
-                    'lockedBy': locked_by
-                }
-                self._write_lock_data(lock_data)
-                print(f"🔒 成功获取锁: {task_id} (by {locked_by})")
-                return True
+        # 先开始监听再检查，检查之后发生的释放也能立即唤醒
+        with FileWatcher(self.lock_file) as watcher:
+            try:
+                while True:
+                    acquired, leases, ticket_no, ahead = self._try_acquire(
+                        task_id, locked_by, task_type, heartbeat, priority, ticket_no, enqueue=max_wait > 0
+                    )
+                    if acquired:
+                        print(f"🔒 成功获取锁: {task_id} (by {locked_by}，占用 {len(leases)}/{self.max_slots} 个槽位)")
+                        return True
+                    
+                    # 槽位被占满或前面还有排队的任务
+                    holders = '、'.join(f"{lease.get('taskId')} (by {lease.get('lockedBy')})" for lease in leases) or 'Unknown'
+                    
+                    elapsed = time.time() - start_time
+                    
+                    if max_wait == 0:
+                        print(f"❌ 锁被占用: {holders}，前面还有 {ahead} 个排队任务，不等待")
+                        return False
+                    
+                    if elapsed >= max_wait:
+                        print(f"❌ 等待锁超时: {holders}")
+                        return False
+                    
+                    if last_log is None or elapsed - last_log >= WAIT_LOG_INTERVAL:
+                        print(f"⏳ 锁被占用: {holders}，排队第 {ahead + 1} 位（{priority}），等待中... ({int(elapsed)}s/{max_wait}s)")
+                        last_log = elapsed
+                    
+                    # 等待锁文件变化，最多等到下次打印进度或最早的租约超时；
+                    # 本机心跳租约的持有者崩溃不会修改锁文件，需要定期检查进程是否存活
+                    wait_time = min([WAIT_LOG_INTERVAL, max_wait - elapsed] + [self._seconds_until_expiry(lease) for lease in leases])
+                    if any(lease.get('ttl') and (lease.get('owner') or {}).get('host') == self.host for lease in leases):
+                        wait_time = min(wait_time, LIVENESS_CHECK_INTERVAL)
+                    watcher.wait(wait_time)
+            finally:
+                if ticket_no is not None:
+                    self._dequeue(ticket_no)
+    
+    def _seconds_until_expiry(self, lease: Dict) -> float:
+        """距离租约超时自动释放还有多少秒（心跳租约从最近一次续约开始计算）"""
+        if lease.get('ttl'):
+            started, ttl = lease.get('heartbeatAt'), lease['ttl']
+        else:
+            started, ttl = lease.get('lockedAt'), self.timeout
+        try:
+            started_at = datetime.fromisoformat(started)
+        except (TypeError, ValueError):
+            return float('inf')
+        remaining = (started_at + timedelta(seconds=ttl) - datetime.now()).total_seconds()
+        return max(0.0, remaining)
+    
+    def renew(self, task_id: str) -> bool:
+        """
+        续约心跳租约
+        
+        Args:
+            task_id: 任务ID
             
-            # 锁被占用
+        Returns:
+            租约是否仍由本实例持有（已被超时接管时返回 False）
+        """
+        token = self.tokens.get(task_id)
+        with file_lock(self.lock_file):
             lock_data = self._read_lock_data()
-            current_task = lock_data.get('taskId', 'Unknown')
-            current_owner = lock_data.get('lockedBy', 'Unknown')
-            
-            elapsed = time.time() - start_time
-            
-            if max_wait == 0:
-                print(f"❌ 锁被占用: {current_task} (by {current_owner})，不等待")
-                return False
-            
-            if elapsed >= max_wait:
-                print(f"❌ 等待锁超时: {current_task} (by {current_owner})")
-                return False
-            
-            print(f"⏳ 锁被占用: {current_task} (by {current_owner})，等待中... ({int(elapsed)}s/{max_wait}s)")
-            time.sleep(10)  # 每10秒检查一次
+            for lease in lock_data.get('leases', []):
+                if lease.get('taskId') == task_id and lease.get('token') == token:
+                    lease['heartbeatAt'] = datetime.now().isoformat()
+                    return self._write_lock_data(lock_data)
+        return False
     
     def release(self, task_id: str = None):
         """
         释放锁
         
         Args:
-            task_id: 任务ID（可选，用于验证）
+            task_id: 任务ID（可选，不指定时释放全部租约）
         """
-        lock_data = self._read_lock_data()
-        
-        if task_id and lock_data.get('taskId') != task_id:
-            print(f"⚠️  尝试释放不属于自己的锁: {task_id} != {lock_data.get('taskId')}")
-            return
-        
-        self._write_lock_data({
-            'locked': False,
-            'taskId': None,
-            'lockedAt': None,
-            'lockedBy': None
-        })
+        with file_lock(self.lock_file):
+            lock_data = self._read_lock_data()
+            leases = lock_data.get('leases', [])
+            
+            if task_id:
+                # 本实例获取的租约需令牌一致，避免释放超时后被他人接管的同名租约
+                token = self.tokens.pop(task_id, None)
+                remaining = [
+                    lease for lease in leases
+                    if lease.get('taskId') != task_id or (token is not None and lease.get('token') != token)
+                ]
+                if len(remaining) == len(leases):
+                    if any(lease.get('taskId') == task_id for lease in leases):
+                        print(f"⚠️  租约已超时并被其他持有者接管，不释放: {task_id}")
+                    else:
+                        holders = [lease.get('taskId') for lease in leases]
+                        print(f"⚠️  尝试释放不属于自己的锁: {task_id} 不在 {holders} 中")
+                    return
+            else:
+                remaining = []
+            
+            released = [lease for lease in leases if lease not in remaining]
+            hold_stats = self._update_hold_stats(lock_data.get('holdStats', {}), released)
+            self._write_lock_data({**lock_data, 'leases': remaining, 'holdStats': hold_stats})
         print(f"🔓 锁已释放: {task_id or 'Unknown'}")
     
+    @staticmethod
+    def _update_hold_stats(stats: Dict, released: List[Dict]) -> Dict:
+        """用释放的租约更新平均持有时间（指数移动平均）"""
+        stats = dict(stats)
+        for lease in released:
+            try:
+                held = (datetime.now() - datetime.fromisoformat(lease.get('lockedAt'))).total_seconds()
+            except (TypeError, ValueError):
+                continue
+            average = stats.get('avgHoldSeconds')
+            stats['avgHoldSeconds'] = round(held if average is None else HOLD_TIME_ALPHA * held + (1 - HOLD_TIME_ALPHA) * average, 3)
+            stats['samples'] = stats.get('samples', 0) + 1
+        return stats
+    
     def get_lock_info(self) -> Dict:
-        """获取锁信息"""
-        return self._read_lock_data()
+        """
+        获取锁信息
+        
+        除锁文件内容外还包含 queueDepth（排队数）和 estimatedWait（新到任务的预计等待秒数，
+        按平均持有时间估算，尚无统计时为 None）
+        """
+        info = self._read_lock_data()
+        active, _ = self._active_leases(info)
+        queue, _ = self._live_tickets(info)
+        info['maxSlots'] = self.max_slots
+        info['maxPerType'] = self.max_per_type
+        info['queueDepth'] = len(queue)
+        
+        average = info.get('holdStats', {}).get('avgHoldSeconds')
+        if not queue and len(active) < self.max_slots:
+            info['estimatedWait'] = 0
+        elif average is None:
+            info['estimatedWait'] = None
+        else:
+            info['estimatedWait'] = round(average * math.ceil((len(queue) + 1) / self.max_slots), 1)
+        return info
+
+
+def infer_task_type(locked_by: Optional[str], task_id: Optional[str] = None) -> Optional[str]:
+    """
+    根据锁持有者或任务ID推断任务类型
+    
+    如 backend-dev → backend，qa-testing → qa；无法推断时返回 None（只受全局槽位限制）
+    """
+    for name in (locked_by, task_id):
+        for task_type in TASK_TYPES:
+            if name and name.startswith(task_type):
+                return task_type
+    return None
+
+
+class LeaseHeartbeat:
+    """后台线程，按 TTL 的三分之一定期续约"""
+    
+    def __init__(self, lock: ConcurrencyLock, task_id: str, interval: Optional[float] = None):
+        """
+        初始化心跳
+        
+        Args:
+            lock: 持有租约的锁
+            task_id: 任务ID
+            interval: 续约间隔（秒），默认为 TTL 的三分之一
+        """
+        self.lock = lock
+        self.task_id = task_id
+        self.interval = interval or max(0.1, lock.lease_ttl / 3)
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-heartbeat-{task_id}", daemon=True)
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                renewed = self.lock.renew(self.task_id)
+            except OSError as e:
+                print(f"⚠️  续约失败，稍后重试: {e}")
+                continue
+            if not renewed:
+                print(f"❌ 租约已失效: {self.task_id}")
+                self.lost.set()
+                return
 
 
-def with_lock(task_id: str, locked_by: str, max_wait: int = 300):
+def with_lock(task_id: str, locked_by: str, max_wait: int = 300, task_type: Optional[str] = None):
     """
-    装饰器：自动管理锁
+    装饰器：自动管理锁，无法获取锁或执行期间租约失效时返回 None
     
     Args:
         task_id: 任务ID
         locked_by: 锁持有者
         max_wait: 最大等待时间（秒）
+        task_type: 任务类型，默认根据 locked_by 推断
     """
     def decorator(func):
         def wrapper(*args, **kwargs):
-            lock = ConcurrencyLock()
+            lock = ConcurrencyLock.from_config()
             
             # 获取锁
-            if not lock.acquire(task_id, locked_by, max_wait):
+            if not lock.acquire(task_id, locked_by, max_wait, task_type, heartbeat=True):
                 print(f"❌ 无法获取锁，任务取消: {task_id}")
                 return None
             
+            # 执行期间后台续约
+            heartbeat = LeaseHeartbeat(lock, task_id)
+            heartbeat.start()
             try:
                 # 执行任务
                 result = func(*args, **kwargs)
+                # 执行期间租约失效（超时或被其他持有者接管）时结果不可信，与获取锁失败一样返回 None
+                if heartbeat.lost.is_set():
+                    print(f"❌ 任务执行期间租约已失效，结果作废: {task_id}")
+                    return None
                 return result
             finally:
                 # 释放锁
+                heartbeat.stop()
                 lock.release(task_id)
         
         return wrapper
@@ -0,0 +1,151 @@
+"""
+文件变化等待工具
+Linux 上通过 inotify 在文件被写入、替换或删除时立即唤醒，其他平台退化为短间隔 stat 轮询
+"""
+import os
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+from typing import Optional, Tuple
+
+# inotify 事件掩码（见 <sys/inotify.h>）
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HEADER = struct.Struct('iIII')
+
+_libc = None
+
+
+def _load_libc():
+    """加载支持 inotify 的 libc，不支持时返回 None"""
+    global _libc
+    if _libc is None:
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            libc.inotify_init1
+            libc.inotify_add_watch
+            _libc = libc
+        except (OSError, AttributeError):
+            _libc = False
+    return _libc or None
+
+
+class FileWatcher:
+    """
+    等待某个文件发生变化
+
+    在检查文件状态之前创建，之后发生的变化都会被记录，不会错过检查与等待之间的释放
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.05, max_poll_interval: float = 0.5):
+        """
+        初始化文件监听
+
+        Args:
+            path: 被监听的文件路径（可以尚不存在）
+            poll_interval: 轮询模式的初始间隔（秒）
+            max_poll_interval: 轮询模式的最大间隔（秒）
+        """
+        self.path = os.path.abspath(path)
+        self.name = os.path.basename(self.path).encode()
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._fd: Optional[int] = None
+        self._signature = self._stat_signature()
+
+        libc = _load_libc()
+        if libc is not None:
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0:
+                directory = os.path.dirname(self.path).encode()
+                if libc.inotify_add_watch(fd, directory, _WATCH_MASK) >= 0:
+                    self._fd = fd
+                else:
+                    os.close(fd)
+
+    @property
+    def uses_inotify(self) -> bool:
+        """是否使用 inotify（否则为轮询）"""
+        return self._fd is not None
+
+    def __enter__(self) -> 'FileWatcher':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """关闭 inotify 描述符"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _stat_signature(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def wait(self, timeout: float) -> bool:
+        """
+        等待文件变化
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            是否检测到变化（超时返回 False，偶尔可能有无害的误唤醒）
+        """
+        deadline = time.monotonic() + max(0.0, timeout)
+        if self._fd is not None:
+            return self._wait_inotify(deadline)
+        return self._wait_poll(deadline)
+
+    def _wait_inotify(self, deadline: float) -> bool:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if not readable:
+                return False
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+
+            # 目录下其他文件的事件直接忽略
+            offset = 0
+            changed = False
+            while offset + _EVENT_HEADER.size <= len(buffer):
+                _, _, _, name_len = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                name = buffer[offset:offset + name_len].rstrip(b'\0')
+                offset += name_len
+                if name == self.name:
+                    changed = True
+            if changed:
+                self._signature = self._stat_signature()
+                return True
+
+    def _wait_poll(self, deadline: float) -> bool:
+        interval = self.poll_interval
+        while True:
+            signature = self._stat_signature()
+            if signature != self._signature:
+                self._signature = signature
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2, self.max_poll_interval)
@@ -0,0 +1,206 @@
+"""
+Git 代码统计
+一次 git ls-files -s 得到全部文件及 blob，一个 git cat-file --batch 进程统计行数，
+一次流式 git log --numstat 统计提交数和代码变动量；
+结果按 HEAD 缓存，行数按 blob SHA 缓存，同一提交重复运行不再调用 git 统计
+"""
+import os
+import time
+import threading
+import subprocess
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    from scripts.utils.state_file import read_json, write_json_atomic
+except ImportError:  # 直接运行本文件时
+    from state_file import read_json, write_json_atomic
+
+CACHE_PATH = '.cache/git-stats.json'
+
+# 扩展名 -> 语言
+LANGUAGES = {
+    '.java': 'Java',
+    '.ts': 'TypeScript',
+    '.tsx': 'TypeScript',
+    '.js': 'JavaScript',
+    '.jsx': 'JavaScript',
+    '.py': 'Python',
+    '.sql': 'SQL',
+    '.css': 'CSS',
+    '.scss': 'CSS',
+    '.html': 'HTML',
+    '.json': 'JSON',
+    '.yml': 'YAML',
+    '.yaml': 'YAML',
+    '.xml': 'XML',
+    '.md': 'Markdown',
+    '.sh': 'Shell'
+}
+OTHER_LANGUAGE = 'Other'
+
+# 超过该大小的文件不统计行数（通常是生成文件或数据）
+MAX_COUNT_BYTES = 2 * 1024 * 1024
+RECENT_CHURN_DAYS = 30
+
+
+def language_of(path: str) -> str:
+    return LANGUAGES.get(os.path.splitext(path)[1].lower(), OTHER_LANGUAGE)
+
+
+def _run(args: List[str]) -> bytes:
+    return subprocess.run(['git', *args], capture_output=True, check=True).stdout
+
+
+def list_files() -> List[Tuple[str, str]]:
+    """git ls-files -s -z：[(路径, blob SHA)]，子模块等非普通文件跳过"""
+    files = []
+    for record in _run(['ls-files', '-s', '-z']).split(b'\0'):
+        if not record:
+            continue
+        meta, path = record.split(b'\t', 1)
+        mode, sha, _ = meta.split()
+        if mode.startswith(b'100') or mode == b'120000':
+            files.append((path.decode('utf-8', errors='replace'), sha.decode()))
+    return files
+
+
+def count_blob_lines(shas: Iterable[str]) -> Dict[str, int]:
+    """
+    用一个 git cat-file --batch 进程统计多个 blob 的行数，二进制和超大文件记为 0
+
+    Returns:
+        blob SHA -> 行数
+    """
+    shas = list(shas)
+    if not shas:
+        return {}
+
+    process = subprocess.Popen(
+        ['git', 'cat-file', '--batch'], stdin=subprocess.PIPE, stdout=subprocess.PIPE
+    )
+
+    # 另起线程写入请求，避免输出管道写满时互相等待
+    def feed():
+        try:
+            process.stdin.write(''.join(f"{sha}\n" for sha in shas).encode())
+        finally:
+            process.stdin.close()
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+
+    lines = {}
+    stdout = process.stdout
+    for sha in shas:
+        header = stdout.readline().split()
+        if len(header) < 3 or header[1] == b'missing':
+            lines[sha] = 0
+            continue
+        size = int(header[2])
+        content = stdout.read(size)
+        stdout.read(1)  # 每个对象后的换行
+
+        if size > MAX_COUNT_BYTES or b'\0' in content[:8000]:
+            lines[sha] = 0
+        else:
+            lines[sha] = content.count(b'\n') + (1 if content and not content.endswith(b'\n') else 0)
+
+    writer.join()
+    process.wait()
+    return lines
+
+
+def collect_churn(recent_days: int = RECENT_CHURN_DAYS) -> Dict:
+    """
+    流式读取 git log --numstat，统计提交数和增删行数（全部历史 + 最近 N 天）
+
+    Returns:
+        {'commits', 'added', 'deleted', 'byLanguage', 'recent': {...}}
+    """
+    since = time.time() - recent_days * 86400
+    churn = {'commits': 0, 'added': 0, 'deleted': 0, 'byLanguage': {}}
+    recent = {'days': recent_days, 'commits': 0, 'added': 0, 'deleted': 0, 'byLanguage': {}}
+    is_recent = False
+
+    process = subprocess.Popen(
+        ['git', 'log', '--numstat', '--no-renames', '--format=@%ct'],
+        stdout=subprocess.PIPE
+    )
+    for raw in process.stdout:
+        line = raw.decode('utf-8', errors='replace').rstrip('\n')
+        if line.startswith('@'):
+            churn['commits'] += 1
+            is_recent = int(line[1:]) >= since
+            if is_recent:
+                recent['commits'] += 1
+            continue
+
+        parts = line.split('\t', 2)
+        if len(parts) != 3 or parts[0] == '-':  # 空行或二进制文件
+            continue
+        added, deleted, path = int(parts[0]), int(parts[1]), parts[2]
+        language = language_of(path)
+        for bucket in ((churn, recent) if is_recent else (churn,)):
+            bucket['added'] += added
+            bucket['deleted'] += deleted
+            by_language = bucket['byLanguage'].setdefault(language, {'added': 0, 'deleted': 0})
+            by_language['added'] += added
+            by_language['deleted'] += deleted
+    process.wait()
+
+    churn['recent'] = recent
+    return churn
+
+
+def collect_git_stats(cache_path: str = CACHE_PATH) -> Dict:
+    """
+    收集 Git 统计，同一 HEAD 直接返回缓存
+
+    Returns:
+        total_commits、backend_files、frontend_files、total_lines、languages、churn
+    """
+    head = _run(['rev-parse', 'HEAD']).decode().strip()
+    cache = read_json(cache_path)
+    if cache.get('head') == head and cache.get('stats'):
+        print(f"💾 Git 统计缓存命中: {head[:7]}")
+        return cache['stats']
+
+    files = list_files()
+
+    # 行数按 blob 缓存，只统计新出现的 blob
+    blob_lines = cache.get('blobLines', {})
+    missing = {sha for _, sha in files if sha not in blob_lines}
+    blob_lines.update(count_blob_lines(missing))
+
+    languages: Dict[str, Dict[str, int]] = {}
+    for path, sha in files:
+        entry = languages.setdefault(language_of(path), {'files': 0, 'lines': 0})
+        entry['files'] += 1
+        entry['lines'] += blob_lines.get(sha, 0)
+
+    churn = collect_churn()
+    stats = {
+        'head': head,
+        'total_commits': churn.pop('commits'),
+        'backend_files': sum(1 for path, _ in files if path.startswith('backend/') and path.endswith('.java')),
+        'frontend_files': sum(
+            1 for path, _ in files if path.startswith('frontend/') and path.endswith(('.ts', '.tsx'))
+        ),
+        'total_lines': sum(entry['lines'] for entry in languages.values()),
+        'languages': dict(sorted(languages.items(), key=lambda item: item[1]['lines'], reverse=True)),
+        'churn': churn
+    }
+
+    current = {sha for _, sha in files}
+    write_json_atomic(cache_path, {
+        'head': head,
+        'stats': stats,
+        'blobLines': {sha: n for sha, n in blob_lines.items() if sha in current}
+    }, indent=None)
+    print(f"📊 Git 统计完成: {len(files)} 个文件（新统计 {len(missing)} 个 blob），{stats['total_commits']} 次提交")
+    return stats
+
+
+if __name__ == '__main__':
+    import json
+    print(json.dumps(collect_git_stats(), ensure_ascii=False, indent=2))
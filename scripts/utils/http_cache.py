@@ -0,0 +1,139 @@
+"""
+HTTP 条件请求缓存
+保存响应体及其 ETag/Last-Modified，下次请求带上 If-None-Match/If-Modified-Since，
+服务器返回 304 时直接使用本地副本，省去重复下载
+"""
+import os
+import json
+import time
+import hashlib
+from typing import Dict, Optional
+
+try:
+    from scripts.utils.state_file import read_json, write_json_atomic
+except ImportError:  # 直接运行本文件时
+    from state_file import read_json, write_json_atomic
+
+DEFAULT_CACHE_DIR = '.cache/http'
+
+
+class CachedResponse:
+    """与 requests.Response 用法一致的精简响应，from_cache 表示内容来自本地缓存"""
+
+    def __init__(self, content: bytes, status_code: int = 200, headers: Optional[Dict] = None,
+                 encoding: Optional[str] = None, from_cache: bool = False):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.encoding = encoding or 'utf-8'
+        self.from_cache = from_cache
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class HttpCache:
+    """HTTP 条件请求缓存类，每个 URL（含查询参数）对应一个条目"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+        """
+        self.cache_dir = cache_dir
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'writes': 0
+        }
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict] = None) -> str:
+        """由 URL 和查询参数计算缓存键"""
+        material = json.dumps({'url': url, 'params': params or {}}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _paths(self, key: str):
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return f"{base}.json", f"{base}.body"
+
+    def conditional_headers(self, key: str) -> Dict[str, str]:
+        """
+        生成条件请求头
+
+        Returns:
+            If-None-Match / If-Modified-Since，无缓存或缓存无校验信息时为空
+        """
+        meta_path, body_path = self._paths(key)
+        meta = read_json(meta_path)
+        if not meta or not os.path.exists(body_path):
+            return {}
+
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('lastModified'):
+            headers['If-Modified-Since'] = meta['lastModified']
+        return headers
+
+    def load(self, key: str) -> Optional[CachedResponse]:
+        """读取缓存的响应（服务器返回 304 时调用）"""
+        meta_path, body_path = self._paths(key)
+        meta = read_json(meta_path)
+        try:
+            with open(body_path, 'rb') as f:
+                content = f.read()
+        except OSError:
+            self.stats['misses'] += 1
+            return None
+
+        self.stats['hits'] += 1
+        return CachedResponse(
+            content,
+            headers={'Content-Type': meta.get('contentType', '')},
+            encoding=meta.get('encoding'),
+            from_cache=True
+        )
+
+    def store(self, key: str, url: str, response, content: Optional[bytes] = None) -> None:
+        """
+        保存 200 响应，没有 ETag/Last-Modified 的响应无法做条件请求，不保存
+
+        Args:
+            key: 缓存键
+            url: 请求 URL（仅用于排查）
+            response: requests.Response
+            content: 实际读取的内容（流式读取提前停止时只是响应体的前缀），默认为完整响应体
+        """
+        self.stats['misses'] += 1
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        meta_path, body_path = self._paths(key)
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        tmp_path = f"{body_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(response.content if content is None else content)
+        os.replace(tmp_path, body_path)
+
+        write_json_atomic(meta_path, {
+            'url': url,
+            'etag': etag,
+            'lastModified': last_modified,
+            'contentType': response.headers.get('Content-Type', ''),
+            'encoding': response.encoding,
+            'storedAt': time.time()
+        })
+        self.stats['writes'] += 1
+
+    def summary(self) -> str:
+        """统计摘要"""
+        return f"命中 {self.stats['hits']}，未命中 {self.stats['misses']}，写入 {self.stats['writes']}"
@@ -0,0 +1,144 @@
+"""
+并发锁压力测试
+启动 N 个进程反复争抢同一个 ConcurrencyLock，统计吞吐量、等待延迟和公平性，
+并用 O_EXCL 标记文件检查同时持有锁的进程数是否超过槽位数
+
+用法:
+    python scripts/utils/lock_stress_bench.py --procs 8 --duration 10 --hold 5 --slots 1
+"""
+import os
+import sys
+import time
+import json
+import argparse
+import tempfile
+import contextlib
+import multiprocessing
+from typing import Dict, List
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from scripts.utils.concurrency_lock import ConcurrencyLock
+
+
+def _worker(index: int, lock_file: str, slots: int, duration: float, hold: float, results) -> None:
+    """在限定时间内反复获取、持有、释放锁"""
+    acquisitions = 0
+    violations = 0
+    waits: List[float] = []
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        lock = ConcurrencyLock(lock_file, max_slots=slots)
+        task_id = f"bench-{index}"
+        deadline = time.time() + duration
+
+        while time.time() < deadline:
+            start = time.perf_counter()
+            if not lock.acquire(task_id, f"worker-{index}", max_wait=max(1, int(deadline - time.time()) + 1)):
+                continue
+            waits.append(time.perf_counter() - start)
+
+            # 临界区：每个槽位一个标记文件，全部已存在说明持有者超过槽位数
+            marker = None
+            for slot in range(slots):
+                try:
+                    os.close(os.open(f"{lock_file}.holder-{slot}", os.O_WRONLY | os.O_CREAT | os.O_EXCL))
+                    marker = f"{lock_file}.holder-{slot}"
+                    break
+                except FileExistsError:
+                    continue
+            if marker is None:
+                violations += 1
+            time.sleep(hold)
+            if marker is not None:
+                os.remove(marker)
+
+            lock.release(task_id)
+            acquisitions += 1
+
+    results.put({'worker': index, 'acquisitions': acquisitions, 'violations': violations, 'waits': waits})
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(percentile * len(ordered)))]
+
+
+def jain_fairness(counts: List[int]) -> float:
+    """Jain 公平性指数，1.0 表示完全公平，1/n 表示一个进程独占"""
+    if not counts or not any(counts):
+        return 0.0
+    return sum(counts) ** 2 / (len(counts) * sum(c * c for c in counts))
+
+
+def run_benchmark(procs: int, duration: float, hold_ms: float, slots: int = 1) -> Dict:
+    """
+    运行压力测试
+
+    Args:
+        procs: 争抢锁的进程数
+        duration: 每个进程的运行时间（秒）
+        hold_ms: 每次持有锁的时间（毫秒）
+        slots: 锁的槽位数（maxConcurrentTasks）
+
+    Returns:
+        统计结果
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        lock_file = os.path.join(tmp_dir, 'task-lock.json')
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            ConcurrencyLock(lock_file)
+
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=_worker, args=(i, lock_file, slots, duration, hold_ms / 1000, results))
+            for i in range(procs)
+        ]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        stats = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+    counts = [s['acquisitions'] for s in sorted(stats, key=lambda s: s['worker'])]
+    waits = [w for s in stats for w in s['waits']]
+    return {
+        'procs': procs,
+        'durationSeconds': round(elapsed, 2),
+        'holdMs': hold_ms,
+        'slots': slots,
+        'acquisitions': sum(counts),
+        'throughputPerSecond': round(sum(counts) / elapsed, 1),
+        'perWorker': counts,
+        'jainFairness': round(jain_fairness(counts), 3),
+        'waitP50Ms': round(_percentile(waits, 0.5) * 1000, 1),
+        'waitP95Ms': round(_percentile(waits, 0.95) * 1000, 1),
+        'mutualExclusionViolations': sum(s['violations'] for s in stats)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ConcurrencyLock 压力测试')
+    parser.add_argument('--procs', type=int, default=8, help='争抢锁的进程数')
+    parser.add_argument('--duration', type=float, default=10, help='运行时间（秒）')
+    parser.add_argument('--hold', type=float, default=5, help='每次持有锁的时间（毫秒）')
+    parser.add_argument('--slots', type=int, default=1, help='锁的槽位数')
+    args = parser.parse_args()
+
+    print(f"🏁 {args.procs} 个进程争抢 {args.slots} 个槽位 {args.duration} 秒，每次持有 {args.hold} ms")
+    result = run_benchmark(args.procs, args.duration, args.hold, args.slots)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if result['mutualExclusionViolations']:
+        print(f"❌ 检测到 {result['mutualExclusionViolations']} 次互斥失效")
+        sys.exit(1)
+    print("✅ 未发现互斥失效")
+
+
+if __name__ == '__main__':
+    main()
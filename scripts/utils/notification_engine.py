@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+统一通知引擎
+基于 PushPlusNotifier 和通知发件箱发送每日报告、任务完成/失败、测试结果等通知：
+模板在导入时预编译，HTTP 连接共享，按 notifications.events 配置开关各类事件；
+PushPlus 剩余额度紧张时，除失败类通知外只入箱不立即发送，留待下次汇总投递
+
+用法:
+    python scripts/utils/notification_engine.py send task-completed   # 读取 ISSUE_NUMBER、PR_NUMBER
+    python scripts/utils/notification_engine.py send task-failed      # 读取 ISSUE_NUMBER、ERROR_MESSAGE
+    python scripts/utils/notification_engine.py send test-result      # 读取 PR_NUMBER、TEST_PASSED、TEST_COVERAGE
+    python scripts/utils/notification_engine.py send daily-report
+    python scripts/utils/notification_engine.py flush
+"""
+import os
+import sys
+import json
+import html
+import argparse
+from datetime import datetime
+from string import Template
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from scripts.utils.pushplus_notifier import PushPlusNotifier
+from scripts.utils.notification_outbox import NotificationOutbox
+
+CONFIG_PATH = 'ai-orchestrator/project-config.json'
+REPO_URL = 'https://github.com/Anyeling0620/Small-Hero'
+
+# 额度紧张时仍立即发送的事件
+URGENT_EVENTS = ('taskFailed', 'testFailed')
+
+# 事件模板：(标题, 内容)，导入时编译一次
+TEMPLATES: Dict[str, Tuple[Template, Template]] = {
+    'taskCompleted': (
+        Template('✅ 任务完成 - Issue #$issue_number'),
+        Template('''
+<div style="font-family: Arial, sans-serif; padding: 20px; background: #d4edda;">
+    <h2 style="color: #28a745;">✅ 任务执行完成</h2>
+    <div style="background: white; padding: 15px; border-radius: 8px; border-left: 4px solid #28a745; margin: 10px 0;">
+        <h3 style="color: #28a745;">完成信息</h3>
+        <p><strong>Issue:</strong> #$issue_number</p>
+        <p><strong>Pull Request:</strong> #$pr_number</p>
+        <p><strong>时间:</strong> $time</p>
+    </div>
+
+    <div style="background: #f8f9fa; padding: 15px; border-radius: 8px; margin: 10px 0;">
+        <h3 style="color: #6c757d;">下一步</h3>
+        <ul>
+            <li>✅ 代码已提交到 PR</li>
+            <li>🧪 等待 QA 测试</li>
+            <li>✔️ 通过后即可合并</li>
+        </ul>
+    </div>
+
+    <div style="background: #e7f3ff; padding: 15px; border-radius: 8px; margin: 10px 0;">
+        <p style="margin: 0;">
+            🔗 <a href="$repo_url/issues/$issue_number">查看 Issue</a> |
+            <a href="$repo_url/pull/$pr_number">查看 PR</a>
+        </p>
+    </div>
+</div>
+''')
+    ),
+    'taskFailed': (
+        Template('❌ 任务失败 - Issue #$issue_number'),
+        Template('''
+<div style="font-family: Arial, sans-serif; padding: 20px; background: #fff3cd;">
+    <h2 style="color: #dc3545;">❌ 任务执行失败</h2>
+    <div style="background: white; padding: 15px; border-radius: 8px; border-left: 4px solid #dc3545; margin: 10px 0;">
+        <h3 style="color: #dc3545;">失败信息</h3>
+        <p><strong>Issue:</strong> #$issue_number</p>
+        <p><strong>时间:</strong> $time</p>
+        <p><strong>错误:</strong> $error_message</p>
+    </div>
+
+    <div style="background: #f8f9fa; padding: 15px; border-radius: 8px; margin: 10px 0;">
+        <h3 style="color: #6c757d;">下一步操作</h3>
+        <ul>
+            <li>系统将自动重试</li>
+            <li>如果持续失败，请检查日志</li>
+            <li>可能需要手动介入</li>
+        </ul>
+    </div>
+
+    <div style="background: #e7f3ff; padding: 15px; border-radius: 8px; margin: 10px 0;">
+        <p style="margin: 0;">
+            🔗 <a href="$repo_url/issues/$issue_number">查看 Issue</a> |
+            <a href="$repo_url/actions">查看 Actions</a>
+        </p>
+    </div>
+</div>
+''')
+    ),
+    'testResult': (
+        Template('$status_icon 测试$status_text - PR #$pr_number'),
+        Template('''
+<div style="font-family: Arial, sans-serif; padding: 20px; background: $bg_color;">
+    <h2 style="color: $status_color;">$status_icon 测试$status_text</h2>
+    <div style="background: white; padding: 15px; border-radius: 8px; border-left: 4px solid $status_color; margin: 10px 0;">
+        <h3 style="color: $status_color;">测试结果</h3>
+        <p><strong>Pull Request:</strong> #$pr_number</p>
+        <p><strong>状态:</strong> $status_text</p>
+        <p><strong>覆盖率:</strong> $coverage</p>
+        <p><strong>时间:</strong> $time</p>
+    </div>
+
+    <div style="background: #f8f9fa; padding: 15px; border-radius: 8px; margin: 10px 0;">
+        <h3 style="color: #6c757d;">详情</h3>
+        <p>完整的测试报告已发布在 PR 评论中</p>
+    </div>
+
+    <div style="background: #e7f3ff; padding: 15px; border-radius: 8px; margin: 10px 0;">
+        <p style="margin: 0;">
+            🔗 <a href="$repo_url/pull/$pr_number">查看 PR</a> |
+            <a href="$repo_url/actions">查看详细日志</a>
+        </p>
+    </div>
+</div>
+''')
+    ),
+    'dailyReport': (
+        Template('📊 Small Hero 每日开发报告 - $date'),
+        Template('''
+<div style="font-family: Arial, sans-serif; padding: 20px; background: #f5f5f5;">
+    <h2 style="color: #2c3e50;">📊 今日开发概览</h2>
+    <div style="background: white; padding: 15px; border-radius: 8px; margin: 10px 0;">
+        <h3 style="color: #3498db;">📝 任务统计</h3>
+        <ul style="list-style: none; padding: 0;">
+            <li>🆕 待开始: <b style="color: #e74c3c;">$tasks_created</b> 个</li>
+            <li>⏳ 进行中: <b style="color: #f39c12;">$tasks_in_progress</b> 个</li>
+            <li>✅ 已完成: <b style="color: #27ae60;">$tasks_completed</b> 个</li>
+        </ul>
+    </div>
+
+    <div style="background: white; padding: 15px; border-radius: 8px; margin: 10px 0;">
+        <h3 style="color: #3498db;">📈 项目进度</h3>
+        <ul style="list-style: none; padding: 0;">
+            <li>📚 累计任务: <b>$total_tasks</b> 个</li>
+            <li>💻 代码提交: <b>$total_commits</b> 次</li>
+        </ul>
+    </div>
+
+    <div style="background: white; padding: 15px; border-radius: 8px; margin: 10px 0;">
+        <h3 style="color: #3498db;">🤖 AI 团队状态</h3>
+        <p>✅ 架构师: 正常运行</p>
+        <p>✅ 后端开发: 待命中</p>
+        <p>✅ 前端开发: 待命中</p>
+        <p>✅ QA 测试: 待命中</p>
+    </div>
+
+    <div style="background: #ecf0f1; padding: 15px; border-radius: 8px; margin: 10px 0;">
+        <p style="color: #7f8c8d; font-size: 12px; margin: 0;">
+            ⏰ 报告时间: $time<br>
+            🔗 <a href="$repo_url">查看项目详情</a>
+        </p>
+    </div>
+</div>
+''')
+    )
+}
+
+
+def _now() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def task_completed_context() -> Dict:
+    """任务完成通知的上下文（来自 workflow 环境变量）"""
+    return {
+        'issue_number': os.getenv('ISSUE_NUMBER', 'Unknown'),
+        'pr_number': os.getenv('PR_NUMBER', 'N/A')
+    }
+
+
+def task_failed_context() -> Dict:
+    """任务失败通知的上下文"""
+    return {
+        'issue_number': os.getenv('ISSUE_NUMBER', 'Unknown'),
+        'error_message': os.getenv('ERROR_MESSAGE', '任务执行失败')
+    }
+
+
+def test_result_context() -> Dict:
+    """测试结果通知的上下文"""
+    passed = os.getenv('TEST_PASSED', 'false') == 'true'
+    return {
+        'passed': passed,
+        'pr_number': os.getenv('PR_NUMBER', 'Unknown'),
+        'coverage': os.getenv('TEST_COVERAGE', 'N/A'),
+        'status_icon': '✅' if passed else '❌',
+        'status_text': '通过' if passed else '失败',
+        'status_color': '#28a745' if passed else '#dc3545',
+        'bg_color': '#d4edda' if passed else '#f8d7da'
+    }
+
+
+def daily_report_context() -> Dict:
+    """每日报告的统计数据（任务池状态索引 + 项目状态）"""
+    context = {
+        'date': datetime.now().strftime('%Y-%m-%d'),
+        'tasks_created': 0,
+        'tasks_completed': 0,
+        'tasks_in_progress': 0,
+        'total_tasks': 0,
+        'total_commits': 0
+    }
+
+    task_pool_path = 'ai-orchestrator/task-pool.json'
+    if os.path.exists(task_pool_path):
+        try:
+            from scripts.utils.task_store import TaskStore
+
+            # 通过状态索引统计，无需遍历整个任务池
+            with TaskStore(task_pool_path) as store:
+                counts = store.count_by_status()
+                context['tasks_created'] = counts.get('pending', 0)
+                context['tasks_completed'] = counts.get('completed', 0) + store.completed_count()
+                context['tasks_in_progress'] = counts.get('in-progress', 0)
+        except Exception as e:
+            print(f"⚠️  无法读取任务池: {str(e)}")
+
+    state_path = 'ai-orchestrator/internal_state/project_memory.json'
+    if os.path.exists(state_path):
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                statistics = json.load(f).get('statistics', {})
+            context['total_tasks'] = statistics.get('totalTasks', 0)
+            context['total_commits'] = statistics.get('totalCommits', 0)
+        except Exception as e:
+            print(f"⚠️  无法读取项目状态: {str(e)}")
+
+    return context
+
+
+def run_scope() -> str:
+    """
+    当前 workflow 运行标识，用于任务和测试结果通知的去重键：
+    同一次运行重复发送只投递一次，重新运行或再次完成/失败都会通知；本地运行时每次都不同
+    """
+    run_id = os.getenv('GITHUB_RUN_ID')
+    if run_id:
+        return f"{run_id}.{os.getenv('GITHUB_RUN_ATTEMPT', '1')}"
+    return f"local.{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+
+
+# CLI 事件名 -> (模板名, 上下文构造函数, 去重键)
+CLI_EVENTS: Dict[str, Tuple[str, Callable[[], Dict], Callable[[Dict], str]]] = {
+    'task-completed': ('taskCompleted', task_completed_context, lambda c: f"task-completed:{c['issue_number']}:{run_scope()}"),
+    'task-failed': ('taskFailed', task_failed_context, lambda c: f"task-failed:{c['issue_number']}:{run_scope()}"),
+    'test-result': ('testResult', test_result_context, lambda c: f"test-result:{c['pr_number']}:{c['passed']}:{run_scope()}"),
+    'daily-report': ('dailyReport', daily_report_context, lambda c: f"daily-report:{c['date']}")
+}
+
+
+class NotificationEngine:
+    """通知引擎类"""
+
+    def __init__(
+        self,
+        config_path: str = CONFIG_PATH,
+        notifier: Optional[PushPlusNotifier] = None,
+        outbox: Optional[NotificationOutbox] = None
+    ):
+        """
+        初始化通知引擎
+
+        Args:
+            config_path: 项目配置路径
+            notifier: PushPlusNotifier 实例，默认新建
+            outbox: 通知发件箱，默认按 notifications.outbox 配置创建
+        """
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                self.config = json.load(f).get('notifications', {})
+        except (OSError, ValueError) as e:
+            print(f"⚠️  读取通知配置失败，使用默认配置: {e}")
+            self.config = {}
+
+        self.pushplus_config = self.config.get('pushplus', {})
+        self.notifier = notifier or PushPlusNotifier()
+        self.outbox = outbox if outbox is not None else NotificationOutbox.from_config(config_path)
+
+    def is_enabled(self, event: str) -> bool:
+        """通知总开关、PushPlus 开关和事件开关均打开时才发送"""
+        if not self.config.get('enabled', True) or not self.pushplus_config.get('enabled', True):
+            return False
+        return self.config.get('events', {}).get(event, True)
+
+    @staticmethod
+    def render(template_name: str, context: Dict) -> Tuple[str, str]:
+        """
+        渲染模板，内容中的变量做 HTML 转义
+
+        Returns:
+            (标题, HTML 内容)
+        """
+        title_template, content_template = TEMPLATES[template_name]
+        values = {'time': _now(), 'repo_url': REPO_URL, **context}
+        title = title_template.substitute(values)
+        content = content_template.substitute({k: html.escape(str(v)) for k, v in values.items()})
+        return title, content
+
+    def notify(self, event: str, template_name: str, context: Dict, key: Optional[str] = None) -> bool:
+        """
+        发送一条通知：写入发件箱后立即投递（发件箱中已到期的积压通知合并为一条）
+
+        Args:
+            event: notifications.events 中的事件名（如 taskCompleted、testPassed）
+            template_name: 模板名
+            context: 模板变量
+            key: 去重键
+
+        Returns:
+            是否已发送或已进入发件箱
+        """
+        if not self.is_enabled(event):
+            print(f"🔕 通知事件 {event} 已关闭，跳过")
+            return False
+        if not self.notifier.token:
+            print("⚠️  PUSHPLUS_TOKEN 未配置，跳过通知")
+            return False
+
+        title, content = self.render(template_name, context)
+
+        if self.outbox is None:
+            return self.notifier.send_notification(
+                title,
+                content,
+                template=self.pushplus_config.get('template', 'html'),
+                channel=self.pushplus_config.get('channel', 'wechat')
+            )
+
+        record_id = self.outbox.enqueue(
+            title, content, key=key, event=event, channel=self.pushplus_config.get('channel', 'wechat')
+        )
+
+        limiter = self.notifier.limiter
+        if limiter is not None and limiter.is_low() and event not in URGENT_EVENTS:
+            print(f"📉 PushPlus 今日剩余额度 {limiter.remaining_quota()}，已转为汇总模式，通知稍后合并发送")
+            return True
+
+        # 只让这条通知跳过合并窗口，汇总模式下延后的通知和重试中的通知仍按各自的时间投递
+        self.outbox.flush(self.notifier, send_now={record_id})
+        return True
+
+    def notify_from_env(self, cli_event: str) -> bool:
+        """根据 CLI 事件名从环境变量构造上下文并发送"""
+        template_name, build_context, make_key = CLI_EVENTS[cli_event]
+        context = build_context()
+
+        event = template_name
+        if template_name == 'testResult':
+            event = 'testPassed' if context['passed'] else 'testFailed'
+
+        return self.notify(event, template_name, context, key=make_key(context))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='统一通知引擎')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    send_parser = subparsers.add_parser('send', help='发送一条通知')
+    send_parser.add_argument('event', choices=sorted(CLI_EVENTS), help='通知事件')
+
+    subparsers.add_parser('flush', help='投递发件箱中已到期的积压通知')
+
+    args = parser.parse_args(argv)
+    engine = NotificationEngine()
+
+    if args.command == 'send':
+        engine.notify_from_env(args.event)
+    elif engine.outbox is not None:
+        # 不强制投递：合并窗口（额度紧张时为汇总窗口）和重试退避照常生效，未到期的由缓存带到下次运行
+        sent = engine.outbox.flush(engine.notifier)
+        print(f"📮 已投递 {sent} 条通知，剩余 {engine.outbox.pending_count()} 条")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+"""
+通知发件箱
+调用方只把通知追加到本地 JSONL 发件箱（亚毫秒级），由后台线程或 workflow 末尾的
+notification_engine.py flush 步骤投递（待发状态通过 actions/cache 跨运行保留）：
+时间窗口内的多条通知合并为一条汇总消息，相同事件键去重，失败按指数退避重试；
+PushPlus 每日剩余额度紧张时自动切换为汇总模式，使用更长的合并窗口
+"""
+import os
+import json
+import time
+import uuid
+import random
+import atexit
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+try:
+    from scripts.utils.state_file import file_lock, locked_json, read_json
+except ImportError:  # 直接运行本文件时
+    from state_file import file_lock, locked_json, read_json
+
+CONFIG_PATH = 'ai-orchestrator/project-config.json'
+DEFAULT_OUTBOX_DIR = '.cache/notifications'
+
+# 发件箱记录的必需字段，缺少任一字段的记录在取出时丢弃
+REQUIRED_FIELDS = ('id', 'title', 'content', 'createdAt')
+
+
+class NotificationOutbox:
+    """磁盘发件箱类"""
+
+    def __init__(
+        self,
+        outbox_dir: str = DEFAULT_OUTBOX_DIR,
+        window: float = 60,
+        max_attempts: int = 5,
+        retry_delay: float = 30,
+        max_retry_delay: float = 900,
+        dedup_hours: float = 6,
+        digest_window: float = 3600
+    ):
+        """
+        初始化发件箱
+
+        Args:
+            outbox_dir: 发件箱目录
+            window: 合并窗口（秒），最早一条通知入箱满该时长后才投递，期间的通知合并为一条
+            max_attempts: 最多投递次数，超过后丢弃
+            retry_delay: 首次重试等待（秒），之后指数增长
+            max_retry_delay: 重试等待上限（秒）
+            dedup_hours: 同一事件键在该时长内只投递一次
+            digest_window: 额度紧张时的合并窗口（秒）
+        """
+        self.outbox_path = os.path.join(outbox_dir, 'outbox.jsonl')
+        self.state_path = os.path.join(outbox_dir, 'outbox-state.json')
+        self.window = window
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.dedup_window = dedup_hours * 3600
+        self.digest_window = digest_window
+        os.makedirs(outbox_dir, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config_path: str = CONFIG_PATH) -> Optional['NotificationOutbox']:
+        """根据 notifications.outbox 配置创建，显式关闭时返回 None"""
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                outbox_config = json.load(f).get('notifications', {}).get('outbox', {})
+        except (OSError, ValueError):
+            outbox_config = {}
+
+        if not outbox_config.get('enabled', True):
+            return None
+
+        return cls(
+            outbox_dir=outbox_config.get('dir', DEFAULT_OUTBOX_DIR),
+            window=outbox_config.get('windowSeconds', 60),
+            max_attempts=outbox_config.get('maxAttempts', 5),
+            retry_delay=outbox_config.get('retryDelay', 30000) / 1000,
+            max_retry_delay=outbox_config.get('maxRetryDelay', 900000) / 1000,
+            dedup_hours=outbox_config.get('dedupHours', 6),
+            digest_window=outbox_config.get('digestWindowSeconds', 3600)
+        )
+
+    # ------------------------------------------------------------------
+    # 入箱
+    # ------------------------------------------------------------------
+
+    def enqueue(
+        self,
+        title: str,
+        content: str,
+        key: Optional[str] = None,
+        event: Optional[str] = None,
+        template: str = 'html',
+        channel: str = 'wechat'
+    ) -> str:
+        """
+        追加一条通知，不做任何网络请求
+
+        Args:
+            title: 通知标题
+            content: 通知内容
+            key: 去重键（如 task-created:20260103-001），默认不去重
+            event: 事件类型（taskCreated 等）
+            template: 模板类型
+            channel: 发送渠道
+
+        Returns:
+            通知 ID
+        """
+        record = {
+            'id': uuid.uuid4().hex,
+            'key': key,
+            'event': event,
+            'title': title,
+            'content': content,
+            'template': template,
+            'channel': channel,
+            'createdAt': time.time()
+        }
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+
+        # 与 flush 的读取并清空互斥，保证追加不会丢失
+        with file_lock(self.outbox_path):
+            fd = os.open(self.outbox_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+        return record['id']
+
+    def _drain(self) -> List[Dict]:
+        """取出发件箱中的全部新通知并清空"""
+        with file_lock(self.outbox_path):
+            try:
+                with open(self.outbox_path, 'r+', encoding='utf-8') as f:
+                    lines = f.readlines()
+                    f.seek(0)
+                    f.truncate()
+            except FileNotFoundError:
+                return []
+
+        records = []
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict) or any(field not in record for field in REQUIRED_FIELDS):
+                print(f"⚠️  跳过损坏的发件箱记录: {line[:80]}")
+                continue
+            records.append(record)
+        return records
+
+    # ------------------------------------------------------------------
+    # 投递
+    # ------------------------------------------------------------------
+
+    def pending_count(self) -> int:
+        """待投递通知数（含发件箱中尚未取出的）"""
+        try:
+            with open(self.outbox_path, 'rb') as f:
+                queued = sum(1 for _ in f)
+        except FileNotFoundError:
+            queued = 0
+        return queued + len(read_json(self.state_path).get('pending', []))
+
+    def flush(self, notifier=None, force: bool = False, send_now: Optional[Set[str]] = None) -> int:
+        """
+        投递到期的通知
+
+        Args:
+            notifier: PushPlusNotifier 实例，默认新建
+            force: 忽略合并窗口和重试等待，立即投递全部待发通知（手动投递用）
+            send_now: 只对这些通知 ID 忽略合并窗口；其余待发通知仍按窗口和重试等待，
+                窗口已到时一并合并发送
+
+        Returns:
+            成功投递的通知条数
+        """
+        if notifier is None:
+            try:
+                from scripts.utils.pushplus_notifier import PushPlusNotifier
+            except ImportError:  # 直接运行本文件时
+                from pushplus_notifier import PushPlusNotifier
+            notifier = PushPlusNotifier()
+
+        # 额度紧张时切换为汇总模式；被限流时保留待发，不计入失败次数
+        limiter = getattr(notifier, 'limiter', None)
+        window = self.digest_window if limiter is not None and limiter.is_low() else self.window
+        throttled = limiter is not None and limiter.peek() != 0
+
+        # 状态文件锁保证同一时间只有一个投递者
+        with locked_json(self.state_path) as state:
+            now = time.time()
+            delivered = {k: ts for k, ts in state.get('delivered', {}).items() if now - ts < self.dedup_window}
+            pending = self._merge(state.get('pending', []), self._drain(), delivered)
+
+            due = [r for r in pending if force or r.get('nextAttemptAt', 0) <= now]
+            if due and not force and now - min(r['createdAt'] for r in due) < window:
+                # 合并窗口未到：只发送指定立即投递的通知，汇总模式下延后的通知继续等待
+                due = [r for r in due if r['id'] in send_now] if send_now else []
+            if not due or throttled:
+                state.update({'pending': pending, 'delivered': delivered})
+                return 0
+
+            # 发件箱已清空，任何异常都不能跳过状态写回，否则取出的通知会丢失
+            try:
+                title, content, template, channel = self._compose(due)
+                ok = notifier.send_notification(title, content, template=template, channel=channel)
+            except Exception as e:
+                print(f"❌ 通知投递异常: {e}")
+                ok = False
+
+            if ok:
+                sent_ids = {r['id'] for r in due}
+                pending = [r for r in pending if r['id'] not in sent_ids]
+                for record in due:
+                    if record.get('key'):
+                        delivered[record['key']] = now
+                sent = len(due)
+            else:
+                pending = self._schedule_retry(pending, {r['id'] for r in due}, now)
+                sent = 0
+
+            state.update({'pending': pending, 'delivered': delivered})
+            return sent
+
+    def _merge(self, pending: List[Dict], new_records: List[Dict], delivered: Dict[str, float]) -> List[Dict]:
+        """合并新通知：已投递过的事件键丢弃，待发中的同键通知替换为最新内容"""
+        merged = list(pending)
+        for record in new_records:
+            key = record.get('key')
+            if key and key in delivered:
+                continue
+            if key:
+                merged = [r for r in merged if r.get('key') != key]
+            merged.append(record)
+        return merged
+
+    def _schedule_retry(self, pending: List[Dict], failed_ids: set, now: float) -> List[Dict]:
+        """为投递失败的通知安排退避重试，超过次数的丢弃"""
+        result = []
+        for record in pending:
+            if record['id'] in failed_ids:
+                record['attempts'] = record.get('attempts', 0) + 1
+                if record['attempts'] >= self.max_attempts:
+                    print(f"❌ 通知投递 {record['attempts']} 次均失败，已丢弃: {record['title']}")
+                    continue
+                delay = min(self.max_retry_delay, self.retry_delay * 2 ** (record['attempts'] - 1))
+                record['nextAttemptAt'] = now + delay * random.uniform(0.5, 1.0)
+            result.append(record)
+        return result
+
+    @staticmethod
+    def _compose(records: List[Dict]) -> tuple:
+        """单条通知原样发送，多条合并为一条 HTML 汇总"""
+        if len(records) == 1:
+            r = records[0]
+            return r['title'], r['content'], r.get('template', 'html'), r.get('channel', 'wechat')
+
+        records = sorted(records, key=lambda r: r['createdAt'])
+        sections = []
+        for r in records:
+            created = datetime.fromtimestamp(r['createdAt']).strftime('%H:%M:%S')
+            body = r['content'] if r.get('template', 'html') == 'html' else f"<pre>{r['content']}</pre>"
+            sections.append(f"<h3>{r['title']} <small>{created}</small></h3>\n{body}")
+
+        title = f"📬 {len(records)} 条通知汇总: {records[0]['title']} 等"
+        content = f"<h2>📬 通知汇总（{len(records)} 条）</h2>\n" + '\n<hr>\n'.join(sections)
+        return title, content, 'html', records[0].get('channel', 'wechat')
+
+
+class OutboxFlusher:
+    """后台投递线程，定期调用 flush"""
+
+    def __init__(self, outbox: NotificationOutbox, notifier=None, interval: float = 5):
+        """
+        初始化后台投递
+
+        Args:
+            outbox: 发件箱
+            notifier: PushPlusNotifier 实例
+            interval: 检查间隔（秒）
+        """
+        self.outbox = outbox
+        self.notifier = notifier
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='notification-outbox', daemon=True)
+
+    def start(self) -> 'OutboxFlusher':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.outbox.flush(self.notifier)
+            except Exception as e:
+                print(f"⚠️  后台投递通知失败: {e}")
+
+
+_default_outbox: Optional[NotificationOutbox] = None
+_default_flusher: Optional[OutboxFlusher] = None
+_default_lock = threading.Lock()
+
+
+def get_outbox() -> Optional[NotificationOutbox]:
+    """进程内共享的发件箱（首次调用时启动后台投递线程），配置关闭时返回 None"""
+    global _default_outbox, _default_flusher
+    with _default_lock:
+        if _default_outbox is None:
+            _default_outbox = NotificationOutbox.from_config()
+            if _default_outbox is not None:
+                _default_flusher = OutboxFlusher(_default_outbox).start()
+                atexit.register(_default_flusher.stop)
+        return _default_outbox
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='通知发件箱')
+    parser.add_argument('command', choices=['flush', 'status'], help='flush: 投递待发通知；status: 查看待发数量')
+    parser.add_argument('--force', action='store_true', help='忽略合并窗口和重试等待，立即投递')
+    args = parser.parse_args()
+
+    outbox = NotificationOutbox.from_config() or NotificationOutbox()
+    if args.command == 'status':
+        print(f"📮 待投递通知: {outbox.pending_count()} 条")
+        return
+
+    sent = outbox.flush(force=args.force)
+    print(f"📮 已投递 {sent} 条通知，剩余 {outbox.pending_count()} 条")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""
+提示词组装工具
+估算 Token 数，精简上下文数据，并按角色预算裁剪各段内容
+"""
+import re
+import json
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# 中日韩字符大约 1 字 1 token，其余字符大约 4 字符 1 token
+_CJK_PATTERN = re.compile(r'[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]')
+
+# 提示词中需要的项目配置字段，模型、通知、数据库等运维配置与任务规划无关
+PROMPT_CONFIG_KEYS = (
+    'projectName',
+    'projectDescription',
+    'currentStatus',
+    'gameFeaturePriority',
+    'qualityRules',
+    'taskGeneration'
+)
+
+# 任务在提示词中保留的字段
+PROMPT_TASK_FIELDS = ('id', 'title', 'type', 'priority', 'status', 'dependencies')
+
+# 视为未完成的任务状态
+OPEN_STATUSES = ('pending', 'created', 'in-progress')
+
+TRUNCATED_MARK = '…（已截断）'
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算文本的 Token 数
+
+    Args:
+        text: 文本
+
+    Returns:
+        估算的 Token 数
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def compact_json(data: Any) -> str:
+    """无缩进、无多余空格的 JSON，保留中文原文"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def strip_fields(data: Any, fields: Tuple[str, ...]) -> Any:
+    """递归去掉指定字段（如抓取时间、原始 HTML）"""
+    if isinstance(data, dict):
+        return {k: strip_fields(v, fields) for k, v in data.items() if k not in fields}
+    if isinstance(data, list):
+        return [strip_fields(item, fields) for item in data]
+    return data
+
+
+def select_config(config: Dict) -> Dict:
+    """只保留与任务规划相关的项目配置"""
+    return {k: config[k] for k in PROMPT_CONFIG_KEYS if k in config}
+
+
+def summarize_task_pool(task_data: Dict, max_open_tasks: int = 30) -> Dict:
+    """
+    把任务池压缩为固定大小的摘要
+
+    已完成和超出上限的未完成任务只计入统计，最近的未完成任务保留精简字段
+
+    Args:
+        task_data: task-pool.json 内容
+        max_open_tasks: 最多列出的未完成任务数
+
+    Returns:
+        任务池摘要
+    """
+    tasks = task_data.get('taskPool', [])
+    completed = task_data.get('completedTasks', [])
+
+    open_tasks = [t for t in tasks if t.get('status') in OPEN_STATUSES]
+    open_tasks.sort(key=lambda t: t.get('createdAt') or '')
+    recent_open = open_tasks[-max_open_tasks:] if max_open_tasks > 0 else []
+
+    done = [t for t in tasks if t.get('status') == 'completed'] + completed
+
+    return {
+        'statusCounts': dict(Counter(t.get('status', 'unknown') for t in tasks)),
+        'openByType': dict(Counter(t.get('type', 'unknown') for t in open_tasks)),
+        'completed': {
+            'count': len(done),
+            'byType': dict(Counter(t.get('type', 'unknown') for t in done)),
+            'recentTitles': [t.get('title', '') for t in done[-10:]]
+        },
+        'omittedOpenTasks': len(open_tasks) - len(recent_open),
+        'recentOpenTasks': [
+            {k: t[k] for k in PROMPT_TASK_FIELDS if k in t}
+            for t in recent_open
+        ]
+    }
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    把文本截断到不超过指定 Token 数
+
+    Args:
+        text: 文本
+        max_tokens: Token 上限
+
+    Returns:
+        截断后的文本（被截断时末尾带标记）
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= estimate_tokens(TRUNCATED_MARK):
+        return ''
+
+    # 二分查找能放下的最长前缀
+    budget = max_tokens - estimate_tokens(TRUNCATED_MARK)
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low] + TRUNCATED_MARK
+
+
+class PromptBuilder:
+    """按优先级把多段上下文装入 Token 预算"""
+
+    def __init__(self, max_tokens: int = 12000):
+        """
+        初始化提示词组装器
+
+        Args:
+            max_tokens: 整个提示词的 Token 预算
+        """
+        self.max_tokens = max_tokens
+        self.sections: List[Tuple[int, int, str, str]] = []
+
+    @classmethod
+    def from_config(cls, budget_config: Optional[Dict]) -> 'PromptBuilder':
+        """根据 aiModelConfig.<role>.promptBudget 创建"""
+        return cls((budget_config or {}).get('maxTokens', 12000))
+
+    def add_section(self, title: str, content: Any, priority: int = 0):
+        """
+        添加一段上下文
+
+        Args:
+            title: 段落标题
+            content: 字符串或可序列化为 JSON 的数据
+            priority: 优先级，数值越小越先分配预算
+        """
+        if not isinstance(content, str):
+            content = compact_json(content)
+        self.sections.append((priority, len(self.sections), title, content))
+
+    def render(self, instructions: str = '') -> str:
+        """
+        渲染所有段落，预算不足时依优先级截断靠后的段落
+
+        Args:
+            instructions: 固定的指令文本，仅用于预留其 Token 数
+
+        Returns:
+            渲染后的上下文文本
+        """
+        remaining = self.max_tokens - estimate_tokens(instructions)
+        rendered: Dict[int, str] = {}
+
+        for priority, order, title, content in sorted(self.sections):
+            header = f"**{title}：**\n"
+            available = remaining - estimate_tokens(header) - 1
+            body = truncate_to_tokens(content, max(0, available))
+            if not body:
+                body = '（超出预算，已省略）'
+            block = header + body
+            rendered[order] = block
+            remaining -= estimate_tokens(block) + 1
+
+        text = '\n\n'.join(rendered[i] for i in sorted(rendered))
+        total = estimate_tokens(text) + estimate_tokens(instructions)
+        print(f"📏 提示词约 {total} tokens（预算 {self.max_tokens}）")
+        return text
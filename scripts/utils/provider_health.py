@@ -0,0 +1,252 @@
+"""
+AI 提供方健康度统计
+按模型记录最近调用的延迟和成败，跨进程持久化，用于对冲延迟计算和主备排序；
+并提供同样持久化的熔断器，模型连续失败后其他进程也会直接跳过
+"""
+import math
+import time
+from typing import Optional, Dict, List
+
+try:
+    from scripts.utils.state_file import locked_json, read_json
+except ImportError:  # 直接运行本文件时
+    from state_file import locked_json, read_json
+
+DEFAULT_STATE_FILE = '.cache/ai-provider-health.json'
+
+
+class ProviderHealth:
+    """提供方滚动统计类"""
+
+    def __init__(
+        self,
+        state_file: str = DEFAULT_STATE_FILE,
+        window: int = 50,
+        max_age_hours: float = 72
+    ):
+        """
+        初始化健康度统计
+
+        Args:
+            state_file: 状态文件路径
+            window: 每个模型保留的最近样本数
+            max_age_hours: 样本最长保留时间（小时）
+        """
+        self.state_file = state_file
+        self.window = window
+        self.max_age = max_age_hours * 3600
+
+    def record(self, model: str, latency: float, ok: bool):
+        """
+        记录一次调用结果
+
+        Args:
+            model: 模型名称
+            latency: 耗时（秒）
+            ok: 是否成功
+        """
+        now = time.time()
+        try:
+            with locked_json(self.state_file) as state:
+                samples = state.setdefault('models', {}).setdefault(model, [])
+                samples.append([round(now, 3), round(latency, 3), 1 if ok else 0])
+                fresh = [s for s in samples if now - s[0] <= self.max_age]
+                state['models'][model] = fresh[-self.window:]
+        except OSError as e:
+            print(f"⚠️  记录提供方统计失败: {e}")
+
+    def _samples(self, model: str) -> List[list]:
+        """读取仍在有效期内的样本"""
+        now = time.time()
+        state = read_json(self.state_file)
+        return [s for s in state.get('models', {}).get(model, []) if now - s[0] <= self.max_age]
+
+    def snapshot(self, model: str) -> Dict:
+        """
+        获取模型的统计快照
+
+        Returns:
+            包含 samples、errorRate、p50、p95 的字典，无成功样本时延迟为 None
+        """
+        samples = self._samples(model)
+        latencies = sorted(s[1] for s in samples if s[2])
+        errors = sum(1 for s in samples if not s[2])
+
+        return {
+            'samples': len(samples),
+            'errorRate': errors / len(samples) if samples else 0.0,
+            'p50': _percentile(latencies, 0.5),
+            'p95': _percentile(latencies, 0.95)
+        }
+
+    def latency_percentile(self, model: str, percentile: float) -> Optional[float]:
+        """成功调用的延迟分位数（秒），无样本时返回 None"""
+        latencies = sorted(s[1] for s in self._samples(model) if s[2])
+        return _percentile(latencies, percentile)
+
+    def rank(self, models: List[str], min_samples: int = 5, max_error_rate: float = 0.5) -> List[str]:
+        """
+        按健康度对模型排序：健康的优先，其次按 p50 延迟从低到高
+
+        只有所有模型样本都充足时才按延迟排序，避免冷启动时来回切换
+
+        Args:
+            models: 按配置顺序排列的模型名称
+            min_samples: 参与排序所需的最少样本数
+            max_error_rate: 超过该错误率视为不健康
+
+        Returns:
+            排序后的模型名称
+        """
+        snapshots = {m: self.snapshot(m) for m in models}
+        all_sampled = all(snapshots[m]['samples'] >= min_samples for m in models)
+
+        def score(item):
+            index, model = item
+            snap = snapshots[model]
+            unhealthy = snap['samples'] >= min_samples and snap['errorRate'] > max_error_rate
+            if not all_sampled or snap['p50'] is None:
+                return (unhealthy, float('inf') if all_sampled else index, index)
+            return (unhealthy, snap['p50'], index)
+
+        return [model for _, model in sorted(enumerate(models), key=score)]
+
+
+class CircuitBreaker:
+    """
+    跨进程共享的熔断器
+
+    状态流转：closed --连续失败达到阈值--> open --冷却结束--> half_open（仅放行一个探测请求）
+    探测成功回到 closed，失败则重新 open 且冷却时间翻倍
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+        self,
+        state_file: str = DEFAULT_STATE_FILE,
+        failure_threshold: int = 3,
+        cooldown: float = 60,
+        max_cooldown: float = 900,
+        probe_timeout: float = 120
+    ):
+        """
+        初始化熔断器
+
+        Args:
+            state_file: 状态文件路径（与 ProviderHealth 共用）
+            failure_threshold: 连续失败多少次后熔断
+            cooldown: 首次熔断的冷却时间（秒）
+            max_cooldown: 冷却时间上限（秒）
+            probe_timeout: 半开探测的占用时间（秒），超时后允许其他进程重新探测
+        """
+        self.state_file = state_file
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.probe_timeout = probe_timeout
+
+    @classmethod
+    def from_config(cls, breaker_config: Dict, state_file: str = DEFAULT_STATE_FILE) -> Optional['CircuitBreaker']:
+        """
+        根据 aiModelConfig.<role>.circuitBreaker 创建熔断器，显式关闭时返回 None
+
+        时间相关配置单位为毫秒，与 retryDelay 保持一致
+        """
+        breaker_config = breaker_config or {}
+        if not breaker_config.get('enabled', True):
+            return None
+
+        return cls(
+            state_file=state_file,
+            failure_threshold=breaker_config.get('failureThreshold', 3),
+            cooldown=breaker_config.get('cooldown', 60000) / 1000,
+            max_cooldown=breaker_config.get('maxCooldown', 900000) / 1000,
+            probe_timeout=breaker_config.get('probeTimeout', 120000) / 1000
+        )
+
+    def state(self, model: str) -> str:
+        """当前熔断状态（只读，不触发状态迁移）"""
+        circuit = read_json(self.state_file).get('circuits', {}).get(model, {})
+        if circuit.get('state') == self.OPEN and time.time() >= circuit.get('openUntil', 0):
+            return self.HALF_OPEN
+        return circuit.get('state', self.CLOSED)
+
+    def allow(self, model: str) -> bool:
+        """
+        是否允许调用该模型
+
+        open 状态直接拒绝；冷却结束后只有抢到探测权的进程会被放行
+        """
+        circuit = read_json(self.state_file).get('circuits', {}).get(model, {})
+        if circuit.get('state', self.CLOSED) == self.CLOSED:
+            return True
+
+        now = time.time()
+        if circuit.get('state') == self.OPEN and now < circuit.get('openUntil', 0):
+            return False
+
+        # 冷却结束或处于半开状态，加锁争抢探测权
+        with locked_json(self.state_file) as state:
+            circuit = state.setdefault('circuits', {}).setdefault(model, {})
+            if circuit.get('state', self.CLOSED) == self.CLOSED:
+                return True
+            if circuit.get('state') == self.OPEN and now < circuit.get('openUntil', 0):
+                return False
+            if circuit.get('state') == self.HALF_OPEN and now < circuit.get('probeUntil', 0):
+                return False
+
+            circuit['state'] = self.HALF_OPEN
+            circuit['probeUntil'] = now + self.probe_timeout
+            print(f"🔁 {model} 熔断冷却结束，放行一次探测请求")
+            return True
+
+    def record_success(self, model: str):
+        """记录成功，熔断器回到 closed"""
+        circuit = read_json(self.state_file).get('circuits', {}).get(model, {})
+        if circuit.get('state', self.CLOSED) == self.CLOSED and not circuit.get('failures'):
+            return
+
+        with locked_json(self.state_file) as state:
+            if state.setdefault('circuits', {}).get(model, {}).get('state') != self.CLOSED:
+                print(f"✅ {model} 已恢复，关闭熔断")
+            state['circuits'][model] = {'state': self.CLOSED, 'failures': 0, 'trips': 0}
+
+    def record_failure(self, model: str):
+        """记录失败，连续失败达到阈值或探测失败时打开熔断"""
+        now = time.time()
+        with locked_json(self.state_file) as state:
+            circuit = state.setdefault('circuits', {}).setdefault(model, {})
+            circuit['failures'] = circuit.get('failures', 0) + 1
+            if circuit.get('state') == self.OPEN:
+                return
+
+            if circuit.get('state') == self.HALF_OPEN or circuit['failures'] >= self.failure_threshold:
+                trips = circuit.get('trips', 0) + 1
+                cooldown = min(self.max_cooldown, self.cooldown * 2 ** (trips - 1))
+                circuit.update({
+                    'state': self.OPEN,
+                    'trips': trips,
+                    'openedAt': now,
+                    'openUntil': now + cooldown
+                })
+                print(f"🚫 {model} 连续失败 {circuit['failures']} 次，熔断 {cooldown:.0f} 秒")
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> Optional[float]:
+    """最近秩法计算分位数"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(percentile * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+if __name__ == '__main__':
+    # 打印当前统计
+    health = ProviderHealth()
+    state = read_json(health.state_file)
+    breaker = CircuitBreaker()
+    for model_name in state.get('models', {}):
+        print(f"{model_name}: {health.snapshot(model_name)}，熔断状态: {breaker.state(model_name)}")
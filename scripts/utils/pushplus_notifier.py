@@ -1,28 +1,81 @@
 """
 PushPlus 通知工具
 用于发送任务完成、错误等通知到微信
+配置了发件箱时 send_* 只把通知写入本地发件箱，由后台线程合并投递，调用方无需等待网络；
+实际发送前经过跨进程令牌桶限流，避免突发请求和超出每日额度被 PushPlus 拒绝
 """
 import os
 import json
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 from typing import Dict, Optional
 
+try:
+    from scripts.utils.notification_outbox import NotificationOutbox, get_outbox
+    from scripts.utils.rate_limiter import TokenBucketLimiter
+except ImportError:  # 直接运行本文件时
+    from notification_outbox import NotificationOutbox, get_outbox
+    from rate_limiter import TokenBucketLimiter
+
 PUSHPLUS_TOKEN = os.getenv('PUSHPLUS_TOKEN')
 PUSHPLUS_URL = "http://www.pushplus.plus/send"
 
+_http_session = None
+_session_lock = threading.Lock()
+
+
+def _get_http_session() -> requests.Session:
+    """获取进程内共享的 keep-alive HTTP 会话"""
+    global _http_session
+    
+    with _session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _http_session = session
+    return _http_session
+
 class PushPlusNotifier:
     """PushPlus 通知类"""
     
-    def __init__(self, token: str = None):
+    def __init__(
+        self,
+        token: str = None,
+        outbox: Optional[NotificationOutbox] = None,
+        limiter: Optional[TokenBucketLimiter] = None
+    ):
+        """
+        初始化通知器
+        
+        Args:
+            token: PushPlus Token
+            outbox: 通知发件箱，设置后 send_* 方法改为入箱异步投递
+            limiter: 发送限流器，默认按 notifications.rateLimit 配置创建
+        """
         self.token = token or PUSHPLUS_TOKEN
+        self.outbox = outbox
+        self.limiter = limiter if limiter is not None else TokenBucketLimiter.from_config()
+    
+    def _deliver(self, title: str, content: str, key: Optional[str] = None, event: Optional[str] = None) -> bool:
+        """有发件箱时入箱，否则立即发送"""
+        if self.outbox is None:
+            return self.send_notification(title, content)
+        
+        self.outbox.enqueue(title, content, key=key, event=event)
+        print(f"📮 通知已加入发件箱: {title}")
+        return True
         
     def send_notification(
         self, 
         title: str, 
         content: str, 
         template: str = "html",
-        channel: str = "wechat"
+        channel: str = "wechat",
+        max_wait: float = 10
     ) -> bool:
         """
         发送通知
@@ -32,6 +85,7 @@ class PushPlusNotifier:
             content: 通知内容（支持HTML）
             template: 模板类型（html/txt/json/markdown）
             channel: 发送渠道（wechat/mail/sms）
+            max_wait: 被限流时最多等待的秒数
         
         Returns:
             bool: 发送是否成功
@@ -40,6 +94,13 @@ class PushPlusNotifier:
             print("⚠️  PushPlus Token 未配置，跳过通知发送")
             return False
         
+        if self.limiter is not None and not self.limiter.acquire(max_wait):
+            if self.limiter.remaining_quota() == 0:
+                print(f"⛔ PushPlus 今日额度已用完，未发送: {title}")
+            else:
+                print(f"⏳ PushPlus 发送过于频繁，已限流: {title}")
+            return False
+        
         try:
             payload = {
                 "token": self.token,
@@ -49,7 +110,7 @@ class PushPlusNotifier:
                 "channel": channel
             }
             
-            response = requests.post(PUSHPLUS_URL, json=payload, timeout=10)
+            response = _get_http_session().post(PUSHPLUS_URL, json=payload, timeout=10)
             result = response.json()
             
             if result.get('code') == 200:
@@ -82,7 +143,7 @@ class PushPlusNotifier:
         <p>{task.get('description', 'N/A')}</p>
         """
         
-        return self.send_notification(title, content)
+        return self._deliver(title, content, key=f"task-created:{task.get('id')}", event='taskCreated')
     
     def send_task_completed(self, task: Dict, details: Dict) -> bool:
         """发送任务完成通知"""
@@ -124,7 +185,7 @@ class PushPlusNotifier:
         <p>Pull Request: <a href="{details.get('prUrl', '#')}">{details.get('prNumber', 'N/A')}</a></p>
         """
         
-        return self.send_notification(title, content)
+        return self._deliver(title, content, key=f"task-completed:{task.get('id')}", event='taskCompleted')
     
     def send_task_failed(self, task: Dict, error: str) -> bool:
         """发送任务失败通知"""
@@ -144,7 +205,7 @@ class PushPlusNotifier:
         <p><em>系统将在 5 秒后自动重试...</em></p>
         """
         
-        return self.send_notification(title, content)
+        return self._deliver(title, content, key=f"task-failed:{task.get('id')}", event='taskFailed')
     
     def send_pr_created(self, pr_info: Dict) -> bool:
         """发送 PR 创建通知"""
@@ -169,7 +230,7 @@ class PushPlusNotifier:
         <p><a href="{pr_info.get('url', '#')}">点击查看 Pull Request</a></p>
         """
         
-        return self.send_notification(title, content)
+        return self._deliver(title, content, key=f"pr-created:{pr_info.get('number')}", event='prCreated')
     
     def send_test_result(self, test_result: Dict) -> bool:
         """发送测试结果通知"""
@@ -204,7 +265,7 @@ class PushPlusNotifier:
             <pre style="background: #f6f8fa; padding: 10px; border-radius: 5px;">{test_result.get('errors', 'N/A')}</pre>
             """
         
-        return self.send_notification(title, content)
+        return self._deliver(title, content, key=f"test-result:{test_result.get('name')}:{passed}", event='testPassed' if passed else 'testFailed')
     
     def send_daily_report(self, report: Dict) -> bool:
         """发送每日报告通知"""
@@ -241,43 +302,43 @@ class PushPlusNotifier:
         <p>{report.get('gameResearch', '今日未爬取游戏资讯')}</p>
         """
         
-        return self.send_notification(title, content)
+        return self._deliver(title, content, key=f"daily-report:{datetime.now().strftime('%Y-%m-%d')}", event='dailyReport')
 
 
-# 便捷函数
+# 便捷函数（通过发件箱异步投递）
 def notify_task_created(task: Dict) -> bool:
     """快捷发送任务创建通知"""
-    notifier = PushPlusNotifier()
+    notifier = PushPlusNotifier(outbox=get_outbox())
     return notifier.send_task_created(task)
 
 
 def notify_task_completed(task: Dict, details: Dict) -> bool:
     """快捷发送任务完成通知"""
-    notifier = PushPlusNotifier()
+    notifier = PushPlusNotifier(outbox=get_outbox())
     return notifier.send_task_completed(task, details)
 
 
 def notify_task_failed(task: Dict, error: str) -> bool:
     """快捷发送任务失败通知"""
-    notifier = PushPlusNotifier()
+    notifier = PushPlusNotifier(outbox=get_outbox())
     return notifier.send_task_failed(task, error)
 
 
 def notify_pr_created(pr_info: Dict) -> bool:
     """快捷发送 PR 创建通知"""
-    notifier = PushPlusNotifier()
+    notifier = PushPlusNotifier(outbox=get_outbox())
     return notifier.send_pr_created(pr_info)
 
 
 def notify_test_result(test_result: Dict) -> bool:
     """快捷发送测试结果通知"""
-    notifier = PushPlusNotifier()
+    notifier = PushPlusNotifier(outbox=get_outbox())
     return notifier.send_test_result(test_result)
 
 
 def notify_daily_report(report: Dict) -> bool:
     """快捷发送每日报告通知"""
-    notifier = PushPlusNotifier()
+    notifier = PushPlusNotifier(outbox=get_outbox())
     return notifier.send_daily_report(report)
 
 
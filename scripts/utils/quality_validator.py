@@ -0,0 +1,258 @@
+"""
+生成代码质量验证
+一次遍历目录收集源文件，按块读取字节统计非空行并检查 qualityRules.disallowedPatterns，
+文件较多时分发到进程池；单文件结果按内容哈希缓存，小改动后重新验证只分析变化的文件
+"""
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    from scripts.utils.state_file import read_json, write_json_atomic
+except ImportError:  # 直接运行本文件时
+    from state_file import read_json, write_json_atomic
+
+CONFIG_PATH = 'ai-orchestrator/project-config.json'
+# 按被验证目录的顶层目录（backend / frontend）分别缓存，交替验证时互不覆盖
+CACHE_PATH = '.cache/quality-cache-{name}.json'
+
+DEFAULT_MIN_LINES = 200
+DEFAULT_MAX_LINES = 2000
+
+READ_CHUNK_BYTES = 1024 * 1024
+# 每个文件最多记录的违规次数
+MAX_HITS_PER_FILE = 20
+# 待分析文件少于该数量时在当前进程中处理，省去进程池启动开销
+PARALLEL_THRESHOLD = 8
+
+SKIP_DIRS = {'node_modules', '__pycache__', '.git'}
+
+
+def analyze_file(path: str, patterns: Sequence[str]) -> Dict:
+    """
+    按块读取文件，一遍算出内容哈希、非空行数和违规模式位置
+
+    Returns:
+        {'sha256', 'lines', 'hits': [{'line', 'pattern'}]}
+    """
+    digest = hashlib.sha256()
+    encoded = [(p, p.encode('utf-8')) for p in patterns]
+    lines = 0
+    hits = []
+    line_number = 0
+    carry = b''
+
+    def scan(block: bytes, final: bool) -> bytes:
+        nonlocal lines, line_number
+        parts = block.split(b'\n')
+        rest = b'' if final else parts.pop()
+        # 整块都不含违规模式时只数行
+        present = [(p, raw) for p, raw in encoded if raw in block] if len(hits) < MAX_HITS_PER_FILE else []
+        for part in parts:
+            line_number += 1
+            if part.strip():
+                lines += 1
+            for pattern, raw in present:
+                if raw in part and len(hits) < MAX_HITS_PER_FILE:
+                    hits.append({'line': line_number, 'pattern': pattern})
+        return rest
+
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            digest.update(chunk)
+            carry = scan(carry + chunk, final=False)
+    if carry:
+        scan(carry, final=True)
+
+    return {'sha256': digest.hexdigest(), 'lines': lines, 'hits': hits}
+
+
+def _analyze_batch(paths: List[str], patterns: Sequence[str]) -> List[Tuple[str, Optional[Dict], Optional[str]]]:
+    """进程池任务：分析一批文件，读取失败的记录错误"""
+    results = []
+    for path in paths:
+        try:
+            results.append((path, analyze_file(path, patterns), None))
+        except OSError as e:
+            results.append((path, None, str(e)))
+    return results
+
+
+class QualityValidator:
+    """代码质量验证类"""
+
+    def __init__(
+        self,
+        extensions: Sequence[str],
+        min_lines: int = DEFAULT_MIN_LINES,
+        max_lines: int = DEFAULT_MAX_LINES,
+        disallowed_patterns: Sequence[str] = (),
+        cache_path: str = CACHE_PATH,
+        max_workers: Optional[int] = None
+    ):
+        """
+        初始化验证器
+
+        Args:
+            extensions: 参与验证的扩展名（如 ('.java',)）
+            min_lines: 最少非空行数
+            max_lines: 最多非空行数（超出只警告）
+            disallowed_patterns: 不允许出现的文本
+            cache_path: 结果缓存文件路径，{name} 替换为被验证目录的顶层目录名，None 表示不缓存
+            max_workers: 进程池大小，默认 CPU 核数
+        """
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.min_lines = min_lines
+        self.max_lines = max_lines
+        self.patterns = list(disallowed_patterns)
+        self.cache_path = cache_path
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    @classmethod
+    def from_config(cls, extensions: Sequence[str], config_path: str = CONFIG_PATH) -> 'QualityValidator':
+        """根据 qualityRules 配置创建"""
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                rules = json.load(f).get('qualityRules', {})
+        except (OSError, ValueError):
+            rules = {}
+
+        return cls(
+            extensions,
+            min_lines=rules.get('minCodeLinesPerTask', DEFAULT_MIN_LINES),
+            max_lines=rules.get('maxCodeLinesPerTask', DEFAULT_MAX_LINES),
+            disallowed_patterns=rules.get('disallowedPatterns', [])
+        )
+
+    def collect_files(self, root: str) -> List[str]:
+        """一次遍历收集目标扩展名的文件"""
+        files = []
+        stack = [root]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            stack.append(entry.path)
+                    elif entry.is_file() and entry.name.lower().endswith(self.extensions):
+                        files.append(entry.path)
+        return sorted(files)
+
+    def _cache_file(self, root: str) -> Optional[str]:
+        """被验证目录对应的缓存文件"""
+        if not self.cache_path:
+            return None
+        parts = [p for p in os.path.normpath(root).split(os.sep) if p not in ('', '.', '..')]
+        return self.cache_path.replace('{name}', parts[0] if parts else 'default')
+
+    def _rules_key(self) -> str:
+        """规则变化时缓存的违规结果失效"""
+        return hashlib.sha256('\n'.join(self.patterns).encode('utf-8')).hexdigest()[:16]
+
+    def _analyze(self, paths: List[str]) -> List[Tuple[str, Optional[Dict], Optional[str]]]:
+        if len(paths) < PARALLEL_THRESHOLD or self.max_workers == 1:
+            return _analyze_batch(paths, self.patterns)
+
+        # 按批提交，减少进程间传输次数
+        batch_size = max(1, len(paths) // (self.max_workers * 4))
+        batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+            return [result for results in executor.map(_analyze_batch, batches, [self.patterns] * len(batches))
+                    for result in results]
+
+    def validate(self, root: str) -> Dict:
+        """
+        验证目录下的代码
+
+        Returns:
+            {'passed', 'total_lines', 'files': {路径: 结果}, 'errors': [...], 'warnings': [...], 'analyzed', 'cached'}
+        """
+        paths = self.collect_files(root)
+        cache_file = self._cache_file(root)
+        cache = read_json(cache_file) if cache_file else {}
+        if cache.get('rules') != self._rules_key():
+            cache = {}
+        by_path = cache.get('files', {})
+        by_hash = cache.get('results', {})
+
+        # 大小和修改时间都没变的文件直接用缓存，其余重新分析
+        results: Dict[str, Dict] = {}
+        pending = []
+        stats = {}
+        for path in paths:
+            st = os.stat(path)
+            stats[path] = [st.st_size, st.st_mtime_ns]
+            cached = by_path.get(path)
+            if cached and cached['stat'] == stats[path] and cached['sha256'] in by_hash:
+                results[path] = dict(by_hash[cached['sha256']], sha256=cached['sha256'])
+            else:
+                pending.append(path)
+
+        errors = []
+        for path, result, error in self._analyze(pending):
+            if result is None:
+                errors.append(f"无法读取 {path}: {error}")
+                continue
+            results[path] = result
+
+        total_lines = sum(r['lines'] for r in results.values())
+        if total_lines < self.min_lines:
+            errors.append(f"代码行数不足 {self.min_lines} 行")
+        for path, result in results.items():
+            for hit in result['hits']:
+                errors.append(f"{path}:{hit['line']} 包含不允许的内容: {hit['pattern']}")
+
+        warnings = []
+        if total_lines > self.max_lines:
+            warnings.append(f"代码行数超过 {self.max_lines} 行，建议拆分任务")
+
+        if cache_file:
+            write_json_atomic(cache_file, {
+                'rules': self._rules_key(),
+                'files': {p: {'stat': stats[p], 'sha256': r['sha256']} for p, r in results.items()},
+                'results': {r['sha256']: {'lines': r['lines'], 'hits': r['hits']} for r in results.values()}
+            }, indent=None)
+
+        return {
+            'passed': not errors,
+            'total_lines': total_lines,
+            'files': results,
+            'errors': errors,
+            'warnings': warnings,
+            'analyzed': len(pending),
+            'cached': len(paths) - len(pending)
+        }
+
+
+def run_validation(generated_dir: str, extensions: Sequence[str], label: str = '') -> int:
+    """
+    验证生成目录并打印报告，供 backend / frontend 的 validate_quality.py 调用
+
+    Returns:
+        退出码：0 通过，1 未通过
+    """
+    if not os.path.exists(generated_dir):
+        print(f"⚠️  生成目录不存在: {generated_dir}")
+        print("跳过质量验证")
+        return 0
+
+    report = QualityValidator.from_config(extensions).validate(generated_dir)
+
+    for path, result in report['files'].items():
+        print(f"  {path}: {result['lines']} 行")
+    print(f"\n📊 总代码行数: {report['total_lines']}（分析 {report['analyzed']} 个文件，缓存 {report['cached']} 个）")
+
+    for warning in report['warnings']:
+        print(f"⚠️  {warning}")
+    if not report['passed']:
+        for error in report['errors']:
+            print(f"❌ {error}")
+        return 1
+
+    print(f"✅ {label}代码质量验证通过")
+    return 0
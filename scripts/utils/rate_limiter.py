@@ -0,0 +1,156 @@
+"""
+跨进程令牌桶限流
+令牌桶状态和每日配额用量保存在本地状态文件中，同一主机上的所有进程共享；
+用于 PushPlus 等有突发和每日上限的接口
+"""
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+try:
+    from scripts.utils.state_file import locked_json, read_json
+except ImportError:  # 直接运行本文件时
+    from state_file import locked_json, read_json
+
+CONFIG_PATH = 'ai-orchestrator/project-config.json'
+DEFAULT_STATE_FILE = '.cache/notifications/rate-limit.json'
+
+# PushPlus 按北京时间零点重置每日额度
+QUOTA_TIMEZONE = timezone(timedelta(hours=8))
+
+
+class TokenBucketLimiter:
+    """令牌桶限流类"""
+
+    def __init__(
+        self,
+        state_file: str = DEFAULT_STATE_FILE,
+        rate_per_minute: float = 10,
+        burst: int = 5,
+        daily_quota: int = 200,
+        low_budget_ratio: float = 0.2
+    ):
+        """
+        初始化限流器
+
+        Args:
+            state_file: 状态文件路径
+            rate_per_minute: 每分钟补充的令牌数
+            burst: 桶容量（允许的最大突发请求数）
+            daily_quota: 每日请求上限，0 表示不限
+            low_budget_ratio: 剩余额度低于该比例时视为额度紧张
+        """
+        self.state_file = state_file
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.daily_quota = daily_quota
+        self.low_budget_ratio = low_budget_ratio
+
+    @classmethod
+    def from_config(cls, config_path: str = CONFIG_PATH) -> Optional['TokenBucketLimiter']:
+        """根据 notifications.rateLimit 配置创建，显式关闭时返回 None"""
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                limit_config = json.load(f).get('notifications', {}).get('rateLimit', {})
+        except (OSError, ValueError):
+            limit_config = {}
+
+        if not limit_config.get('enabled', True):
+            return None
+
+        return cls(
+            state_file=limit_config.get('stateFile', DEFAULT_STATE_FILE),
+            rate_per_minute=limit_config.get('ratePerMinute', 10),
+            burst=limit_config.get('burst', 5),
+            daily_quota=limit_config.get('dailyQuota', 200),
+            low_budget_ratio=limit_config.get('lowBudgetRatio', 0.2)
+        )
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(QUOTA_TIMEZONE).strftime('%Y-%m-%d')
+
+    def _refill(self, state: dict, now: float) -> dict:
+        """按流逝时间补充令牌，跨天时重置每日用量"""
+        tokens = state.get('tokens', self.burst)
+        updated = state.get('updatedAt', now)
+        state['tokens'] = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+        state['updatedAt'] = now
+
+        today = self._today()
+        if state.get('date') != today:
+            state['date'] = today
+            state['used'] = 0
+        return state
+
+    def _wait_time(self, state: dict) -> Optional[float]:
+        """获得一个令牌还需等待的秒数，今日额度用尽时返回 None"""
+        if self.daily_quota and state.get('used', 0) >= self.daily_quota:
+            return None
+        if state['tokens'] >= 1:
+            return 0.0
+        return (1 - state['tokens']) / self.rate if self.rate > 0 else None
+
+    def peek(self) -> Optional[float]:
+        """
+        不消耗令牌，查询还需等待多少秒
+
+        Returns:
+            等待秒数（0 表示可立即发送），今日额度用尽时返回 None
+        """
+        state = self._refill(read_json(self.state_file), time.time())
+        return self._wait_time(state)
+
+    def try_acquire(self) -> Tuple[bool, Optional[float]]:
+        """
+        尝试消耗一个令牌
+
+        Returns:
+            (是否获得令牌, 未获得时还需等待的秒数；今日额度用尽时为 None)
+        """
+        with locked_json(self.state_file) as state:
+            self._refill(state, time.time())
+            wait = self._wait_time(state)
+            if wait != 0:
+                return False, wait
+            state['tokens'] -= 1
+            state['used'] = state.get('used', 0) + 1
+            return True, 0.0
+
+    def acquire(self, max_wait: float = 10) -> bool:
+        """
+        获取一个令牌，必要时等待
+
+        Args:
+            max_wait: 最长等待时间（秒）
+
+        Returns:
+            是否获得令牌
+        """
+        deadline = time.time() + max_wait
+        while True:
+            acquired, wait = self.try_acquire()
+            if acquired:
+                return True
+            if wait is None or time.time() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def remaining_quota(self) -> Optional[int]:
+        """今日剩余额度，不限额时返回 None"""
+        if not self.daily_quota:
+            return None
+        state = self._refill(read_json(self.state_file), time.time())
+        return max(0, self.daily_quota - state.get('used', 0))
+
+    def is_low(self) -> bool:
+        """今日剩余额度是否已低于阈值"""
+        remaining = self.remaining_quota()
+        return remaining is not None and remaining <= self.daily_quota * self.low_budget_ratio
+
+
+if __name__ == '__main__':
+    # 打印 PushPlus 限流状态
+    limiter = TokenBucketLimiter.from_config() or TokenBucketLimiter()
+    print(f"今日剩余额度: {limiter.remaining_quota()}，额度紧张: {limiter.is_low()}，下次可发送等待: {limiter.peek()}")
@@ -0,0 +1,125 @@
+"""
+本地状态文件工具
+提供跨进程加锁的 JSON 读写和原子写入（写临时文件后 rename）
+"""
+import os
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows 等不支持 fcntl 的平台
+    fcntl = None
+
+
+def read_json(path: str, default: Callable[[], Any] = dict) -> Any:
+    """
+    读取 JSON 文件，不存在或损坏时返回默认值
+
+    Args:
+        path: 文件路径
+        default: 生成默认值的函数
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default()
+
+
+def write_json_atomic(path: str, data: Any, indent: int = 2):
+    """
+    原子写入 JSON：先写同目录临时文件再 rename，读者不会看到半写的文件
+
+    Args:
+        path: 文件路径
+        data: 要写入的数据
+        indent: 缩进，None 表示紧凑格式
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+@contextmanager
+def file_lock(path: str, timeout: float = 30) -> Iterator[None]:
+    """
+    跨进程互斥锁，锁住 `<path>.lock` 旁路文件
+
+    有 fcntl 时使用 flock（进程退出自动释放）；否则退化为 O_EXCL 创建锁文件
+
+    Args:
+        path: 被保护的文件路径
+        timeout: O_EXCL 模式下的最长等待时间（秒）
+    """
+    lock_path = f"{path}.lock"
+    directory = os.path.dirname(lock_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    if fcntl:
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        return
+
+    deadline = time.time() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            break
+        except FileExistsError:
+            # 持有者异常退出留下的锁文件，超时后强制清理
+            try:
+                if time.time() - os.path.getmtime(lock_path) > timeout:
+                    os.remove(lock_path)
+                    continue
+            except OSError:
+                continue
+            if time.time() > deadline:
+                raise TimeoutError(f"等待文件锁超时: {lock_path}")
+            time.sleep(0.01)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass
+
+
+@contextmanager
+def locked_json(path: str, default: Callable[[], Any] = dict) -> Iterator[Dict]:
+    """
+    加锁读取 JSON 状态，with 块正常结束后原子写回
+
+    Args:
+        path: 状态文件路径
+        default: 文件不存在时的默认值工厂
+
+    Example:
+        with locked_json('.cache/state.json') as state:
+            state['count'] = state.get('count', 0) + 1
+    """
+    with file_lock(path):
+        data = read_json(path, default)
+        yield data
+        write_json_atomic(path, data, indent=None)
@@ -0,0 +1,330 @@
+"""
+任务存储
+基于嵌入式 SQLite 的任务池索引，支持按状态、类型、负责人、创建时间快速查询和单任务事务更新，
+并与仓库中提交的 ai-orchestrator/task-pool.json 双向同步
+"""
+import os
+import json
+import sqlite3
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    from scripts.utils.state_file import write_json_atomic
+except ImportError:  # 直接运行本文件时
+    from state_file import write_json_atomic
+
+TASK_POOL_PATH = 'ai-orchestrator/task-pool.json'
+DEFAULT_DB_PATH = '.cache/task-pool.db'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL,
+    status TEXT,
+    type TEXT,
+    assigned_to TEXT,
+    created_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_id ON tasks(id);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+CREATE INDEX IF NOT EXISTS idx_tasks_type ON tasks(type);
+CREATE INDEX IF NOT EXISTS idx_tasks_assigned_to ON tasks(assigned_to);
+CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at);
+CREATE TABLE IF NOT EXISTS completed_tasks (
+    seq INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class TaskStore:
+    """任务存储类"""
+
+    def __init__(self, json_path: str = TASK_POOL_PATH, db_path: str = DEFAULT_DB_PATH):
+        """
+        打开任务存储，JSON 文件有变化时自动重新导入
+
+        Args:
+            json_path: task-pool.json 路径（仓库中的权威数据）
+            db_path: SQLite 索引文件路径
+        """
+        self.json_path = json_path
+        self.db_path = db_path
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(_SCHEMA)
+        self.sync_from_json()
+
+    def __enter__(self) -> 'TaskStore':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    # ------------------------------------------------------------------
+    # JSON 同步
+    # ------------------------------------------------------------------
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    def _json_signature(self) -> Optional[str]:
+        """JSON 文件的大小和修改时间，用于快速判断是否需要计算哈希"""
+        try:
+            st = os.stat(self.json_path)
+        except OSError:
+            return None
+        return f"{st.st_size}:{st.st_mtime_ns}"
+
+    def sync_from_json(self, force: bool = False) -> bool:
+        """
+        JSON 文件内容与上次导入/导出不一致时重新导入
+
+        Args:
+            force: 是否强制重新导入
+
+        Returns:
+            是否执行了导入
+        """
+        signature = self._json_signature()
+        if signature is None:
+            return False
+        if not force and signature == self._get_meta('json_signature'):
+            return False
+
+        with open(self.json_path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+
+        with self.conn:
+            if force or digest != self._get_meta('json_sha256'):
+                self._import(json.loads(raw.decode('utf-8')))
+                print(f"📥 任务池已导入 SQLite 索引: {self.count()} 个任务")
+            self._set_meta('json_sha256', digest)
+            self._set_meta('json_signature', signature)
+        return True
+
+    def import_json(self, data: Dict):
+        """
+        用 task-pool.json 格式的数据替换存储内容
+
+        Args:
+            data: 包含 taskPool、completedTasks 等字段的字典
+        """
+        with self.conn:
+            self._import(data)
+
+    def _import(self, data: Dict):
+        """在当前事务内替换全部数据"""
+        self.conn.execute('DELETE FROM tasks')
+        self.conn.execute('DELETE FROM completed_tasks')
+        self.conn.executemany(
+            'INSERT INTO tasks (seq, id, status, type, assigned_to, created_at, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (self._row_values(task, seq) for seq, task in enumerate(data.get('taskPool', [])))
+        )
+        self.conn.executemany(
+            'INSERT INTO completed_tasks (seq, data) VALUES (?, ?)',
+            ((seq, json.dumps(task, ensure_ascii=False)) for seq, task in enumerate(data.get('completedTasks', [])))
+        )
+
+        # 其余顶层字段（taskGenerationRules、taskTemplate 等）原样保存
+        extras = {k: v for k, v in data.items() if k not in ('taskPool', 'completedTasks')}
+        self._set_meta('extras', json.dumps(extras, ensure_ascii=False))
+        self._set_meta('key_order', json.dumps(list(data.keys())))
+
+    @staticmethod
+    def _row_values(task: Dict, seq: int) -> tuple:
+        return (
+            seq,
+            str(task.get('id', '')),
+            task.get('status'),
+            task.get('type'),
+            task.get('assignedTo'),
+            task.get('createdAt'),
+            json.dumps(task, ensure_ascii=False)
+        )
+
+    def export_data(self) -> Dict:
+        """导出为 task-pool.json 格式的字典，保持原有字段顺序"""
+        extras = json.loads(self._get_meta('extras') or '{}')
+        key_order = json.loads(self._get_meta('key_order') or '["taskPool", "completedTasks"]')
+
+        sections = dict(extras)
+        sections['taskPool'] = [
+            json.loads(row['data'])
+            for row in self.conn.execute('SELECT data FROM tasks ORDER BY seq')
+        ]
+        sections['completedTasks'] = [
+            json.loads(row['data'])
+            for row in self.conn.execute('SELECT data FROM completed_tasks ORDER BY seq')
+        ]
+
+        ordered = {k: sections[k] for k in key_order if k in sections}
+        ordered.update({k: v for k, v in sections.items() if k not in ordered})
+        return ordered
+
+    def export_json(self, path: Optional[str] = None):
+        """
+        原子写出 task-pool.json，并记录签名避免下次打开时重复导入
+
+        Args:
+            path: 输出路径，默认写回 json_path
+        """
+        path = path or self.json_path
+        write_json_atomic(path, self.export_data())
+
+        if path == self.json_path:
+            with open(path, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            with self.conn:
+                self._set_meta('json_sha256', digest)
+                self._set_meta('json_signature', self._json_signature())
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        """按 ID 获取任务"""
+        row = self.conn.execute(
+            'SELECT data FROM tasks WHERE id = ? ORDER BY seq LIMIT 1', (task_id,)
+        ).fetchone()
+        return json.loads(row['data']) if row else None
+
+    def find(
+        self,
+        status: Optional[str] = None,
+        task_type: Optional[str] = None,
+        assigned_to: Optional[str] = None,
+        created_after: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        按索引字段查询任务，结果按任务池原有顺序排列
+
+        Args:
+            status: 任务状态
+            task_type: 任务类型（backend/frontend/qa）
+            assigned_to: 负责人
+            created_after: 只返回创建时间晚于该 ISO 时间的任务
+            limit: 最多返回条数
+        """
+        clauses, params = [], []
+        for column, value in (('status', status), ('type', task_type), ('assigned_to', assigned_to)):
+            if value is not None:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        if created_after is not None:
+            clauses.append('created_at > ?')
+            params.append(created_after)
+
+        sql = 'SELECT data FROM tasks'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY seq'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        return [json.loads(row['data']) for row in self.conn.execute(sql, params)]
+
+    def count(self, status: Optional[str] = None) -> int:
+        """任务数量，可按状态过滤"""
+        if status is None:
+            return self.conn.execute('SELECT COUNT(*) FROM tasks').fetchone()[0]
+        return self.conn.execute('SELECT COUNT(*) FROM tasks WHERE status = ?', (status,)).fetchone()[0]
+
+    def count_by_status(self) -> Dict[str, int]:
+        """各状态的任务数量"""
+        rows = self.conn.execute('SELECT status, COUNT(*) AS n FROM tasks GROUP BY status')
+        return {row['status']: row['n'] for row in rows}
+
+    def completed_count(self) -> int:
+        """completedTasks 中的任务数量"""
+        return self.conn.execute('SELECT COUNT(*) FROM completed_tasks').fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    def add_tasks(self, tasks: Iterable[Dict]) -> int:
+        """
+        在一个事务中追加任务
+
+        Args:
+            tasks: 任务列表
+
+        Returns:
+            新增数量
+        """
+        with self.conn:
+            next_seq = self.conn.execute('SELECT COALESCE(MAX(seq), -1) + 1 FROM tasks').fetchone()[0]
+            rows = [self._row_values(task, next_seq + i) for i, task in enumerate(tasks)]
+            self.conn.executemany(
+                'INSERT INTO tasks (seq, id, status, type, assigned_to, created_at, data) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+        return len(rows)
+
+    def update_task(self, task_id: str, **fields: Any) -> bool:
+        """
+        更新单个任务的字段（同一事务内同步索引列）
+
+        Args:
+            task_id: 任务 ID
+            **fields: 要更新的字段，如 status='created', github_issue=12
+
+        Returns:
+            是否找到并更新了任务
+        """
+        with self.conn:
+            rows = self.conn.execute('SELECT seq, data FROM tasks WHERE id = ?', (task_id,)).fetchall()
+            for row in rows:
+                task = json.loads(row['data'])
+                task.update(fields)
+                self.conn.execute(
+                    'UPDATE tasks SET status = ?, type = ?, assigned_to = ?, created_at = ?, data = ? WHERE seq = ?',
+                    (
+                        task.get('status'),
+                        task.get('type'),
+                        task.get('assignedTo'),
+                        task.get('createdAt'),
+                        json.dumps(task, ensure_ascii=False),
+                        row['seq']
+                    )
+                )
+        return bool(rows)
+
+    def set_status(self, task_id: str, status: str, **extra: Any) -> bool:
+        """更新任务状态，可附带其他字段"""
+        return self.update_task(task_id, status=status, **extra)
+
+
+if __name__ == '__main__':
+    # 打印任务池统计
+    with TaskStore() as store:
+        print(f"任务总数: {store.count()}")
+        for task_status, n in sorted(store.count_by_status().items(), key=lambda item: str(item[0])):
+            print(f"  {task_status}: {n}")
@@ -0,0 +1,224 @@
+"""
+任务摘要存储
+每日任务摘要以增量形式保存（新增任务、状态变更），定期写入完整检查点，
+并可重建任意日期的完整任务状态
+"""
+import os
+import sys
+import json
+from datetime import date as date_cls
+from typing import Dict, List, Optional
+
+try:
+    from scripts.utils.state_file import write_json_atomic
+except ImportError:  # 直接运行本文件时
+    from state_file import write_json_atomic
+
+SUMMARY_DIR = 'docs/game-research/task-summaries'
+CHECKPOINT_INTERVAL_DAYS = 7
+
+
+def _summary_path(summary_dir: str, day: str) -> str:
+    return os.path.join(summary_dir, f"{day}.json")
+
+
+def _list_dates(summary_dir: str) -> List[str]:
+    """按日期升序列出已有的摘要"""
+    if not os.path.isdir(summary_dir):
+        return []
+    return sorted(name[:-5] for name in os.listdir(summary_dir) if name.endswith('.json'))
+
+
+def _read(summary_dir: str, day: str) -> Dict:
+    with open(_summary_path(summary_dir, day), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _is_checkpoint(summary: Dict) -> bool:
+    """旧格式（没有 kind 字段）的完整快照也视为检查点"""
+    return summary.get('kind', 'checkpoint') == 'checkpoint'
+
+
+def _counts(tasks: List[Dict], completed_count: int) -> Dict:
+    return {
+        'pending_tasks': sum(1 for t in tasks if t.get('status') == 'pending'),
+        'in_progress_tasks': sum(1 for t in tasks if t.get('status') == 'in-progress'),
+        'completed_tasks': completed_count
+    }
+
+
+def load_summary_state(day: str, summary_dir: str = SUMMARY_DIR) -> Optional[Dict]:
+    """
+    重建指定日期（含）之前最近一次摘要的完整任务状态
+
+    Args:
+        day: 日期（YYYY-MM-DD）
+        summary_dir: 摘要目录
+
+    Returns:
+        包含 date、tasks、checkpoint 及各状态计数的字典，没有摘要时返回 None
+    """
+    dates = [d for d in _list_dates(summary_dir) if d <= day]
+    if not dates:
+        return None
+
+    # 向前找到最近的检查点，再依次应用之后的增量
+    chain = []
+    for d in reversed(dates):
+        summary = _read(summary_dir, d)
+        chain.append(summary)
+        if _is_checkpoint(summary):
+            break
+    chain.reverse()
+
+    if not _is_checkpoint(chain[0]):
+        raise ValueError(f"找不到 {day} 之前的任务摘要检查点")
+
+    tasks = list(chain[0].get('tasks', []))
+    for delta in chain[1:]:
+        tasks = _apply_delta(tasks, delta)
+
+    latest = chain[-1]
+    return {
+        'date': latest['date'],
+        'checkpoint': chain[0]['date'],
+        'pending_tasks': latest.get('pending_tasks', 0),
+        'in_progress_tasks': latest.get('in_progress_tasks', 0),
+        'completed_tasks': latest.get('completed_tasks', 0),
+        'tasks': tasks
+    }
+
+
+def _apply_delta(tasks: List[Dict], delta: Dict) -> List[Dict]:
+    """把一天的增量应用到任务列表"""
+    removed = set(delta.get('removed', []))
+    changes = {c['id']: c['to'] for c in delta.get('statusChanges', [])}
+    updates = {u['id']: u['fields'] for u in delta.get('updated', [])}
+
+    result = []
+    for task in tasks:
+        task_id = task.get('id')
+        if task_id in removed:
+            continue
+        if task_id in changes or task_id in updates:
+            task = dict(task)
+            task.update(updates.get(task_id, {}))
+            if task_id in changes:
+                task['status'] = changes[task_id]
+        result.append(task)
+
+    result.extend(delta.get('added', []))
+    return result
+
+
+def _diff(previous: List[Dict], current: List[Dict]) -> Dict:
+    """计算两份任务列表之间的增量"""
+    before = {t.get('id'): t for t in previous}
+    after_ids = set()
+    added, status_changes, updated = [], [], []
+
+    for task in current:
+        task_id = task.get('id')
+        after_ids.add(task_id)
+        old = before.get(task_id)
+        if old is None:
+            added.append(task)
+            continue
+        if old.get('status') != task.get('status'):
+            status_changes.append({'id': task_id, 'from': old.get('status'), 'to': task.get('status')})
+        fields = {k: v for k, v in task.items() if k != 'status' and old.get(k) != v}
+        if fields:
+            updated.append({'id': task_id, 'fields': fields})
+
+    removed = [task_id for task_id in before if task_id not in after_ids]
+    return {
+        'added': added,
+        'statusChanges': status_changes,
+        'updated': updated,
+        'removed': removed
+    }
+
+
+def write_daily_summary(
+    task_data: Dict,
+    day: Optional[str] = None,
+    summary_dir: str = SUMMARY_DIR,
+    checkpoint_interval: int = CHECKPOINT_INTERVAL_DAYS
+) -> str:
+    """
+    写入当日任务摘要：距上次检查点超过间隔时写完整检查点，否则只写相对前一次摘要的增量
+
+    同一天多次运行时，始终相对前一天的状态重新计算当日增量
+
+    Args:
+        task_data: task-pool.json 内容
+        day: 日期（YYYY-MM-DD），默认今天
+        summary_dir: 摘要目录
+        checkpoint_interval: 检查点间隔（天）
+
+    Returns:
+        摘要文件路径
+    """
+    day = day or date_cls.today().isoformat()
+    tasks = task_data.get('taskPool', [])
+    counts = _counts(tasks, len(task_data.get('completedTasks', [])))
+
+    previous_dates = [d for d in _list_dates(summary_dir) if d < day]
+    previous = load_summary_state(previous_dates[-1], summary_dir) if previous_dates else None
+
+    if previous is None or _days_between(previous['checkpoint'], day) >= checkpoint_interval:
+        summary = {'date': day, 'kind': 'checkpoint', **counts, 'tasks': tasks}
+    else:
+        summary = {
+            'date': day,
+            'kind': 'delta',
+            'base': previous['date'],
+            'checkpoint': previous['checkpoint'],
+            **counts,
+            **_diff(previous['tasks'], tasks)
+        }
+
+    path = _summary_path(summary_dir, day)
+    write_json_atomic(path, summary)
+    return path
+
+
+def _days_between(start: str, end: str) -> int:
+    return (date_cls.fromisoformat(end) - date_cls.fromisoformat(start)).days
+
+
+def compact(summary_dir: str = SUMMARY_DIR, checkpoint_interval: int = CHECKPOINT_INTERVAL_DAYS):
+    """
+    把目录中的历史完整快照改写为检查点 + 增量格式，改写后逐日校验重建结果
+
+    Args:
+        summary_dir: 摘要目录
+        checkpoint_interval: 检查点间隔（天）
+    """
+    dates = _list_dates(summary_dir)
+    snapshots = {d: load_summary_state(d, summary_dir) for d in dates}
+
+    # 按日期顺序重写，后面的增量基于前面已改写的文件
+    for d in dates:
+        snapshot = snapshots[d]
+        task_data = {'taskPool': snapshot['tasks'], 'completedTasks': [None] * snapshot['completed_tasks']}
+        write_daily_summary(task_data, d, summary_dir, checkpoint_interval)
+
+    for d in dates:
+        if load_summary_state(d, summary_dir)['tasks'] != snapshots[d]['tasks']:
+            raise ValueError(f"{d} 的任务摘要重建结果不一致")
+
+    print(f"✅ 已将 {len(dates)} 份任务摘要改写为增量格式")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'compact':
+        compact()
+    elif len(sys.argv) > 1:
+        state = load_summary_state(sys.argv[1])
+        if state is None:
+            print(f"❌ {sys.argv[1]} 之前没有任务摘要")
+        else:
+            print(json.dumps(state, ensure_ascii=False, indent=2))
+    else:
+        print("用法: python scripts/utils/task_summaries.py <YYYY-MM-DD> | compact")